@@ -72,6 +72,7 @@ TEMPLATES = [
                 'django.contrib.messages.context_processors.messages',
                 'cart.context_processors.cart_count',
                 'orders.context_processors.orders_count',
+                'catalog.context_processors.category_nav',
 
 
             ],
@@ -93,6 +94,19 @@ DATABASES = {
 }
 
 
+# Cache
+# LocMem: tek süreç / geliştirme için yeterli. Birden fazla worker'da
+# (gunicorn vb.) Redis veya Memcached backend'i kullanılmalı.
+# Ürün kartı fragmanları (catalog/cards.py) burada tutulur.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'griwear',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -141,5 +155,52 @@ LOGOUT_REDIRECT_URL = "home"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Ürün görseli türevleri (catalog/images.py)
+# ASYNC=False → türevler commit sonrası aynı istekte üretilir (test/debug)
+IMAGE_VARIANTS_ASYNC = True
+IMAGE_VARIANT_WORKERS = 2
+
+# Arama önerileri (catalog/autocomplete.py): bellekteki indeks bu kadar
+# saniyede bir arka planda tamamen yenilenir (diğer worker'ların kayıtları)
+AUTOCOMPLETE_REFRESH_SECONDS = 300
+
+# Sepet deposu (cart/backends.py):
+# - SessionCartBackend: session'da (varsayılan, ek tablo yok)
+# - DatabaseCartBackend: CartLine tablosu, sadece değişen satır yazılır
+# - CacheCartBackend: cache'te satır başına anahtar (Redis vb. ile kalıcı)
+CART_BACKEND = "cart.backends.SessionCartBackend"
+
+# Stok rezervasyonu (catalog/reservations.py): sepete eklenen ürünün
+# stoğu bu kadar saniye tutulur. Süresi dolanları sweep_reservations
+# komutu (cron) stoğa geri koyar. 0 → kapalı (stok checkout'ta düşer).
+STOCK_RESERVATION_SECONDS = 15 * 60
+
+# Stok yazımlarında eşzamanlılık (catalog/inventory.py):
+# - "pessimistic": koşullu UPDATE + select_for_update (varsayılan)
+# - "optimistic": kilitsiz okuma + Product.version ile compare-and-swap;
+#   çakışmada en fazla STOCK_CAS_ATTEMPTS deneme, aralarda rastgele ve
+#   her seferinde ikiye katlanan bekleme (STOCK_CAS_BACKOFF saniye'den)
+# Karşılaştırma: python manage.py benchmark_stock
+STOCK_CONCURRENCY = "pessimistic"
+STOCK_CAS_ATTEMPTS = 5
+STOCK_CAS_BACKOFF = 0.005
+
+# İş kuyruğu (orders/tasks.py, run_worker komutu): hata alan iş en fazla
+# TASK_MAX_ATTEMPTS kez denenir; aralarda rastgele ve her seferinde ikiye
+# katlanan bekleme (TASK_RETRY_BACKOFF saniye'den). Bu kadar saniyedir
+# "running" kalan iş (çöken worker) sıraya geri alınır: TASK_CLAIM_TIMEOUT
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = 30
+TASK_CLAIM_TIMEOUT = 10 * 60
+
+# Sipariş bildirim e-postaları (run_worker gönderir); geliştirmede konsola
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+DEFAULT_FROM_EMAIL = "GriWear <siparis@griwear.local>"
+
+# Katalog sayfaları (catalog/conditional.py): anonim + boş sepetli
+# ziyaretçiye "public, max-age=..." → önündeki proxy bu kadar saniye
+# Django'ya sormadan cevaplayabilir. Diğerleri ETag ile 304 alır.
+CATALOG_CACHE_SECONDS = 60
+
 STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
@@ -1,4 +1,16 @@
 from django.shortcuts import render
 
+from catalog.models import Product
+
+HOME_NEW_PRODUCTS = 8
+
+
 def home(request):
-    return render(request, "home.html")
+    # home.html "Yeni Gelenler" vitrini için (product_live_new_idx kullanır)
+    new_products = (
+        Product.objects
+        .filter(is_active=True, is_new=True)
+        .select_related("category")
+        .order_by("-created_at", "-id")[:HOME_NEW_PRODUCTS]
+    )
+    return render(request, "home.html", {"new_products": list(new_products)})
@@ -0,0 +1,171 @@
+# ============================================================
+# cart/backends.py  —  GRİWEAR SEPET DEPOLARI
+# ============================================================
+# Hepsi aynı arayüzü sunar (CartService bunları kullanır):
+#   load()          → {product_id: qty}
+#   write(changes)  → {product_id: qty}; qty 0 = satırı sil
+#   clear()
+#
+# Hangisi kullanılacak? settings.CART_BACKEND (import yolu)
+# - SessionCartBackend  (varsayılan) session'da {"pid": {"qty": n}}
+# - DatabaseCartBackend CartLine tablosu, satır bazlı yazma
+# - CacheCartBackend    cache'te satır başına bir anahtar
+#
+# DB ve cache depoları session'a sadece bir kez "cart_key" yazar;
+# sonraki sepet değişiklikleri session satırına hiç dokunmaz.
+
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+CART_SESSION_KEY = "cart"
+CART_KEY_SESSION_KEY = "cart_key"
+
+DEFAULT_BACKEND = "cart.backends.SessionCartBackend"
+
+
+def get_backend_class():
+    return import_string(getattr(settings, "CART_BACKEND", DEFAULT_BACKEND))
+
+
+def get_cart_key(session, create=False):
+    # Sepetin kalıcı kimliği (DB/cache satırları, stok rezervasyonları)
+    key = session.get(CART_KEY_SESSION_KEY)
+    if key is None and create:
+        key = secrets.token_hex(16)
+        session[CART_KEY_SESSION_KEY] = key
+    return key
+
+
+class SessionCartBackend:
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def load(self):
+        cart = self.session.get(CART_SESSION_KEY) or {}
+        return {int(pid): int(item.get("qty", 0)) for pid, item in cart.items()}
+
+    def write(self, changes):
+        cart = self.session.get(CART_SESSION_KEY) or {}
+        for pid, qty in changes.items():
+            if qty > 0:
+                cart[str(pid)] = {"qty": qty}
+            else:
+                cart.pop(str(pid), None)
+        self.session[CART_SESSION_KEY] = cart
+
+    def clear(self):
+        self.session.pop(CART_SESSION_KEY, None)
+
+
+class _KeyedCartBackend:
+    # Session'da sadece sepet anahtarı; satırlar başka yerde
+
+    def __init__(self, request):
+        self.session = request.session
+
+    def cart_key(self, create=False):
+        return get_cart_key(self.session, create)
+
+
+class DatabaseCartBackend(_KeyedCartBackend):
+
+    def load(self):
+        from .models import CartLine
+
+        key = self.cart_key()
+        if key is None:
+            return {}
+        return dict(CartLine.objects.filter(cart_key=key).values_list("product_id", "quantity"))
+
+    def write(self, changes):
+        from django.utils import timezone
+
+        from .models import CartLine
+
+        key = self.cart_key(create=True)
+        removed = [pid for pid, qty in changes.items() if qty <= 0]
+        kept = [
+            CartLine(cart_key=key, product_id=pid, quantity=qty, updated_at=timezone.now())
+            for pid, qty in changes.items() if qty > 0
+        ]
+        if removed:
+            CartLine.objects.filter(cart_key=key, product_id__in=removed).delete()
+        if kept:
+            # Tek INSERT ... ON CONFLICT DO UPDATE: yeni satır eklenir, var olanın adedi güncellenir
+            CartLine.objects.bulk_create(
+                kept,
+                update_conflicts=True,
+                unique_fields=["cart_key", "product"],
+                update_fields=["quantity", "updated_at"],
+            )
+
+    def clear(self):
+        from .models import CartLine
+
+        key = self.cart_key()
+        if key is not None:
+            CartLine.objects.filter(cart_key=key).delete()
+
+
+class CacheCartBackend(_KeyedCartBackend):
+    # ------------------------------------------------------------
+    # Anahtarlar:
+    #   cart:<key>:index      → sepetteki ürün id listesi
+    #   cart:<key>:<pid>      → adet
+    # Adet değişince sadece o satırın anahtarı yazılır; index yalnızca
+    # ürün eklenip çıkarılınca değişir.
+    # ------------------------------------------------------------
+
+    def __init__(self, request):
+        super().__init__(request)
+        self.cache = caches[getattr(settings, "CART_CACHE_ALIAS", "default")]
+        self.timeout = getattr(settings, "CART_CACHE_TIMEOUT", 60 * 60 * 24 * 30)
+
+    def _index_key(self, key):
+        return f"cart:{key}:index"
+
+    def _line_key(self, key, pid):
+        return f"cart:{key}:{pid}"
+
+    def load(self):
+        key = self.cart_key()
+        if key is None:
+            return {}
+        pids = self.cache.get(self._index_key(key)) or []
+        found = self.cache.get_many([self._line_key(key, pid) for pid in pids])
+        lines = {}
+        for pid in pids:
+            qty = found.get(self._line_key(key, pid))
+            if qty:
+                lines[pid] = qty
+        return lines
+
+    def write(self, changes):
+        key = self.cart_key(create=True)
+        index_key = self._index_key(key)
+        pids = self.cache.get(index_key) or []
+
+        kept = {self._line_key(key, pid): qty for pid, qty in changes.items() if qty > 0}
+        removed = [pid for pid, qty in changes.items() if qty <= 0]
+        if kept:
+            self.cache.set_many(kept, timeout=self.timeout)
+        if removed:
+            self.cache.delete_many([self._line_key(key, pid) for pid in removed])
+
+        new_pids = [pid for pid in pids if pid not in removed]
+        new_pids += [pid for pid, qty in changes.items() if qty > 0 and pid not in new_pids]
+        if new_pids != pids:
+            self.cache.set(index_key, new_pids, timeout=self.timeout)
+        else:
+            self.cache.touch(index_key, timeout=self.timeout)
+
+    def clear(self):
+        key = self.cart_key()
+        if key is None:
+            return
+        pids = self.cache.get(self._index_key(key)) or []
+        self.cache.delete_many([self._index_key(key)] + [self._line_key(key, pid) for pid in pids])
@@ -1,4 +1,6 @@
+from .services import CartService
+
+
 def cart_count(request):
-    cart = request.session.get("cart", {})  # senin CART_SESSION_KEY "cart"
-    count = sum(item.get("qty", 0) for item in cart.values())
-    return {"cart_count": count}
+    # Sepet deposu settings.CART_BACKEND'e göre (bkz. cart/backends.py)
+    return {"cart_count": CartService.for_request(request).count()}
@@ -1,3 +1,31 @@
+# ============================================================
+# cart/models.py  —  GRİWEAR
+# Konu: DB sepet satırı (CART_BACKEND = DatabaseCartBackend iken)
+# ============================================================
+
 from django.db import models
 
-# Create your models here.
+
+# ============================================================
+# CART LINE — NEDEN AYRI TABLO?
+# ============================================================
+# Session sepeti her değişiklikte tüm session satırını yeniden yazar.
+# Burada her ürün ayrı satır: adet değişince sadece o satır güncellenir.
+#
+# cart_key: session'da bir kez üretilen rastgele anahtar (bkz. backends.py)
+# - login/logout'ta session anahtarı değişse de sepet kaybolmaz
+class CartLine(models.Model):
+    cart_key = models.CharField(max_length=32)
+    product = models.ForeignKey("catalog.Product", related_name="cart_lines", on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+
+    # Terk edilmiş sepetleri temizlemek için
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart_key", "product"], name="cart_line_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.cart_key}: {self.product_id} x {self.quantity}"
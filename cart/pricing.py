@@ -0,0 +1,85 @@
+# ============================================================
+# cart/pricing.py  —  GRİWEAR FİYATLAMA (Decimal)
+# ============================================================
+# NEDEN?
+# - cart_detail toplamı float ile (qty * float(price)) hesaplıyordu,
+#   checkout Decimal ile → sepet ve checkout toplamı kuruş farkıyla
+#   ayrışabiliyordu.
+# - Sepet sayfası, toplu güncelleme (cart_update) ve checkout artık
+#   aynı fonksiyonla, aynı yuvarlamayla hesaplar.
+#
+# ÜRÜN HAFIZASI (memo):
+# - Yüklenen ürün satırları istek boyunca request üzerinde saklanır.
+#   Aynı istekte ikinci kez fiyatlama yapılırsa DB'ye tekrar gidilmez;
+#   checkout POST ürünleri kilitten önce bir kez okur.
+
+from decimal import ROUND_HALF_UP, Decimal
+
+from catalog.models import Product
+
+TWO_PLACES = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def money(value):
+    return Decimal(value).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def load_products(request, product_ids):
+    # ------------------------------------------------------------
+    # Dönüş: {id: Product} — sadece aktif ürünler
+    # Hafızada olmayan id'ler TEK sorguyla çekilir; bulunamayanlar da
+    # (None olarak) hatırlanır → tekrar sorulmaz.
+    # ------------------------------------------------------------
+    memo = getattr(request, "_product_memo", None)
+    if memo is None:
+        memo = request._product_memo = {}
+
+    missing = {int(pid) for pid in product_ids} - memo.keys()
+    if missing:
+        found = Product.objects.filter(id__in=missing, is_active=True).order_by()
+        found = {p.id: p for p in found}
+        for pid in missing:
+            memo[pid] = found.get(pid)
+
+    return {pid: memo[int(pid)] for pid in product_ids if memo.get(int(pid)) is not None}
+
+
+def price_lines(request, lines):
+    # ------------------------------------------------------------
+    # lines: {product_id: qty}  (CartService.lines())
+    # Dönüş:
+    #   items:    [{"product", "quantity", "unit_price", "line_total"}]
+    #   subtotal: satır toplamları
+    #   total:    ödenecek tutar (kargo/indirim gelince burada eklenir)
+    #   count:    toplam adet
+    #   missing:  sepette olup artık satılmayan ürün id'leri
+    # ------------------------------------------------------------
+    products = load_products(request, list(lines))
+
+    items, subtotal, count, missing = [], ZERO, 0, []
+    for pid, qty in lines.items():
+        product = products.get(pid)
+        if product is None:
+            missing.append(pid)
+            continue
+        if qty <= 0:
+            continue
+        unit_price = money(product.price)
+        line_total = money(unit_price * qty)
+        subtotal += line_total
+        count += qty
+        items.append({
+            "product": product,
+            "quantity": qty,
+            "unit_price": unit_price,
+            "line_total": line_total,
+        })
+
+    return {
+        "items": items,
+        "subtotal": subtotal,
+        "total": subtotal,
+        "count": count,
+        "missing": missing,
+    }
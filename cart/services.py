@@ -0,0 +1,108 @@
+# ============================================================
+# cart/services.py  —  GRİWEAR SEPET SERVİSİ
+# ============================================================
+# NEDEN?
+# - Sepet mantığı iki yerde kopyaydı (cart.views ve orders.views) ve
+#   ikisi de session içindeki ham sözlüğe doğrudan uzanıyordu.
+# - Artık sepete dokunan her yer (sepet view'ları, cart_count,
+#   checkout, conditional GET) CartService üzerinden gider.
+# - Depo settings.CART_BACKEND ile seçilir (bkz. backends.py).
+#
+# Kullanım:
+#   cart = CartService.for_request(request)
+#   cart.add(product.id)          # +1
+#   cart.update({3: 2, 7: 0})     # mutlak adetler; 0 = çıkar
+#   cart.lines()                  # {product_id: qty}
+#   cart.count()                  # toplam adet (navbar rozeti)
+#   cart.clear()
+#
+# Okuma istek başına bir kez yapılır; yazmada sadece adedi gerçekten
+# değişen satırlar depoya gider.
+#
+# STOK REZERVASYONU (catalog/reservations.py, açıksa):
+# - update() önce stok tutmasını ayarlar; stok yetmeyen satır sepete
+#   yazılmaz (dönen "changes" içinde olmaz)
+# - max_quantity(): bu sepetin alabileceği en fazla adet
+#   = satılabilir stok (kovalar dahil, Product.available_stock)
+#     + bu sepetin zaten tuttuğu
+
+from catalog import reservations
+
+from .backends import get_backend_class, get_cart_key
+
+
+class CartService:
+
+    def __init__(self, request, backend=None):
+        self.session = request.session
+        self.backend = backend or get_backend_class()(request)
+        self._lines = None
+        self._held = None
+
+    @classmethod
+    def for_request(cls, request):
+        # Aynı istekte view + context processor aynı nesneyi paylaşır
+        service = getattr(request, "_cart_service", None)
+        if service is None:
+            service = request._cart_service = cls(request)
+        return service
+
+    def lines(self):
+        if self._lines is None:
+            self._lines = self.backend.load()
+        return dict(self._lines)
+
+    def quantity(self, product_id):
+        return self.lines().get(int(product_id), 0)
+
+    def count(self):
+        return sum(self.lines().values())
+
+    def __bool__(self):
+        return bool(self.lines())
+
+    def key(self, create=False):
+        return get_cart_key(self.session, create)
+
+    def held(self):
+        if self._held is None:
+            self._held = reservations.held(self.key()) if reservations.enabled() else {}
+        return dict(self._held)
+
+    def max_quantity(self, product):
+        return product.available_stock + self.held().get(product.id, 0)
+
+    def update(self, quantities):
+        current = self.lines()
+        changes = {}
+        for pid, qty in quantities.items():
+            pid, qty = int(pid), max(int(qty), 0)
+            if current.get(pid, 0) != qty:
+                changes[pid] = qty
+        if changes and reservations.enabled():
+            held = self.held()
+            granted = reservations.sync(self.key(create=True), changes)
+            self._held = {**held, **granted}
+            changes = {pid: qty for pid, qty in changes.items() if pid in granted}
+        if changes:
+            self.backend.write(changes)
+            for pid, qty in changes.items():
+                if qty:
+                    self._lines[pid] = qty
+                else:
+                    self._lines.pop(pid, None)
+        return changes
+
+    def add(self, product_id, qty=1):
+        return self.update({product_id: self.quantity(product_id) + qty})
+
+    def remove(self, product_id):
+        return self.update({product_id: 0})
+
+    def clear(self):
+        # Checkout tutmaları önce siparişe çevirir; kalan varsa stoğa döner
+        if reservations.enabled():
+            reservations.release(self.key())
+            self._held = {}
+        self.backend.clear()
+        self._lines = {}
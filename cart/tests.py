@@ -1,3 +1,138 @@
-from django.test import TestCase
+import re
 
-# Create your tests here.
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog import cards
+from catalog.models import Category, Product, StockReservation
+
+from .models import CartLine
+
+BACKENDS = [
+    "cart.backends.SessionCartBackend",
+    "cart.backends.DatabaseCartBackend",
+    "cart.backends.CacheCartBackend",
+]
+
+
+# ============================================================
+# CART SERVICE — her depo aynı davranmalı
+# ============================================================
+class CartBackendTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.products = [
+            Product.objects.create(category=category, name=f"Şapka {i}", slug=f"sapka-{i}", price=100, stock=10)
+            for i in range(3)
+        ]
+
+    def run_flow(self):
+        a, b, c = self.products
+        self.client.post(reverse("cart:add", args=[a.id]))
+        self.client.post(reverse("cart:add", args=[a.id]))
+        self.client.post(reverse("cart:add", args=[b.id]))
+        self.client.post(reverse("cart:add", args=[c.id]))
+        self.client.post(reverse("cart:remove", args=[c.id]))
+
+        response = self.client.get(reverse("cart:detail"))
+        self.assertEqual(response.context["cart_count"], 3)
+        self.assertEqual({item["product"].id: item["quantity"] for item in response.context["items"]}, {a.id: 2, b.id: 1})
+
+    def test_backends(self):
+        for backend in BACKENDS:
+            with self.subTest(backend=backend), override_settings(CART_BACKEND=backend):
+                self.client.logout()
+                self.client.cookies.clear()
+                self.run_flow()
+
+    def test_add_and_remove_require_post(self):
+        a = self.products[0]
+        for name in ("cart:add", "cart:remove"):
+            with self.subTest(name=name):
+                self.assertEqual(self.client.get(reverse(name, args=[a.id])).status_code, 405)
+        self.assertEqual(self.client.get(reverse("cart:detail")).context["cart_count"], 0)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_search_card_posts_with_own_csrf_token(self):
+        a = self.products[0]
+        url = reverse("catalog:search") + "?q=sapka"
+        first, second = Client(enforce_csrf_checks=True), Client(enforce_csrf_checks=True)
+        first.get(url)  # kartlar cache'e yazılır
+
+        response = second.get(url)
+        self.assertContains(response, f'action="{reverse("cart:add", args=[a.id])}"')
+        self.assertNotContains(response, cards.CSRF_PLACEHOLDER)
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+
+        added = second.post(reverse("cart:add", args=[a.id]), {"csrfmiddlewaretoken": token})
+        self.assertRedirects(added, reverse("cart:detail"), fetch_redirect_response=False)
+        # Başka ziyaretçinin token'ı bu oturumda geçmez
+        self.assertEqual(first.post(reverse("cart:add", args=[a.id]), {"csrfmiddlewaretoken": token}).status_code, 403)
+
+    @override_settings(CART_BACKEND="cart.backends.DatabaseCartBackend", STOCK_RESERVATION_SECONDS=0)
+    def test_database_backend_writes_single_line(self):
+        a, b, _ = self.products
+        self.client.post(reverse("cart:add", args=[a.id]))
+        self.client.post(reverse("cart:add", args=[b.id]))
+
+        # İkinci artışta session satırına dokunulmaz, sadece CartLine yazılır
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("cart:add", args=[a.id]))
+        writes = [q["sql"] for q in ctx.captured_queries if not q["sql"].startswith("SELECT")]
+        self.assertEqual(len(writes), 1, writes)
+        self.assertIn("cart_cartline", writes[0])
+        self.assertEqual(CartLine.objects.get(product=a).quantity, 2)
+
+
+# ============================================================
+# CART UPDATE — toplu JSON güncelleme
+# ============================================================
+class CartUpdateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.products = [
+            Product.objects.create(category=category, name=f"Kemer {i}", slug=f"kemer-{i}", price=150, stock=i)
+            for i in range(5)
+        ]
+
+    def post(self, items):
+        return self.client.post(reverse("cart:update"), {"items": items}, content_type="application/json")
+
+    def test_sets_many_quantities_with_one_product_query(self):
+        _, p1, p2, p3, p4 = self.products
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post([
+                {"product_id": p1.id, "qty": 1},
+                {"product_id": p2.id, "qty": 2},
+                {"product_id": p3.id, "qty": 9},
+                {"product_id": p4.id, "qty": 4},
+            ])
+        product_queries = [
+            q for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and 'FROM "catalog_product"' in q["sql"]
+        ]
+        self.assertEqual(len(product_queries), 1)
+
+        data = response.json()
+        self.assertEqual({i["product_id"]: i["qty"] for i in data["items"]}, {p1.id: 1, p2.id: 2, p3.id: 3, p4.id: 4})
+        self.assertEqual(data["count"], 10)
+        self.assertEqual(data["total"], "1500.00")
+        self.assertEqual([a["product_id"] for a in data["adjusted"]], [p3.id])
+
+    def test_zero_removes_and_sold_out_is_rejected(self):
+        p0, p1 = self.products[:2]
+        self.post([{"product_id": p1.id, "qty": 1}])
+        data = self.post([{"product_id": p1.id, "qty": 0}, {"product_id": p0.id, "qty": 1}]).json()
+        self.assertEqual(data["items"], [])
+        self.assertEqual([e["product_id"] for e in data["errors"]], [p0.id])
+
+    def test_rejects_bad_payload(self):
+        self.assertEqual(self.post("x").status_code, 400)
+        self.assertEqual(self.post([{"product_id": self.products[1].id, "qty": -1}]).status_code, 400)
+        self.assertEqual(self.client.get(reverse("cart:update")).status_code, 405)
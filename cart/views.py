@@ -1,98 +1,136 @@
+import json
+
+from django.http import JsonResponse
 from django.shortcuts import redirect, render, get_object_or_404
+from django.views.decorators.http import require_POST
 from catalog.models import Product
 from django.contrib import messages
 
+from . import pricing
+from .services import CartService
 
-CART_SESSION_KEY = "cart"
-
-
-def _get_cart(session):
-    cart = session.get(CART_SESSION_KEY)
-    if cart is None:
-        cart = {}
-        session[CART_SESSION_KEY] = cart
-    return cart
+# Tek istekte en fazla bu kadar satır (kötüye kullanım sınırı)
+MAX_UPDATE_LINES = 100
 
 
+# NEDEN POST? Sepete ekleme stok tutar (catalog/reservations.py);
+# GET ile çalışsaydı tarayıcı ön yüklemesi / bot linki stok kilitlerdi
+@require_POST
 def cart_remove(request, product_id):
-    cart = _get_cart(request.session)
-    pid = str(product_id)
-
-    if pid in cart:
-        del cart[pid]
-        request.session.modified = True
-
+    CartService.for_request(request).remove(product_id)
     return redirect("cart:detail")
 
+
+@require_POST
 def cart_add(request, product_id):
     product = get_object_or_404(Product, id=product_id, is_active=True)
+    cart = CartService.for_request(request)
+
+    # Bu sepetin alabileceği en fazla adet: satılabilir stok + zaten tuttuğu
+    # (stok rezervasyonu, bkz. catalog/reservations.py)
+    limit = cart.max_quantity(product)
 
     # 🔒 1) Stok 0 kontrolü
-    if product.stock <= 0:
+    if limit <= 0:
         messages.error(request, "Bu ürün tükendi.")
         return redirect("catalog:product_detail", slug=product.slug)
 
-    cart = _get_cart(request.session)
-    pid = str(product.id)
-
-    current_qty = cart.get(pid, {}).get("qty", 0)
+    current_qty = cart.quantity(product.id)
 
     # 🔒 2) Stok limit kontrolü
-    if current_qty + 1 > product.stock:
+    if current_qty + 1 > limit:
         messages.warning(request, "Stok limiti aşılamaz. Daha fazla ekleyemezsin.")
         return redirect("cart:detail")
 
-    # 🔒 3) Sepete ekle
-    if pid in cart:
-        cart[pid]["qty"] += 1
-    else:
-        cart[pid] = {"qty": 1}
-
-    request.session.modified = True
-    return redirect("cart:detail")
-
-    product = get_object_or_404(Product, id=product_id, is_active=True)
-
-    cart = _get_cart(request.session)
-    pid = str(product.id)
-
-    # ✅ 1) Stok 0 ise ekleme yok
-    if product.stock <= 0:
-        return redirect("cart:detail")
-
-    current_qty = cart.get(pid, {}).get("qty", 0)
-
-    # ✅ 2) Stok sınırı: mevcut + 1 > stock ise arttırma yok
-    if current_qty + 1 > product.stock:
-        return redirect("cart:detail")
-
-    # ✅ Ekleme
-    if pid in cart:
-        cart[pid]["qty"] += 1
-    else:
-        cart[pid] = {"qty": 1}
-
-    request.session.modified = True
+    # 🔒 3) Sepete ekle (sadece bu satır yazılır, stok tutulur)
+    # Kontrolden sonra son adedi başkası tuttuysa tutma başarısız olur
+    if not cart.add(product.id):
+        messages.warning(request, "Stok limiti aşılamaz. Daha fazla ekleyemezsin.")
     return redirect("cart:detail")
 
 def cart_detail(request):
-    cart = _get_cart(request.session)
-
-    # ürünleri çek
-    product_ids = [int(pid) for pid in cart.keys()] if cart else []
-    products = Product.objects.filter(id__in=product_ids, is_active=True)
-
-    items = []
-    total = 0
-
-    for p in products:
-        qty = cart.get(str(p.id), {}).get("qty", 0)
-        subtotal = qty * float(p.price)
-        total += subtotal
-        items.append({
-            "product": p,
-            "qty": qty,
-            "subtotal": subtotal,
-        })
-
-    return render(request, "cart/detail.html", {"items": items, "total": total})
+    # Satır + toplamlar Decimal ile pricing.py'de (checkout ile aynı hesap)
+    cart = pricing.price_lines(request, CartService.for_request(request).lines())
+    return render(request, "cart/detail.html", {"items": cart["items"], "total": cart["total"]})
+
+
+# ============================================================
+# CART UPDATE — TOPLU ADET GÜNCELLEME (JSON)
+# ============================================================
+# NEDEN?
+# - cart_add her tıklamada tek ürüne +1 ekler: ürün sorgusu + sepet
+#   yazımı + redirect + tam sayfa render. 5 satır değiştirmek 15 istek.
+# - Burada tek POST ile birden çok ürünün MUTLAK adedi verilir:
+#     {"items": [{"product_id": 3, "qty": 2}, {"product_id": 7, "qty": 0}]}
+#   Tüm stok kontrolü TEK id__in sorgusuyla yapılır, cevap JSON özet.
+#
+# KURALLAR:
+# - qty 0 → satır silinir
+# - qty > stok → stok kadarına indirilir ("adjusted" listesinde döner)
+# - ürün yok / pasif / tükenmiş → sepetten çıkarılır ("errors" listesinde)
+@require_POST
+def cart_update(request):
+    try:
+        payload = json.loads(request.body or b"{}")
+        requested = {int(row["product_id"]): int(row["qty"]) for row in payload["items"]}
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Geçersiz istek gövdesi."}, status=400)
+
+    if len(requested) > MAX_UPDATE_LINES:
+        return JsonResponse({"error": f"En fazla {MAX_UPDATE_LINES} satır güncellenebilir."}, status=400)
+    if any(qty < 0 for qty in requested.values()):
+        return JsonResponse({"error": "Adet negatif olamaz."}, status=400)
+
+    cart = CartService.for_request(request)
+    lines = cart.lines()
+
+    # Tek sorgu: güncellenen + sepette zaten olan ürünler (özet için)
+    # pricing hafızasına girer → aşağıdaki özet tekrar sorgulamaz
+    product_map = pricing.load_products(request, set(requested) | set(lines))
+
+    quantities, adjusted, errors = {}, [], []
+    for pid, qty in requested.items():
+        p = product_map.get(pid)
+        limit = cart.max_quantity(p) if p is not None else 0
+        if qty == 0:
+            quantities[pid] = 0
+        elif p is None:
+            quantities[pid] = 0
+            errors.append({"product_id": pid, "message": "Ürün bulunamadı."})
+        elif limit <= 0:
+            quantities[pid] = 0
+            errors.append({"product_id": pid, "message": f"{p.name} tükendi."})
+        elif qty > limit:
+            quantities[pid] = limit
+            adjusted.append({
+                "product_id": pid, "qty": limit,
+                "message": f"{p.name}: stok yetersiz. Maksimum {limit} adet alabilirsiniz.",
+            })
+        else:
+            quantities[pid] = qty
+
+    applied = cart.update(quantities)
+
+    # Kontrol ile tutma arasında stoğu başkası aldıysa satır değişmedi
+    for pid, qty in quantities.items():
+        if pid not in applied and cart.quantity(pid) != qty:
+            errors.append({"product_id": pid, "message": "Stok az önce tükendi, adet değiştirilemedi."})
+
+    # Özet: sepetin son hali
+    summary = pricing.price_lines(request, cart.lines())
+    return JsonResponse({
+        "items": [
+            {
+                "product_id": row["product"].id,
+                "name": row["product"].name,
+                "qty": row["quantity"],
+                "unit_price": str(row["unit_price"]),
+                "line_total": str(row["line_total"]),
+            }
+            for row in summary["items"]
+        ],
+        "count": summary["count"],
+        "total": str(summary["total"]),
+        "adjusted": adjusted,
+        "errors": errors,
+    })
@@ -1,6 +1,7 @@
 
 from django.contrib import admin
-from .models import Category, Product
+from django.db.models import Sum
+from .models import Category, Product, StockReservation
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -13,3 +14,12 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ("is_new", "is_active", "category")
     search_fields = ("name",)
     prepopulated_fields = {"slug": ("name",)}
+    readonly_fields = ("held_stock",)
+
+    # Product.stock sepet tutmaları düşülmüş hâli; fiziksel sayımla
+    # karşılaştırırken bu adet eklenmeli (bkz. Product.stock yorumu)
+    @admin.display(description="Sepetlerde tutulan")
+    def held_stock(self, obj):
+        if obj.pk is None:
+            return 0
+        return StockReservation.objects.filter(product=obj).aggregate(total=Sum("quantity"))["total"] or 0
@@ -0,0 +1,152 @@
+# ============================================================
+# catalog/autocomplete.py  —  GRİWEAR ARAMA ÖNERİLERİ (bellekte)
+# ============================================================
+# NEDEN?
+# - Navbar'daki arama kutusu her harfte tam sayfa render edemez.
+# - Aktif ürün ve kategori isimleri süreç belleğinde sıralı bir dizide
+#   tutulur; önek araması bisect ile yapılır → DB'ye hiç gidilmez.
+#
+# ANAHTARLAR:
+# - İsim search.fold ile katlanır ("Siyah Oversize Tişört" →
+#   "siyah oversize tisort") ve her kelimeden başlayan son ek eklenir:
+#   "siyah oversize tisort", "oversize tisort", "tisort"
+#   → "tiş" yazan da "over" yazan da ürünü bulur.
+#
+# GÜNCELLİK:
+# - İlk istekte yüklenir (lazy), sonra signals.py kayıt/silme oldukça
+#   sadece ilgili girdileri günceller (commit sonrası; geri alınan
+#   kayıt indekse girmez).
+# - Birden fazla worker süreci varsa diğer süreçler başkasının kaydını
+#   görmez; REFRESH_SECONDS'ta bir arka planda tamamen yeniden yüklenir.
+
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from .search import tokenize
+
+PRODUCT = "product"
+CATEGORY = "category"
+
+DEFAULT_LIMIT = 8
+MIN_QUERY_LENGTH = 2
+
+
+def _keys(label):
+    words = tokenize(label)
+    return sorted({" ".join(words[i:]) for i in range(len(words))})
+
+
+class PrefixIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []       # sıralı: (anahtar, tür, id)
+        self._entries = {}    # (tür, id) → {"label", "url", "keys"}
+        self.loaded_at = None
+        self._refreshing = False
+
+    # ------------------------------------------------------------
+    # YÜKLEME — iki sorgu, tek seferde
+    # ------------------------------------------------------------
+    def load(self):
+        from django.urls import reverse
+
+        from .models import Category, Product
+
+        entries = {}
+        for pk, name, slug in Category.objects.values_list("id", "name", "slug"):
+            entries[(CATEGORY, pk)] = (name, reverse("catalog:category_products", args=[slug]))
+        for pk, name, slug in Product.objects.filter(is_active=True).order_by().values_list("id", "name", "slug"):
+            entries[(PRODUCT, pk)] = (name, reverse("catalog:product_detail", args=[slug]))
+
+        keys = []
+        built = {}
+        for (kind, pk), (label, url) in entries.items():
+            entry_keys = _keys(label)
+            built[(kind, pk)] = {"label": label, "url": url, "keys": entry_keys}
+            keys.extend((key, kind, pk) for key in entry_keys)
+        keys.sort()
+
+        with self._lock:
+            self._keys, self._entries = keys, built
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        if self.loaded_at is None:
+            self.load()
+            return
+
+        refresh = getattr(settings, "AUTOCOMPLETE_REFRESH_SECONDS", 300)
+        if refresh and time.monotonic() - self.loaded_at > refresh and not self._refreshing:
+            # Eski veriyle cevap vermeye devam et, arka planda yenile
+            self._refreshing = True
+            threading.Thread(target=self._background_reload, daemon=True).start()
+
+    def _background_reload(self):
+        from django.db import connection
+
+        try:
+            self.load()
+        finally:
+            self._refreshing = False
+            connection.close()
+
+    # ------------------------------------------------------------
+    # ARTIMLI GÜNCELLEME (signals.py)
+    # ------------------------------------------------------------
+    def remove(self, kind, pk):
+        with self._lock:
+            entry = self._entries.pop((kind, pk), None)
+            if entry:
+                for key in entry["keys"]:
+                    i = bisect_left(self._keys, (key, kind, pk))
+                    if i < len(self._keys) and self._keys[i] == (key, kind, pk):
+                        del self._keys[i]
+
+    def upsert(self, kind, pk, label, url):
+        self.remove(kind, pk)
+        entry_keys = _keys(label)
+        with self._lock:
+            self._entries[(kind, pk)] = {"label": label, "url": url, "keys": entry_keys}
+            for key in entry_keys:
+                insort(self._keys, (key, kind, pk))
+
+    # ------------------------------------------------------------
+    # ARAMA — bisect ile öneğin ilk konumu, sonra sırayla ilerle
+    # ------------------------------------------------------------
+    def lookup(self, q, limit=DEFAULT_LIMIT):
+        prefix = " ".join(tokenize(q))
+        if len(prefix) < MIN_QUERY_LENGTH:
+            return []
+
+        # Ürünler dolsa da önek aralığının sonuna kadar bakılır: anahtar
+        # sırasında sonra gelen kategori ("gomlekler" > "gomlek") kaçmasın.
+        # Dolu olduktan sonra ürün anahtarları sadece atlanır.
+        categories, products, seen = [], [], set()
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            while i < len(self._keys) and len(categories) < limit:
+                key, kind, pk = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                i += 1
+                if (kind, pk) in seen or (kind == PRODUCT and len(products) >= limit):
+                    continue
+                seen.add((kind, pk))
+                entry = self._entries[(kind, pk)]
+                result = {"type": kind, "label": entry["label"], "url": entry["url"]}
+                (categories if kind == CATEGORY else products).append(result)
+
+        # Kategoriler önce: "gömlek" yazana önce "Gömlekler" kategorisi
+        return (categories + products)[:limit]
+
+
+index = PrefixIndex()
+
+
+def suggest(q, limit=DEFAULT_LIMIT):
+    index.ensure_loaded()
+    return index.lookup(q, limit)
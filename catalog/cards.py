@@ -0,0 +1,90 @@
+# ============================================================
+# catalog/cards.py  —  GRİWEAR ÜRÜN KARTI FRAGMAN CACHE'İ
+# ============================================================
+# NEDEN?
+# - Liste sayfaları her istekte her ürün için aynı kart HTML'ini
+#   yeniden render ediyordu; ürün değişmedikçe sonuç hep aynı.
+# - Burada her kart (varyant + ürün id + sürüm damgası) anahtarıyla
+#   cache'e yazılır. Sayfa, cache'ten gelenleri birleştirir ve sadece
+#   eksik kartları render eder (get_many / set_many → 2 cache turu).
+#
+# GEÇERSİZ KILMA (signals.py):
+# - Product kaydı/silinmesi → o ürünün kartları silinir
+# - Category kaydı → "generation" artar, tüm kartlar bir anda eskir
+#   (kategori adı kartta görünüyor; kategori değişikliği nadir)
+#
+# CARD_VERSION: kart template'leri değişince artır → deploy sonrası
+# eski HTML cache'ten okunmaz.
+#
+# CSRF: kart tüm ziyaretçilere aynı HTML; form içeren kart token yerine
+# CSRF_PLACEHOLDER yazar, product_cards etiketi isteğin token'ını koyar.
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+CARD_VERSION = 3
+CARD_TIMEOUT = 60 * 60 * 24
+
+CARD_TEMPLATES = {
+    "grid": "catalog/cards/grid.html",
+    "list": "catalog/cards/list.html",
+    "new": "catalog/cards/new.html",
+    "search": "catalog/cards/search.html",
+}
+
+GENERATION_KEY = "catalog:cards:generation"
+CSRF_PLACEHOLDER = "<!--gw:csrf-->"
+
+
+def _generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, timeout=None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def _key(generation, variant, product_id):
+    return f"catalog:card:v{CARD_VERSION}:{generation}:{variant}:{product_id}"
+
+
+def render_cards(products, variant):
+    # ------------------------------------------------------------
+    # products: sıralı ürün listesi (view'ın verdiği sayfa)
+    # Dönüş: aynı sırada kart HTML parçaları
+    # ------------------------------------------------------------
+    template_name = CARD_TEMPLATES[variant]
+    generation = _generation()
+
+    keys = {p.id: _key(generation, variant, p.id) for p in products}
+    cached = cache.get_many(keys.values())
+
+    fragments = []
+    missed = {}
+    for p in products:
+        html = cached.get(keys[p.id])
+        if html is None:
+            html = render_to_string(template_name, {"p": p})
+            missed[keys[p.id]] = html
+        fragments.append(html)
+
+    if missed:
+        cache.set_many(missed, timeout=CARD_TIMEOUT)
+    return fragments
+
+
+def invalidate_products(product_ids):
+    generation = _generation()
+    cache.delete_many([
+        _key(generation, variant, pid)
+        for pid in product_ids
+        for variant in CARD_TEMPLATES
+    ])
+
+
+def invalidate_all():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        # Anahtar yoksa (cache temizlenmiş) zaten eski kart yok sayılır
+        cache.add(GENERATION_KEY, 1, timeout=None)
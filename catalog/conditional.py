@@ -0,0 +1,136 @@
+# ============================================================
+# catalog/conditional.py  —  GRİWEAR CONDITIONAL GET + CACHE-CONTROL
+# ============================================================
+# NEDEN?
+# - Katalog sayfaları ürün değişmedikçe hep aynı HTML'i üretir ama her
+#   istekte baştan render ediliyordu.
+# - Burada sayfa render edilmeden ÖNCE ucuz bir aggregate sorgusu ile
+#   ETag / Last-Modified hesaplanır. Tarayıcı (veya önündeki proxy)
+#   If-None-Match / If-Modified-Since gönderirse ve değer aynıysa
+#   304 döner → view, facet sorgusu, template hiç çalışmaz.
+#
+# ETag = katalog damgası + ziyaretçi damgası
+# - katalog: ürün/kategori Max(updated_at) + adet (silinen satır adedi düşürür)
+# - ziyaretçi: kullanıcı id + sepet içeriği → navbar'daki isim / sepet
+#   sayısı değişince eski sayfa 304 ile geri gelmez
+#
+# CACHE-CONTROL
+# - Anonim + boş sepet: "public, max-age=CATALOG_CACHE_SECONDS"
+#   → lokal reverse proxy (nginx vb.) tekrar gelen ziyareti Django'ya
+#   hiç uğramadan karşılayabilir.
+# - CSRF formu olan sayfa (ürün detayı: sepete ekle) asla public değil:
+#   proxy bir ziyaretçinin token'ını / Set-Cookie'sini başkasına verirdi.
+#   conditional_page(..., public=False); ayrıca cevap cookie yazıyorsa
+#   veya sayfa CSRF token'ı kullandıysa (get_token) otomatik private.
+# - Diğerleri: "private, max-age=0, must-revalidate"
+#   → tarayıcı her seferinde sorar, değişmediyse 304 alır.
+# - Bekleyen flash mesajı varsa koşullu cevap verilmez (mesaj kaybolmasın).
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from cart.services import CartService
+
+from . import inventory, navigation
+from .models import Category, Product
+
+DEFAULT_CACHE_SECONDS = 60
+
+
+# ------------------------------------------------------------
+# DAMGALAR — her biri (son değişiklik zamanı, etag parçası) döner
+# ------------------------------------------------------------
+def catalog_stamp(request, *args, **kwargs):
+    # Liste / kategori / yeni gelenler: tüm katalog tek damga
+    # (pasife alınan ürün de updated_at'i ilerletir, silinen adedi düşürür)
+    # Stok durumu ("stokta" facet'i): kovasız yazımlar updated_at yazar;
+    # kovalı ürün tükenince / yeniden stoğa girince inventory._touch() yazar.
+    products = Product.objects.order_by().aggregate(last=Max("updated_at"), n=Count("id"))
+    categories = Category.objects.order_by().aggregate(last=Max("updated_at"), n=Count("id"))
+    stamps = [s for s in (products["last"], categories["last"]) if s]
+    last = max(stamps) if stamps else None
+    return last, f"{products['last']}:{products['n']}:{categories['last']}:{categories['n']}"
+
+
+def product_stamp(request, slug, *args, **kwargs):
+    # Detay: sadece ürünün kendisi + kategorisi (slug unique → tek satır)
+    # + menü sürümü (cache'ten, sorgusuz): menüdeki ürün sayıları
+    rows = list(
+        Product.objects.filter(slug=slug, is_active=True)
+        .order_by()
+        .values_list("id", "updated_at", "category__updated_at", "bucket_count")[:1]
+    )
+    if not rows:
+        return None, None  # view 404 verecek
+    pk, updated_at, category_updated_at, bucket_count = rows[0]
+    nav_version = navigation.get_nav()["version"]
+    token = f"{pk}:{updated_at}:{category_updated_at}:{nav_version}"
+    if bucket_count:
+        # Kovalı ürün: kova satışları updated_at'e dokunmaz (sıcak satır
+        # olmasın diye) → "stokta mı" ayrıca damgaya girer
+        token += f":{inventory.levels([pk])[pk] > 0}"
+    return max(updated_at, category_updated_at), token
+
+
+def _visitor_stamp(request):
+    items = sorted(CartService.for_request(request).lines().items())
+    return f"{request.user.pk}:{items}"
+
+
+def _is_public(request, response):
+    if response.cookies or request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    return not request.user.is_authenticated and not CartService.for_request(request)
+
+
+def _validators(request, stamp_func, args, kwargs):
+    # etag ve last_modified fonksiyonları aynı istekte iki kez sorar → tek hesap
+    if not hasattr(request, "_catalog_validators"):
+        if len(messages.get_messages(request)):
+            # Okunmamış mesaj: sayfa bu sefer farklı → doğrulayıcı yok
+            request._catalog_validators = (None, None)
+        else:
+            last, token = stamp_func(request, *args, **kwargs)
+            etag = None
+            if token is not None:
+                raw = f"{token}|{_visitor_stamp(request)}".encode()
+                etag = hashlib.md5(raw, usedforsecurity=False).hexdigest()
+            request._catalog_validators = (last, etag)
+    return request._catalog_validators
+
+
+def conditional_page(stamp_func, public=True):
+    # ------------------------------------------------------------
+    # Kullanım:
+    #   @conditional_page(catalog_stamp)
+    #   def product_list(request): ...
+    # public=False: sayfa CSRF formu içeriyor → her zaman private
+    # Django'nun condition() dekoratörü 304 kararını view'dan önce verir;
+    # biz üstüne Cache-Control ekliyoruz.
+    # ------------------------------------------------------------
+    def decorator(view):
+        conditional_view = condition(
+            etag_func=lambda request, *a, **kw: _validators(request, stamp_func, a, kw)[1],
+            last_modified_func=lambda request, *a, **kw: _validators(request, stamp_func, a, kw)[0],
+        )(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.status_code in (200, 304) and not response.has_header("Cache-Control"):
+                if public and _is_public(request, response):
+                    seconds = getattr(settings, "CATALOG_CACHE_SECONDS", DEFAULT_CACHE_SECONDS)
+                    patch_cache_control(response, public=True, max_age=seconds)
+                else:
+                    patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,10 @@
+from .navigation import get_nav
+
+
+def category_nav(request):
+    """
+    NEDEN?
+    - Menü her sayfada görünüyor; kategoriler + aktif ürün sayıları
+      cache'ten gelir (bkz. navigation.py), sayfa başına sorgu yok.
+    """
+    return {"nav_categories": get_nav()["categories"]}
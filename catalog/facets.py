@@ -0,0 +1,173 @@
+# ============================================================
+# catalog/facets.py  —  GRİWEAR FİLTRE + FACET SAYILARI
+# ============================================================
+# Filtreler (GET parametreleri):
+#   ?price_min=250&price_max=500   fiyat aralığı
+#   ?in_stock=1                    sadece stokta olanlar (stock > 0 veya dolu kova)
+#   ?new=1                         sadece yeni ürünler
+#   ?category=<slug>               kategori (arama sayfasında)
+#
+# FACET SAYILARI — NEDEN TEK SORGU?
+# - Her seçenek için ayrı COUNT (stokta kaç, yeni kaç, her fiyat aralığı
+#   kaç...) sayfa başına 8-10 sorgu demek.
+# - Burada hepsi tek sorguda koşullu COUNT(... FILTER ...) ile hesaplanır.
+# - Bir facet'in sayısı, *kendisi hariç* diğer seçili filtrelerle
+#   hesaplanır; böylece "250-500 (12)" seçilince diğer aralıklar 0'a düşmez.
+
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import StockBucket
+
+PRICE_RANGES = [
+    ("0 - 250 ₺", None, Decimal("250")),
+    ("250 - 500 ₺", Decimal("250"), Decimal("500")),
+    ("500 - 1000 ₺", Decimal("500"), Decimal("1000")),
+    ("1000 ₺ +", Decimal("1000"), None),
+]
+
+FILTER_PARAMS = ("price_min", "price_max", "in_stock", "new", "category")
+
+
+def _decimal(value):
+    # Geçersiz değer filtre yok sayılır; NaN / Infinity de (Decimal kabul
+    # eder ama price__gte'ye gidince ValidationError → 500)
+    try:
+        number = Decimal(value) if value not in (None, "") else None
+    except InvalidOperation:
+        return None
+    return number if number is not None and number.is_finite() else None
+
+
+def parse_filters(request):
+    return {
+        "price_min": _decimal(request.GET.get("price_min")),
+        "price_max": _decimal(request.GET.get("price_max")),
+        "in_stock": request.GET.get("in_stock") == "1",
+        "new": request.GET.get("new") == "1",
+        "category": (request.GET.get("category") or "").strip() or None,
+    }
+
+
+def in_stock_q(prefix=""):
+    # Stokta: ana satırda stok var ya da (kovalı üründe) dolu bir kova var.
+    # Kovasız üründe alt sorgu hiç çalışmaz (bucket_count > 0 önce bakılır).
+    buckets = StockBucket.objects.filter(product=OuterRef(f"{prefix}pk"), stock__gt=0)
+    return Q(**{f"{prefix}stock__gt": 0}) | (Q(**{f"{prefix}bucket_count__gt": 0}) & Exists(buckets))
+
+
+def filter_q(filters, exclude=(), prefix=""):
+    # ------------------------------------------------------------
+    # Seçili filtrelerden Q üretir.
+    # exclude: facet sayısı hesaplanırken o facet'in kendi filtresi atlanır
+    # prefix: arama indeksinden (SearchTerm) sorgularken "product__"
+    # ------------------------------------------------------------
+    q = Q()
+    if "price" not in exclude:
+        if filters["price_min"] is not None:
+            q &= Q(**{f"{prefix}price__gte": filters["price_min"]})
+        if filters["price_max"] is not None:
+            q &= Q(**{f"{prefix}price__lt": filters["price_max"]})
+    if filters["in_stock"] and "in_stock" not in exclude:
+        q &= in_stock_q(prefix)
+    if filters["new"] and "new" not in exclude:
+        q &= Q(**{f"{prefix}is_new": True})
+    if filters["category"] and "category" not in exclude:
+        q &= Q(**{f"{prefix}category__slug": filters["category"]})
+    return q
+
+
+def _price_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def _toggle(request, **changes):
+    # Filtre linki: mevcut parametreler korunur, sayfa başa döner
+    params = request.GET.copy()
+    params.pop("after", None)
+    params.pop("page", None)
+    for key, value in changes.items():
+        params.pop(key, None)
+        if value not in (None, ""):
+            params[key] = value
+    return "?" + params.urlencode()
+
+
+def facet_counts(request, queryset, filters, with_categories=False):
+    # ------------------------------------------------------------
+    # queryset: filtre uygulanmamış temel küme (kategori veya arama sonucu)
+    # Dönüş: template'in doğrudan basacağı facet listesi + toplam
+    # ------------------------------------------------------------
+    base = filter_q(filters, exclude=("category",))
+    aggregates = {
+        "total": Count("id", filter=base),
+        "in_stock": Count("id", filter=filter_q(filters, exclude=("category", "in_stock")) & in_stock_q()),
+        "new": Count("id", filter=filter_q(filters, exclude=("category", "new")) & Q(is_new=True)),
+    }
+    without_price = filter_q(filters, exclude=("category", "price"))
+    for i, (_, low, high) in enumerate(PRICE_RANGES):
+        aggregates[f"price_{i}"] = Count("id", filter=without_price & _price_q(low, high))
+
+    queryset = queryset.order_by()
+    if with_categories:
+        # Kategori başına bir satır; diğer facet'ler seçili kategorinin
+        # (yoksa hepsinin) satırları toplanarak bulunur → yine tek sorgu
+        # DİKKAT: filtreler WHERE değil FILTER (...) içinde; sorgu temel
+        # kümenin (arama sonucu) tüm kategorilerdeki tüm satırlarını okur.
+        # Bilerek: her facet kendi filtresi hariç sayılır, yani "250-500"
+        # seçiliyken diğer aralıkların satırları da gerekir. Kategori sayısı
+        # = o kategoride diğer seçili filtrelere uyan ürünler ("total").
+        rows = list(
+            queryset.values("category__slug", "category__name").annotate(**aggregates)
+        )
+        selected = [r for r in rows if not filters["category"] or r["category__slug"] == filters["category"]]
+        totals = {key: sum(r[key] for r in selected) for key in aggregates}
+    else:
+        rows = []
+        totals = queryset.aggregate(**aggregates)
+
+    price_active = filters["price_min"] is not None or filters["price_max"] is not None
+    facets = {
+        "total": totals["total"],
+        "in_stock": {
+            "count": totals["in_stock"],
+            "active": filters["in_stock"],
+            "url": _toggle(request, in_stock=None if filters["in_stock"] else "1"),
+        },
+        "new": {
+            "count": totals["new"],
+            "active": filters["new"],
+            "url": _toggle(request, new=None if filters["new"] else "1"),
+        },
+        "prices": [],
+        "categories": [],
+        "clear_url": _toggle(request, **{key: None for key in FILTER_PARAMS}),
+        "any_active": price_active or filters["in_stock"] or filters["new"] or bool(filters["category"]),
+    }
+
+    for i, (label, low, high) in enumerate(PRICE_RANGES):
+        active = filters["price_min"] == low and filters["price_max"] == high
+        facets["prices"].append({
+            "label": label,
+            "count": totals[f"price_{i}"],
+            "active": active,
+            "url": _toggle(request, price_min=None, price_max=None) if active
+            else _toggle(request, price_min=low, price_max=high),
+        })
+
+    for row in sorted(rows, key=lambda r: r["category__name"]):
+        active = filters["category"] == row["category__slug"]
+        facets["categories"].append({
+            "label": row["category__name"],
+            "count": row["total"],
+            "active": active,
+            "url": _toggle(request, category=None if active else row["category__slug"]),
+        })
+
+    return facets
@@ -0,0 +1,172 @@
+# ============================================================
+# catalog/images.py  —  GRİWEAR GÖRSEL TÜREVLERİ (thumbnail + WebP)
+# ============================================================
+# NEDEN?
+# - Kartlar 260px yüksekliğinde ama orijinal yükleme (çoğu zaman
+#   birkaç MB) olduğu gibi gönderiliyordu; mobilde sayfa ağırlığının
+#   büyük kısmı buydu.
+# - Her görsel için birkaç genişlikte JPEG + WebP üretip srcset ile
+#   tarayıcının ekranına uygun olanı seçmesine izin veriyoruz.
+#
+# AKIŞ:
+# - Ürün kaydedilince (signals.py) → transaction commit olunca
+#   schedule() işi yerel bir süreç havuzuna (ProcessPoolExecutor) verir.
+#   Admin kaydı Pillow işini beklemez.
+# - İş bitince sonuç image_variants alanına update() ile yazılır.
+# - build_image_variants komutu eski ürünler için aynı işi toplu yapar.
+#
+# Türev adları deterministik:
+#   products/variants/<isim>-<kaynak özeti>-<genişlik>w.<uzantı>
+# Özet (tam kaynak yolunun sha1'i, 8 hane): shirt.jpg / shirt.png veya farklı
+# klasörlerdeki aynı adlı yüklemeler birbirinin türevini ezmesin.
+# VARIANT_VERSION: ad şeması değişirse artırılır; eski sürümle üretilmiş
+# türevler "hazır değil" sayılır (orijinale düşer, build_image_variants
+# komutu yeniden üretir).
+
+import hashlib
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = (320, 640, 960)
+VARIANT_DIR = "products/variants"
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+VARIANT_VERSION = 2
+
+_executor = None
+# Bu süreçte havuza verilmiş, henüz bitmemiş işler: (product_id, görsel adı)
+_pending = set()
+
+
+def variant_name(image_name, width, ext):
+    stem = PurePosixPath(image_name).stem
+    digest = hashlib.sha1(image_name.encode("utf-8")).hexdigest()[:8]
+    return f"{VARIANT_DIR}/{stem}-{digest}-{width}w.{ext}"
+
+
+def variants_ready(product):
+    variants = product.image_variants or {}
+    return (
+        bool(product.image)
+        and variants.get("src") == product.image.name
+        and variants.get("v") == VARIANT_VERSION
+    )
+
+
+# ============================================================
+# 1) PILLOW İŞİ — SÜREÇ HAVUZUNDA ÇALIŞIR
+# ============================================================
+# Django'ya dokunmaz (ORM, settings yok); sadece dosya yolları alır.
+# Böylece ayrı süreçte güvenle çalışır ve pickle edilebilir.
+def build_variants(src_path, image_name, media_root, widths=VARIANT_WIDTHS):
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        width, height = image.size
+
+        sizes = []
+        for target in widths:
+            # Büyütme yok: orijinalden genişse orijinal genişlikte bir kez üret
+            target = min(target, width)
+            if sizes and sizes[-1][0] == target:
+                break
+            target_height = max(round(height * target / width), 1)
+            resized = image.resize((target, target_height), Image.LANCZOS)
+
+            for ext, options in (
+                ("jpg", {"format": "JPEG", "quality": JPEG_QUALITY, "optimize": True, "progressive": True}),
+                ("webp", {"format": "WEBP", "quality": WEBP_QUALITY, "method": 4}),
+            ):
+                path = os.path.join(media_root, variant_name(image_name, target, ext))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                resized.save(path, **options)
+
+            sizes.append([target, target_height])
+
+    return {"src": image_name, "width": width, "height": height, "sizes": sizes}
+
+
+# ============================================================
+# 2) SONUCU KAYDET
+# ============================================================
+def store_result(product_id, result):
+    from . import cards
+    from .models import Product
+
+    # image=result["src"]: iş sürerken görsel değiştiyse eski sonucu yazma
+    Product.objects.filter(pk=product_id, image=result["src"]).update(
+        image_width=result["width"],
+        image_height=result["height"],
+        image_variants={"src": result["src"], "sizes": result["sizes"], "v": VARIANT_VERSION},
+        updated_at=timezone.now(),
+    )
+    # update() post_save tetiklemez; kart cache'ini biz temizliyoruz
+    cards.invalidate_products([product_id])
+
+
+def build_for_product(product):
+    # Senkron sürüm (komut ve testler için)
+    result = build_variants(default_storage.path(product.image.name), product.image.name, str(settings.MEDIA_ROOT))
+    store_result(product.pk, result)
+    return result
+
+
+# ============================================================
+# 3) ARKA PLAN — SÜREÇ HAVUZU
+# ============================================================
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=getattr(settings, "IMAGE_VARIANT_WORKERS", 2))
+    return _executor
+
+
+def _on_done(product_id, image_name, future):
+    # Havuzun yönetici thread'inde çalışır → kendi DB bağlantısını kapatmalı
+    try:
+        store_result(product_id, future.result())
+    except Exception:
+        logger.exception("Görsel türevleri üretilemedi (product_id=%s)", product_id)
+    finally:
+        _pending.discard((product_id, image_name))
+        connection.close()
+
+
+def _submit(product_id, image_name):
+    key = (product_id, image_name)
+    if key in _pending:
+        return
+    _pending.add(key)
+    future = get_executor().submit(
+        build_variants, default_storage.path(image_name), image_name, str(settings.MEDIA_ROOT)
+    )
+    future.add_done_callback(partial(_on_done, product_id, image_name))
+
+
+def schedule(product, previous_image=None):
+    # ------------------------------------------------------------
+    # previous_image: ürün yüklendiğindeki görsel adı (signals.py, post_init)
+    # Görsel değişmediyse iş verilmez: türevler ya üretiliyor ya da iş
+    # başarısız oldu (build_image_variants komutu tamamlar). Böylece
+    # türevler hazır olana kadar her stok/fiyat kaydı havuza iş atmaz.
+    # ------------------------------------------------------------
+    if not product.image or variants_ready(product) or product.image.name == previous_image:
+        return
+    if not getattr(settings, "IMAGE_VARIANTS_ASYNC", True):
+        transaction.on_commit(partial(build_for_product, product))
+        return
+    transaction.on_commit(partial(_submit, product.pk, product.image.name))
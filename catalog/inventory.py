@@ -0,0 +1,432 @@
+# ============================================================
+# catalog/inventory.py  —  GRİWEAR STOK YAZIMLARI (tek merkez)
+# ============================================================
+# NEDEN?
+# - Stok; sepet rezervasyonu, checkout, iptal ve süpürücü gibi birçok
+#   yerden değişiyor. Hepsi buradaki fonksiyonlarla yazar.
+# - Yazımlar set tabanlı: N ürün için N save() yerine TEK UPDATE
+#   (CASE WHEN id=... THEN adet ...). Ürün satırı önceden okunmaz;
+#   F("stock") ile DB kendi değeri üzerinden hesaplar.
+#
+# EŞZAMANLILIK MODU — settings.STOCK_CONCURRENCY
+# - "pessimistic" (varsayılan): koşullu UPDATE satırı yazarken kilitler;
+#   tutmalar / sipariş satırı select_for_update ile kilitlenir. SQLite'ta
+#   bu tüm veritabanını kilitler, diğer DB'lerde popüler ürünün
+#   alıcılarını sıraya sokar.
+# - "optimistic": hiçbir şey önceden kilitlenmez. Stok ve Product.version
+#   okunur, yazım "version hâlâ aynıysa" yapılır (compare-and-swap).
+#   Araya başka yazım girdiyse satır eşleşmez → kısa, rastgele ve giderek
+#   uzayan bir bekleme (backoff) sonrası yeniden denenir. Deneme hakkı
+#   biterse StockConflict.
+# Hangisi? benchmark_stock komutu iki modu aynı yük altında karşılaştırır.
+#
+# STOK KOVALARI (Product.bucket_count > 0, bkz. StockBucket)
+# - Kovasız ürünün yolu değişmedi; UPDATE'ler "bucket_count = 0" ile
+#   sınırlı. Etkilenen satır eksik kalırsa kovalı ürünler bir sorguyla
+#   bulunur ve kendi yoluna gider (kovasız kurulumda ek maliyet yok).
+# - Kovalı üründe düşüm: yeterli stoğu olan rastgele kova (tek koşullu
+#   UPDATE); hiçbiri tek başına yetmezse ana satır, o da yetmezse kovalar
+#   (kötümser modda kilitlenerek) sırayla boşaltılır.
+# - Geri koyma rastgele bir kovaya yapılır.
+# - Kova yazımları ürün satırına (updated_at) dokunmaz; sadece ürün
+#   "stokta" ↔ "tükendi" arasında geçerse _touch() damgayı ilerletir →
+#   liste ETag'i (conditional.catalog_stamp) ve "stokta" facet'i eskimez.
+#
+# DİKKAT: update() post_save göndermez. updated_at (ETag) burada yazılır,
+# kart cache'i commit sonrası temizlenir. Her stok yazımı version'ı da
+# artırır (mod fark etmeksizin) → CAS ile yazan istek çakışmayı görür.
+
+import random
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from . import cards
+from .models import Product, StockBucket
+
+PESSIMISTIC = "pessimistic"
+OPTIMISTIC = "optimistic"
+
+DEFAULT_ATTEMPTS = 5
+DEFAULT_BACKOFF = 0.005  # saniye; her denemede iki katına çıkar
+MAX_BACKOFF = 0.2
+
+
+class OutOfStock(Exception):
+    # decrement() istenen ürünlerden en az birinde yeterli stok bulamadı.
+    # Çağıran transaction geri alınır; hangi ürün olduğu sonradan okunur.
+    def __init__(self, quantities):
+        super().__init__("Yetersiz stok")
+        self.quantities = quantities
+
+
+class StockConflict(Exception):
+    # İyimser modda satır, okuma ile yazma arasında başkası tarafından
+    # değiştirildi ve deneme hakkı bitti. Stok yetersiz DEĞİL; kullanıcı
+    # aynı işlemi tekrar deneyebilir.
+    pass
+
+
+def mode():
+    return getattr(settings, "STOCK_CONCURRENCY", PESSIMISTIC)
+
+
+def optimistic():
+    return mode() == OPTIMISTIC
+
+
+def _attempts():
+    return max(getattr(settings, "STOCK_CAS_ATTEMPTS", DEFAULT_ATTEMPTS), 1)
+
+
+def _backoff(attempt):
+    # "Full jitter": 0 ile base * 2^attempt arası rastgele → çakışan
+    # istekler aynı anda yeniden denemez
+    base = getattr(settings, "STOCK_CAS_BACKOFF", DEFAULT_BACKOFF)
+    if base > 0:
+        time.sleep(random.uniform(0, min(base * 2 ** attempt, MAX_BACKOFF)))
+
+
+def retrying(func, *args, on_conflict=None, **kwargs):
+    # ------------------------------------------------------------
+    # func'ı kendi atomic bloğunda çalıştırır; StockConflict olursa blok
+    # geri alınır, beklenir ve baştan denenir (en fazla STOCK_CAS_ATTEMPTS).
+    # Checkout gibi birden çok tabloya yazan işlemler bunu kullanır:
+    # çakışmada sipariş satırları da geri alınıp yeniden yazılır.
+    # Kötümser modda StockConflict oluşmaz → tek deneme.
+    # ------------------------------------------------------------
+    attempts = _attempts()
+    for attempt in range(attempts):
+        try:
+            with transaction.atomic():
+                return func(*args, **kwargs)
+        except StockConflict:
+            if attempt + 1 >= attempts:
+                raise
+            if on_conflict is not None:
+                on_conflict(attempt)
+            _backoff(attempt)
+
+
+def _per_product(quantities):
+    # {product_id: qty} → CASE id WHEN ... THEN qty END
+    return Case(
+        *[When(pk=pid, then=Value(qty)) for pid, qty in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def _changed(product_ids):
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: cards.invalidate_products(product_ids))
+
+
+# ============================================================
+# İYİMSER YOL — oku, kontrol et, "version aynıysa" yaz
+# ============================================================
+def _read(quantities, active_only):
+    # {product_id: (stock, version, bucket_count)} — kilitsiz okuma
+    rows = Product.objects.filter(pk__in=quantities)
+    if active_only:
+        rows = rows.filter(is_active=True)
+    return {
+        pid: (stock, version, buckets)
+        for pid, stock, version, buckets in rows.order_by().values_list("pk", "stock", "version", "bucket_count")
+    }
+
+
+def _compare_and_swap(quantities, rows):
+    # ------------------------------------------------------------
+    # TEK UPDATE:
+    #   SET stock = CASE id WHEN 3 THEN <okunan-2> ... END, version = version + 1
+    #   WHERE (id = 3 AND version = 8) OR (id = 7 AND version = 2)
+    # Bir ürün bile eşleşmezse (araya yazım girdi) savepoint geri alınır,
+    # diğer ürünlere yazılanlar da kalmaz. Dönüş: True/False
+    # ------------------------------------------------------------
+    match = Q()
+    for pid in quantities:
+        match |= Q(pk=pid, version=rows[pid][1])
+    with transaction.atomic():
+        updated = Product.objects.filter(match).update(
+            stock=_per_product({pid: rows[pid][0] - qty for pid, qty in quantities.items()}),
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+        if updated == len(quantities):
+            return True
+        transaction.set_rollback(True)
+    return False
+
+
+def _swap(quantities, active_only):
+    # ------------------------------------------------------------
+    # Kovasız ürünler CAS ile düşülür; kovalılar dokunulmadan döner.
+    # Dönüş: (True/False — stok yetti mi, {kovalı product_id})
+    # Çakışma deneme hakkından uzun sürerse StockConflict.
+    # ------------------------------------------------------------
+    attempts = _attempts()
+    for attempt in range(attempts):
+        rows = _read(quantities, active_only)
+        striped = {pid for pid, row in rows.items() if row[2]}
+        plain = {pid: qty for pid, qty in quantities.items() if pid not in striped}
+        if len(rows) != len(quantities) or any(rows[pid][0] < qty for pid, qty in plain.items()):
+            return False, striped
+        if not plain or _compare_and_swap(plain, rows):
+            _changed(plain)
+            return True, striped
+        if attempt + 1 < attempts:
+            _backoff(attempt)
+    raise StockConflict()
+
+
+# ============================================================
+# KOVALI ÜRÜNLER
+# ============================================================
+def _striped(product_ids):
+    # {product_id: bucket_count} — sadece kovalı olanlar
+    return dict(
+        Product.objects.filter(pk__in=list(product_ids), bucket_count__gt=0)
+        .order_by()
+        .values_list("pk", "bucket_count")
+    )
+
+
+def _touch(product_id):
+    # Kovalı ürün tükendi / yeniden stoğa girdi (bkz. başlık)
+    Product.objects.filter(pk=product_id).update(updated_at=timezone.now())
+
+
+def _take_striped(product_id, qty, active_only):
+    # ------------------------------------------------------------
+    # 1) Yeterli stoğu olan kovalardan rastgele biri:
+    #      UPDATE bucket SET stock = stock - qty WHERE id = ? AND stock >= qty
+    #    Araya başkası girip kova yetmez olduysa sıradaki denenir.
+    # 2) Tek kova yetmiyorsa ana satır (admin'den gelen stok burada)
+    # 3) O da yetmiyorsa _take_spread: kovalardan parça parça
+    # ------------------------------------------------------------
+    buckets = StockBucket.objects.filter(product_id=product_id, stock__gte=qty)
+    if active_only:
+        buckets = buckets.filter(product__is_active=True)
+    candidates = list(buckets.order_by().values_list("id", "stock"))
+    random.shuffle(candidates)
+    for bucket_id, stock in candidates:
+        if StockBucket.objects.filter(pk=bucket_id, stock__gte=qty).update(stock=F("stock") - qty):
+            # Kova boşaldıysa (okunan değere göre) ürün tükenmiş olabilir
+            if stock <= qty and not levels([product_id])[product_id]:
+                _touch(product_id)
+            _changed([product_id])
+            return True
+
+    main = Product.objects.filter(pk=product_id, stock__gte=qty)
+    if active_only:
+        main = main.filter(is_active=True)
+    if main.update(stock=F("stock") - qty, version=F("version") + 1, updated_at=timezone.now()):
+        _changed([product_id])
+        return True
+    return _take_spread(product_id, qty, active_only)
+
+
+def _take_spread(product_id, qty, active_only):
+    # Nadir yol (büyük adet / stok azalmış): ana satır + kovalar sırayla.
+    # Kötümser modda ürünün kovaları kilitlenir; iyimser modda koşullu
+    # UPDATE eşleşmezse StockConflict (çağıran baştan dener).
+    with transaction.atomic():
+        product = Product.objects.filter(pk=product_id)
+        buckets = StockBucket.objects.filter(product_id=product_id, stock__gt=0)
+        if active_only:
+            product = product.filter(is_active=True)
+            buckets = buckets.filter(product__is_active=True)
+        if not optimistic():
+            product = product.select_for_update()
+            buckets = buckets.select_for_update()
+        main = next(iter(product.values_list("stock", flat=True)), None)
+        if main is None:
+            return False
+
+        plan, remaining = {}, qty
+        for bucket_id, stock in buckets.order_by("slot").values_list("id", "stock"):
+            plan[bucket_id] = min(stock, remaining)
+            remaining -= plan[bucket_id]
+            if not remaining:
+                break
+        from_main = min(main, remaining)
+        if remaining - from_main:
+            return False
+
+        updated = 0
+        if plan:
+            per_bucket = Case(
+                *[When(pk=bucket_id, then=Value(take)) for bucket_id, take in plan.items()],
+                output_field=IntegerField(),
+            )
+            updated = StockBucket.objects.filter(pk__in=plan, stock__gte=per_bucket).update(
+                stock=F("stock") - per_bucket,
+            )
+        if from_main:
+            updated += Product.objects.filter(pk=product_id, stock__gte=from_main).update(
+                stock=F("stock") - from_main, version=F("version") + 1, updated_at=timezone.now(),
+            )
+        if updated != len(plan) + bool(from_main):
+            transaction.set_rollback(True)
+            raise StockConflict()
+        if not levels([product_id])[product_id]:
+            _touch(product_id)
+    _changed([product_id])
+    return True
+
+
+def _restore_striped(product_id, qty, bucket_count):
+    slot = random.randrange(bucket_count)
+    if not StockBucket.objects.filter(product_id=product_id, slot=slot).update(stock=F("stock") + qty):
+        # Kova yoksa (elle silinmiş) ana satıra
+        Product.objects.filter(pk=product_id).update(
+            stock=F("stock") + qty, version=F("version") + 1, updated_at=timezone.now(),
+        )
+    elif levels([product_id])[product_id] == qty:
+        # Tükenmişti, yeniden stokta
+        _touch(product_id)
+    _changed([product_id])
+
+
+def levels(product_ids, active_only=False):
+    # ------------------------------------------------------------
+    # {product_id: satılabilir toplam} — sepet / checkout mesajları için
+    # Kovasız ürünler: 1 sorgu. Kovalı varsa + 1 toplama sorgusu.
+    # ------------------------------------------------------------
+    rows = Product.objects.filter(pk__in=list(product_ids))
+    if active_only:
+        rows = rows.filter(is_active=True)
+    found, striped = {}, []
+    for pid, stock, buckets in rows.order_by().values_list("pk", "stock", "bucket_count"):
+        found[pid] = stock
+        if buckets:
+            striped.append(pid)
+    if striped:
+        totals = (
+            StockBucket.objects.filter(product_id__in=striped)
+            .order_by()
+            .values("product_id")
+            .annotate(total=Sum("stock"))
+            .values_list("product_id", "total")
+        )
+        for pid, total in totals:
+            found[pid] += total or 0
+    return found
+
+
+def with_levels(queryset):
+    # ------------------------------------------------------------
+    # Listeler (arama kartı) için: kova toplamı alt sorgu olarak aynı
+    # SELECT'te gelir → Product.available_stock ürün başına SUM sorgusu
+    # açmaz (N+1 yok). Kovasız üründe alt sorgu NULL döner.
+    # ------------------------------------------------------------
+    totals = (
+        StockBucket.objects.filter(product=OuterRef("pk"))
+        .order_by()
+        .values("product")
+        .annotate(total=Sum("stock"))
+        .values("total")
+    )
+    return queryset.annotate(bucket_stock=Subquery(totals))
+
+
+def stripe(product_id, buckets):
+    # ------------------------------------------------------------
+    # Ürünün satılabilir toplamını N kovaya eşit dağıt (0 → kovaları ana
+    # satıra geri topla). Toplam değişmez. Dönüş: toplam stok
+    # ------------------------------------------------------------
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        existing = StockBucket.objects.select_for_update().filter(product_id=product_id)
+        total = product.stock + (existing.aggregate(total=Sum("stock"))["total"] or 0)
+        existing.delete()
+        if buckets:
+            share, extra = divmod(total, buckets)
+            StockBucket.objects.bulk_create([
+                StockBucket(product_id=product_id, slot=slot, stock=share + (1 if slot < extra else 0))
+                for slot in range(buckets)
+            ])
+        Product.objects.filter(pk=product_id).update(
+            stock=0 if buckets else total,
+            bucket_count=buckets,
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+    _changed([product_id])
+    return total
+
+
+def take(product_id, qty):
+    # ------------------------------------------------------------
+    # Koşullu düşüm: sadece stok yetiyorsa düşer.
+    #   UPDATE ... SET stock = stock - qty WHERE id = ? AND stock >= qty
+    # Dönüş: True (düştü) / False (stok yetmedi, hiçbir şey yazılmadı)
+    # Kilit yok: kontrol ve düşüm aynı cümlede → iki alıcı aynı son
+    # ürünü alamaz.
+    # ------------------------------------------------------------
+    if optimistic():
+        taken, striped = _swap({product_id: qty}, active_only=False)
+        if striped:
+            return _take_striped(product_id, qty, active_only=False)
+        return taken
+    updated = Product.objects.filter(pk=product_id, bucket_count=0, stock__gte=qty).update(
+        stock=F("stock") - qty, version=F("version") + 1, updated_at=timezone.now(),
+    )
+    if updated:
+        _changed([product_id])
+        return True
+    if _striped([product_id]):
+        return _take_striped(product_id, qty, active_only=False)
+    return False
+
+
+def decrement(quantities):
+    # ------------------------------------------------------------
+    # Sepetin tamamı için TEK koşullu UPDATE:
+    #   UPDATE ... SET stock = stock - CASE id WHEN 3 THEN 2 WHEN 7 THEN 1 END
+    #   WHERE id IN (3, 7) AND is_active AND stock >= CASE id ... END
+    # Etkilenen satır sayısı ürün sayısından azsa en az biri yetmedi
+    # (aşırı satış) → OutOfStock; çağıranın atomic bloğu geri alınır.
+    # Sepet büyüse de cümle sayısı 1 → kilit süresi sabit kalır.
+    # İyimser modda: 1 SELECT + 1 CAS UPDATE (çakışmada tekrar).
+    # ------------------------------------------------------------
+    quantities = {pid: qty for pid, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return 0
+    if optimistic():
+        taken, striped = _swap(quantities, active_only=True)
+    else:
+        per_product = _per_product(quantities)
+        updated = (
+            Product.objects.filter(pk__in=quantities, is_active=True, bucket_count=0, stock__gte=per_product)
+            .update(stock=F("stock") - per_product, version=F("version") + 1, updated_at=timezone.now())
+        )
+        striped = _striped(quantities) if updated != len(quantities) else {}
+        taken = updated == len(quantities) - len(striped)
+        _changed(pid for pid in quantities if pid not in striped)
+    if not taken or not all(_take_striped(pid, quantities[pid], active_only=True) for pid in striped):
+        raise OutOfStock(quantities)
+    return len(quantities)
+
+
+def restore(quantities):
+    # ------------------------------------------------------------
+    # Geri koyma (rezervasyon bırakma, iptal): her ürün için +qty, tek UPDATE
+    # İki modda da aynı: ekleme sıradan bağımsız (F("stock") + qty), CAS
+    # gerekmez. version artar → o an CAS ile düşmeye çalışan yeniden okur.
+    # ------------------------------------------------------------
+    quantities = {pid: qty for pid, qty in quantities.items() if qty > 0}
+    if not quantities:
+        return 0
+    updated = Product.objects.filter(pk__in=quantities, bucket_count=0).update(
+        stock=F("stock") + _per_product(quantities), version=F("version") + 1, updated_at=timezone.now(),
+    )
+    if updated != len(quantities):
+        for pid, bucket_count in _striped(quantities).items():
+            _restore_striped(pid, quantities[pid], bucket_count)
+            updated += 1
+    _changed(quantities)
+    return updated
@@ -0,0 +1,132 @@
+# ============================================================
+# catalog/ledger.py  —  GRİWEAR STOK HAREKET DEFTERİ
+# ============================================================
+# Yazma (stok yazımıyla AYNI transaction içinde, tek bulk_create):
+#   ledger.record(ledger.SALE, {product_id: adet}, order_id=order.id)
+#   ledger.record_orders(ledger.CANCEL, [(order_id, product_id, adet), ...])
+# Adetler pozitif verilir; işareti tür belirler (satış eksi).
+#
+# Okuma:
+#   ledger.levels(ids)     → defterdeki seviye = snapshot + kalan hareketler
+#   ledger.reconcile(ids)  → defter ile gerçek stok uyuşmayan ürünler
+#     gerçek = satılabilir (kovalar dahil) + sepetlerde tutulan
+#
+# Sıkıştırma: compact() — eski hareketler ürün başına InventorySnapshot'a
+# katlanır ve silinir (compact_inventory_ledger komutu, cron).
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import inventory
+from .models import InventoryMovement, InventorySnapshot, Product, StockReservation
+
+SALE = InventoryMovement.KIND_SALE
+CANCEL = InventoryMovement.KIND_CANCEL
+RESTOCK = InventoryMovement.KIND_RESTOCK
+ADJUSTMENT = InventoryMovement.KIND_ADJUSTMENT
+
+SIGNS = {SALE: -1, CANCEL: 1, RESTOCK: 1, ADJUSTMENT: 1}
+
+BULK_BATCH_SIZE = 1000
+
+
+def record_orders(kind, rows):
+    # rows: (order_id, product_id, adet) — admin toplu iptal gibi çok siparişli yazımlar
+    sign = SIGNS[kind]
+    movements = [
+        InventoryMovement(product_id=pid, kind=kind, quantity=sign * qty, order_id=order_id)
+        for order_id, pid, qty in rows if pid and qty
+    ]
+    InventoryMovement.objects.bulk_create(movements, batch_size=BULK_BATCH_SIZE)
+    return len(movements)
+
+
+def record(kind, quantities, order_id=None):
+    return record_orders(kind, [(order_id, pid, qty) for pid, qty in quantities.items()])
+
+
+def levels(product_ids):
+    # Snapshot (ürün başına 1 satır) + kalan hareketlerin toplamı: 2 sorgu
+    product_ids = list(product_ids)
+    found = dict(
+        InventorySnapshot.objects.filter(product_id__in=product_ids).values_list("product_id", "level")
+    )
+    totals = (
+        InventoryMovement.objects.filter(product_id__in=product_ids)
+        .order_by()
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+    for pid, total in totals:
+        found[pid] = found.get(pid, 0) + total
+    return found
+
+
+def reconcile(product_ids):
+    # {product_id: (defter, gerçek)} — sadece uyuşmayanlar
+    product_ids = list(product_ids)
+    actual = inventory.levels(product_ids)
+    held = (
+        StockReservation.objects.filter(product_id__in=product_ids)
+        .order_by()
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+    for pid, total in held:
+        actual[pid] += total
+    booked = levels(product_ids)
+    return {
+        pid: (booked.get(pid, 0), level)
+        for pid, level in actual.items()
+        if booked.get(pid, 0) != level
+    }
+
+
+def compact(before, batch_size=5000):
+    # ------------------------------------------------------------
+    # created_at < before olan hareketleri id sırasıyla parti parti katla.
+    # Parti başına: 1 SELECT id + 1 toplama + 1 snapshot upsert + 1 DELETE
+    # Dönüş: katlanan hareket sayısı
+    # ------------------------------------------------------------
+    folded, last_id = 0, 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                InventoryMovement.objects.filter(id__gt=last_id, created_at__lt=before)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            batch = InventoryMovement.objects.filter(id__in=ids)
+            deltas = dict(
+                batch.order_by().values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+            )
+            # Silinmiş ürünün hareketleri snapshot'a girmez, sadece silinir
+            alive = set(Product.objects.filter(pk__in=list(deltas)).values_list("pk", flat=True))
+            current = dict(
+                InventorySnapshot.objects.select_for_update()
+                .filter(product_id__in=alive)
+                .values_list("product_id", "level")
+            )
+            now = timezone.now()
+            InventorySnapshot.objects.bulk_create(
+                [
+                    InventorySnapshot(
+                        product_id=pid, level=current.get(pid, 0) + deltas[pid], through_id=ids[-1], taken_at=now,
+                    )
+                    for pid in alive
+                ],
+                update_conflicts=True,
+                unique_fields=["product"],
+                update_fields=["level", "through_id", "taken_at"],
+            )
+            batch.delete()
+        folded += len(ids)
+        last_id = ids[-1]
+        if len(ids) < batch_size:
+            break
+    return folded
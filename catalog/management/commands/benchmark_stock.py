@@ -0,0 +1,144 @@
+# ============================================================
+# benchmark_stock — kötümser / iyimser stok modunu yük altında karşılaştır
+# ============================================================
+# Kullanım:
+#   python manage.py benchmark_stock
+#   python manage.py benchmark_stock --threads 16 --stock 500 --work-ms 5
+#   python manage.py benchmark_stock --modes optimistic
+#   python manage.py benchmark_stock --buckets 8      # stok kovalarıyla
+#
+# Ne yapar?
+# - Her mod için geçici bir ürün açar (stok = --stock)
+# - --threads kadar iş parçacığı aynı ürünü stok bitene kadar satın alır:
+#   inventory.retrying(...) içinde take() + --work-ms bekleme
+#   (checkout'ta sipariş satırlarını yazma süresini taklit eder)
+# - Saniyedeki başarılı satış, çakışma/yeniden deneme, hata ve gecikme
+#   (p50/p95) raporlanır; sonda stok tutarlılığı (aşırı satış yok mu)
+#   kontrol edilir ve geçici ürün silinir.
+#
+# DİKKAT: Gerçek veritabanına yazar (geçici kategori + ürün). SQLite'ta
+# yazımlar zaten tek sıraya girer; anlamlı karşılaştırma için üretimdeki
+# veritabanı motorunda çalıştırın.
+
+import secrets
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from django.test.utils import override_settings
+
+from catalog import inventory
+from catalog.models import Category, Product
+
+# Üst üste bu kadar hata alan iş parçacığı bırakır (kalıcı hata → sonsuz döngü yok)
+MAX_CONSECUTIVE_ERRORS = 50
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = "Stok eşzamanlılık modlarını (pessimistic / optimistic) aynı yük altında karşılaştırır."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--modes", nargs="+", default=[inventory.PESSIMISTIC, inventory.OPTIMISTIC],
+            choices=[inventory.PESSIMISTIC, inventory.OPTIMISTIC],
+        )
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--stock", type=int, default=200)
+        parser.add_argument("--qty", type=int, default=1, help="Satış başına adet")
+        parser.add_argument("--work-ms", type=float, default=2.0, help="Transaction içindeki ek iş (ms)")
+        parser.add_argument("--buckets", type=int, default=0, help="Stok kaç kovaya bölünsün (0 = kovasız)")
+
+    def handle(self, *args, **options):
+        if options["threads"] < 1 or options["stock"] < 1 or options["qty"] < 1:
+            raise CommandError("--threads, --stock ve --qty pozitif olmalı")
+
+        self.stdout.write(
+            f"{'mod':<12} {'satış':>6} {'satış/sn':>9} {'çakışma':>8} {'hata':>5} {'p50 ms':>7} {'p95 ms':>7}  tutarlı"
+        )
+        for mode in options["modes"]:
+            with override_settings(STOCK_CONCURRENCY=mode):
+                result = self._run(mode, options)
+            self.stdout.write(
+                f"{mode:<12} {result['sold']:>6} {result['rate']:>9.1f} {result['conflicts']:>8} "
+                f"{result['errors']:>5} {result['p50']:>7.1f} {result['p95']:>7.1f}  "
+                + (self.style.SUCCESS("evet") if result["consistent"] else self.style.ERROR("HAYIR"))
+            )
+
+    def _run(self, mode, options):
+        suffix = secrets.token_hex(4)
+        category = Category.objects.create(name=f"benchmark {suffix}", slug=f"benchmark-{suffix}")
+        product = Product.objects.create(
+            category=category, name=f"benchmark {mode}", slug=f"benchmark-{mode}-{suffix}",
+            price=1, stock=options["stock"], is_active=False,
+        )
+        if options["buckets"]:
+            inventory.stripe(product.pk, options["buckets"])
+        qty, work = options["qty"], options["work_ms"] / 1000
+
+        lock = threading.Lock()
+        stats = {"sold": 0, "conflicts": 0, "errors": 0, "latencies": []}
+
+        def on_conflict(attempt):
+            with lock:
+                stats["conflicts"] += 1
+
+        def buy():
+            # is_active=False: vitrine düşmesin diye; decrement aktif ürün
+            # ister, bu yüzden take() (aynı koşullu/CAS yol) kullanılır
+            if not inventory.take(product.pk, qty):
+                raise inventory.OutOfStock({product.pk: qty})
+            if work:
+                time.sleep(work)
+
+        def worker():
+            failures = 0
+            try:
+                while failures < MAX_CONSECUTIVE_ERRORS:
+                    started = time.perf_counter()
+                    try:
+                        inventory.retrying(buy, on_conflict=on_conflict)
+                    except inventory.OutOfStock:
+                        return
+                    except (inventory.StockConflict, DatabaseError):
+                        # SQLite: "database is locked"; diğerleri: deadlock vb.
+                        failures += 1
+                        with lock:
+                            stats["errors"] += 1
+                        continue
+                    failures = 0
+                    elapsed = (time.perf_counter() - started) * 1000
+                    with lock:
+                        stats["sold"] += 1
+                        stats["latencies"].append(elapsed)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+
+        left = inventory.levels([product.pk])[product.pk]
+        consistent = left == options["stock"] - stats["sold"] * qty and left >= 0
+        category.delete()
+
+        return {
+            "sold": stats["sold"],
+            "rate": stats["sold"] / duration if duration else 0.0,
+            "conflicts": stats["conflicts"],
+            "errors": stats["errors"],
+            "p50": _percentile(stats["latencies"], 50),
+            "p95": _percentile(stats["latencies"], 95),
+            "consistent": consistent,
+        }
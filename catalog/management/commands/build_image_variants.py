@@ -0,0 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from catalog import images
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = "Görseli olan ürünler için eksik thumbnail/WebP türevlerini üretir."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Hazır olanları da yeniden üret")
+        parser.add_argument("--workers", type=int, default=getattr(settings, "IMAGE_VARIANT_WORKERS", 2))
+
+    def handle(self, *args, **options):
+        products = (
+            Product.objects.exclude(image="").exclude(image__isnull=True)
+            .only("id", "image", "image_variants")
+        )
+
+        built = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            futures = {}
+            for product in products.iterator(chunk_size=200):
+                if images.variants_ready(product) and not options["force"]:
+                    continue
+                future = executor.submit(
+                    images.build_variants,
+                    default_storage.path(product.image.name),
+                    product.image.name,
+                    str(settings.MEDIA_ROOT),
+                )
+                futures[future] = product.pk
+
+            for future in as_completed(futures):
+                try:
+                    images.store_result(futures[future], future.result())
+                    built += 1
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f"Ürün #{futures[future]}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"{built} ürünün türevleri üretildi, {failed} hata."))
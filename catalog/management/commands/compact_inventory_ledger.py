@@ -0,0 +1,67 @@
+# ============================================================
+# compact_inventory_ledger — eski stok hareketlerini snapshot'a katla
+# ============================================================
+# Kullanım (cron, örn. her gece):
+#   python manage.py compact_inventory_ledger              # 30 günden eski
+#   python manage.py compact_inventory_ledger --days 7
+# Mutabakat (defter = satılabilir + sepetlerde tutulan mı?):
+#   python manage.py compact_inventory_ledger --reconcile
+#   python manage.py compact_inventory_ledger --reconcile --fix
+#     --fix: farkı "adjustment" hareketi olarak deftere yazar (ilk kurulumda
+#     mevcut stokları deftere almak için de kullanılır)
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from catalog import ledger
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = "Eski stok hareketlerini ürün başına snapshot'a katlar; istenirse defteri stokla karşılaştırır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Bu kadar günden eski hareketler katlanır")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--reconcile", action="store_true", help="Sıkıştırma yerine mutabakat yap")
+        parser.add_argument("--fix", action="store_true", help="Mutabakat farklarını düzeltme hareketi olarak yaz")
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--days >= 0 ve --batch-size > 0 olmalı")
+
+        if options["reconcile"]:
+            self._reconcile(options["batch_size"], options["fix"])
+            return
+
+        before = timezone.now() - timedelta(days=options["days"])
+        folded = ledger.compact(before, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{folded} hareket snapshot'a katlandı."))
+
+    def _reconcile(self, batch_size, fix):
+        # Ürünler id sırasıyla parti parti: parti başına birkaç toplama sorgusu
+        ids = Product.objects.order_by("pk").values_list("pk", flat=True)
+        mismatched = 0
+        start = 0
+        while True:
+            chunk = list(ids.filter(pk__gt=start)[:batch_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                diffs = ledger.reconcile(chunk)
+                for pid, (booked, actual) in diffs.items():
+                    self.stdout.write(f"ürün {pid}: defter {booked}, stok {actual} (fark {actual - booked:+d})")
+                if fix:
+                    ledger.record(ledger.ADJUSTMENT, {pid: actual - booked for pid, (booked, actual) in diffs.items()})
+            mismatched += len(diffs)
+            start = chunk[-1]
+
+        if not mismatched:
+            self.stdout.write(self.style.SUCCESS("Defter stokla uyuşuyor."))
+        elif fix:
+            self.stdout.write(self.style.SUCCESS(f"{mismatched} ürün düzeltildi."))
+        else:
+            self.stdout.write(self.style.WARNING(f"{mismatched} üründe fark var (--fix ile düzeltilir)."))
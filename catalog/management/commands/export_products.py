@@ -0,0 +1,77 @@
+# ============================================================
+# export_products — ürünleri CSV / JSONL olarak dışa aktarma
+# ============================================================
+# Kullanım:
+#   python manage.py export_products urunler.csv
+#   python manage.py export_products - --format jsonl > urunler.jsonl
+#
+# Çıktı kolonları import_products ile birebir aynıdır → dışa aktarılan
+# dosya düzenlenip tekrar içe aktarılabilir.
+#
+# NEDEN values_list + iterator?
+# - Model nesnesi kurulmaz, sonuçlar chunk_size'lık parçalarla okunur;
+#   bellek ürün sayısından bağımsız kalır.
+
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import Product
+
+COLUMNS = ["slug", "name", "category", "price", "stock", "is_new", "is_active", "description"]
+FIELDS = ["slug", "name", "category__slug", "price", "stock", "is_new", "is_active", "description"]
+
+
+class Command(BaseCommand):
+    help = "Ürünleri CSV veya JSONL olarak dışa aktarır (import_products ile uyumlu)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Dosya yolu veya stdout için -")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Varsayılan: dosya uzantısından")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--active-only", action="store_true")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+
+        queryset = Product.objects.order_by("id")
+        if options["active_only"]:
+            queryset = queryset.filter(is_active=True)
+        rows = queryset.values_list(*FIELDS).iterator(chunk_size=options["chunk_size"])
+
+        if path == "-":
+            stream = sys.stdout
+        else:
+            try:
+                stream = open(path, "w", encoding="utf-8", newline="")
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        started = time.monotonic()
+        total = 0
+        try:
+            if fmt == "csv":
+                writer = csv.writer(stream)
+                writer.writerow(COLUMNS)
+                for row in rows:
+                    writer.writerow(row)
+                    total += 1
+            else:
+                for row in rows:
+                    record = dict(zip(COLUMNS, row))
+                    record["price"] = str(record["price"])
+                    stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    total += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+        # Özet stderr'e: stdout'a yazılan veri bozulmasın
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stderr.write(self.style.SUCCESS(
+            f"{total} ürün aktarıldı — {elapsed:.2f} sn, {total / elapsed:.0f} satır/sn"
+        ))
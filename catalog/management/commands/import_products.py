@@ -0,0 +1,279 @@
+# ============================================================
+# import_products — CSV / JSONL'dan toplu ürün yükleme (upsert)
+# ============================================================
+# Kullanım:
+#   python manage.py import_products urunler.csv
+#   python manage.py import_products urunler.jsonl --batch-size 1000
+#   cat urunler.csv | python manage.py import_products - --format csv
+#   python manage.py import_products urunler.csv --dry-run
+#
+# Kolonlar: slug, name, category (slug), price, stock, is_new, is_active, description
+# - slug varsa: o slug'daki ürün güncellenir, yoksa oluşturulur
+# - slug boşsa: isimden benzersiz slug üretilir (gomlek, gomlek-2, ...)
+#
+# NEDEN AKIŞ (stream) + PARTİ?
+# - Dosya satır satır okunur, batch-size satırda bir DB'ye yazılır
+#   (bulk_create + bulk_update). Bellek dosya boyutundan bağımsızdır.
+# - Kategoriler başta tek sorguyla slug → id haritasına alınır.
+
+import csv
+import io
+import json
+import sys
+import time
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from catalog import inventory, ledger
+from catalog.models import Category, Product, StockBucket
+from catalog.search import fold
+from catalog.signals import products_bulk_changed
+
+# updated_at: bulk_update auto_now'ı doldurmaz, elle yazıyoruz (ETag için)
+# version: stok üzerine yazılıyor → CAS ile yazan istekler çakışmayı görsün
+UPDATE_FIELDS = [
+    "name", "category", "price", "stock", "is_new", "is_active", "description", "updated_at", "version",
+]
+TRUE_VALUES = {"1", "true", "yes", "evet", "e", "on"}
+
+_price_field = Product._meta.get_field("price")
+PRICE_STEP = Decimal(1).scaleb(-_price_field.decimal_places)
+MAX_PRICE = Decimal(10) ** (_price_field.max_digits - _price_field.decimal_places)
+MAX_REPORTED_ERRORS = 20
+
+
+def _bool(value, default):
+    if value is None or str(value).strip() == "":
+        return default
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+class Command(BaseCommand):
+    help = "CSV veya JSONL dosyasından ürünleri slug'a göre toplu ekler/günceller."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Dosya yolu veya stdin için -")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Varsayılan: dosya uzantısından")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Sadece doğrula, DB'ye yazma")
+
+    # ------------------------------------------------------------
+    # 1) OKUMA — satır satır (generator)
+    # ------------------------------------------------------------
+    def _rows(self, stream, fmt):
+        if fmt == "csv":
+            for line_no, row in enumerate(csv.DictReader(stream), start=2):
+                yield line_no, row
+        else:
+            for line_no, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_no, exc
+
+    # ------------------------------------------------------------
+    # 2) DOĞRULAMA — tek satır → temiz dict (hata varsa ValueError)
+    # ------------------------------------------------------------
+    def _clean(self, row):
+        if isinstance(row, Exception):
+            raise ValueError(f"geçersiz JSON: {row}")
+        if not isinstance(row, dict):
+            # JSONL satırı geçerli JSON ama nesne değil ([1, 2], "x", 5)
+            raise ValueError(f"satır bir JSON nesnesi olmalı: {type(row).__name__}")
+
+        # JSONL'de alanlar sayı / liste gelebilir → metne çevrilir
+        name = str(row.get("name") or "").strip()
+        if not name:
+            raise ValueError("name boş olamaz")
+
+        category_slug = str(row.get("category") or "").strip()
+        category_id = self.categories.get(category_slug)
+        if category_id is None:
+            raise ValueError(f"bilinmeyen kategori: {category_slug!r}")
+
+        # NaN / Infinity Decimal olarak okunur; DB'ye gitmeden reddedilir.
+        # 2 haneye yuvarlanır ve alanın max_digits sınırına bakılır (yoksa
+        # tüm parti bulk_create'te patlar).
+        try:
+            price = Decimal(str(row.get("price", "")).strip())
+        except InvalidOperation:
+            raise ValueError(f"geçersiz fiyat: {row.get('price')!r}")
+        if not price.is_finite():
+            raise ValueError(f"geçersiz fiyat: {row.get('price')!r}")
+        price = price.quantize(PRICE_STEP, rounding=ROUND_HALF_UP)
+        if price < 0:
+            raise ValueError("fiyat negatif olamaz")
+        if price >= MAX_PRICE:
+            raise ValueError(f"fiyat çok büyük: {row.get('price')!r}")
+
+        # 3.7 gibi küsuratlı stok sessizce 3'e kesilmez, reddedilir
+        raw_stock = row.get("stock")
+        try:
+            stock = Decimal(str(raw_stock).strip()) if raw_stock not in (None, "") else Decimal(0)
+        except InvalidOperation:
+            raise ValueError(f"geçersiz stok: {raw_stock!r}")
+        if isinstance(raw_stock, bool) or not stock.is_finite() or stock != stock.to_integral_value():
+            raise ValueError(f"geçersiz stok: {raw_stock!r}")
+        stock = int(stock)
+        if stock < 0:
+            raise ValueError("stok negatif olamaz")
+
+        return {
+            "slug": slugify(str(row.get("slug") or "").strip()),
+            "name": name[:200],
+            "category_id": category_id,
+            "price": price,
+            "stock": stock,
+            "is_new": _bool(row.get("is_new"), False),
+            "is_active": _bool(row.get("is_active"), True),
+            "description": str(row.get("description") or ""),
+        }
+
+    # ------------------------------------------------------------
+    # 3) BENZERSİZ SLUG — isimden üret, çakışırsa -2, -3 ...
+    # ------------------------------------------------------------
+    def _assign_slugs(self, rows):
+        pending = [r for r in rows if not r["slug"]]
+        if not pending:
+            return
+
+        bases = {r["name"]: slugify(fold(r["name"]))[:200] or "urun" for r in pending}
+        taken_q = Q()
+        for base in set(bases.values()):
+            taken_q |= Q(slug=base) | Q(slug__startswith=f"{base}-")
+        taken = set(Product.objects.filter(taken_q).values_list("slug", flat=True))
+        taken.update(r["slug"] for r in rows if r["slug"])
+        taken.update(self.dry_run_slugs)
+
+        for row in pending:
+            base = bases[row["name"]]
+            slug, n = base, 2
+            while slug in taken:
+                slug, n = f"{base}-{n}", n + 1
+            row["slug"] = slug
+            taken.add(slug)
+
+    # ------------------------------------------------------------
+    # 4) YAZMA — parti başına: 1 SELECT (kilitli) + 1 bulk_create + 1 bulk_update
+    # ------------------------------------------------------------
+    def _flush(self, batch):
+        # Aynı slug partide iki kez geçerse son satır geçerli
+        by_slug = {}
+        for row in batch:
+            if row["slug"]:
+                by_slug[row["slug"]] = row
+        rows = list(by_slug.values()) + [r for r in batch if not r["slug"]]
+        self._assign_slugs(rows)
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Stok farkı (defter) kilitli satırdan hesaplanır: okuma ile
+            # bulk_update arasında checkout / admin stoğu değiştirirse
+            # fark, üzerine yazılan değerle tutmazdı
+            existing = Product.objects.all() if self.dry_run else Product.objects.select_for_update()
+            existing = existing.in_bulk([r["slug"] for r in rows], field_name="slug")
+
+            # Kovalı ürün (bkz. StockBucket): satılabilir stok = ana satır +
+            # kovalar. Fark bu toplamdan hesaplanır; yazımdan sonra yeni
+            # stok kovalara yeniden dağıtılır (inventory.stripe).
+            striped = {p.pk: p.bucket_count for p in existing.values() if p.bucket_count}
+            if striped and not self.dry_run:
+                list(StockBucket.objects.select_for_update().filter(product_id__in=list(striped)).values_list("id"))
+            current = inventory.levels(striped) if striped else {}
+
+            to_create, to_update, deltas = [], [], {}
+            for row in rows:
+                product = existing.get(row["slug"])
+                if product is None and row["slug"] in self.dry_run_slugs:
+                    # Dry-run: önceki partide "yeni" sayıldı, bu satır güncelleme
+                    self.updated += 1
+                    continue
+                if product is None:
+                    to_create.append(Product(**row))
+                else:
+                    deltas[product.pk] = row["stock"] - current.get(product.pk, product.stock)
+                    for field, value in row.items():
+                        setattr(product, field, value)
+                    product.updated_at = now
+                    product.version = F("version") + 1
+                    to_update.append(product)
+
+            self.created += len(to_create)
+            self.updated += len(to_update)
+            if self.dry_run:
+                # Önceki partiler DB'ye yazılmadı: bu partinin yeni slug'ları hatırlanır
+                self.dry_run_slugs.update(p.slug for p in to_create)
+                return
+
+            created = Product.objects.bulk_create(to_create)
+            Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+            if striped:
+                # İçe aktarılan adet ana satırda; eski kova stoğu sıfırlanıp
+                # toplam kovalara eşit dağıtılır
+                StockBucket.objects.filter(product_id__in=list(striped)).update(stock=0)
+                for pid, buckets in striped.items():
+                    inventory.stripe(pid, buckets)
+
+            # Stok defteri: yeni ürün = giriş, mevcutta fark = giriş / düzeltme
+            ledger.record(ledger.RESTOCK, {p.pk: p.stock for p in created if p.pk})
+            ledger.record(ledger.RESTOCK, {pid: d for pid, d in deltas.items() if d > 0})
+            ledger.record(ledger.ADJUSTMENT, {pid: d for pid, d in deltas.items() if d < 0})
+
+        # bulk_* post_save göndermez → arama indeksi, kart cache'i vb. için
+        product_ids = [p.pk for p in created if p.pk] + [p.pk for p in to_update]
+        products_bulk_changed.send(sender=Product, product_ids=product_ids)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        batch_size = max(options["batch_size"], 1)
+        self.dry_run = options["dry_run"]
+        self.dry_run_slugs = set()
+        self.created = self.updated = 0
+
+        self.categories = dict(Category.objects.values_list("slug", "id"))
+
+        if path == "-":
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8-sig")
+        else:
+            try:
+                stream = open(path, encoding="utf-8-sig", newline="")
+            except OSError as exc:
+                raise CommandError(str(exc))
+
+        started = time.monotonic()
+        total = errors = 0
+        batch = []
+        with stream:
+            for line_no, raw in self._rows(stream, fmt):
+                total += 1
+                try:
+                    batch.append(self._clean(raw))
+                except ValueError as exc:
+                    errors += 1
+                    if errors <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f"Satır {line_no}: {exc}")
+                    continue
+
+                if len(batch) >= batch_size:
+                    self._flush(batch)
+                    batch = []
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"{total} satır işlendi...")
+
+            if batch:
+                self._flush(batch)
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        prefix = "[DRY-RUN] " if self.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{total} satır: {self.created} yeni, {self.updated} güncel, {errors} hatalı "
+            f"— {elapsed:.2f} sn, {total / elapsed:.0f} satır/sn"
+        ))
@@ -0,0 +1,38 @@
+# ============================================================
+# stripe_stock — çok satan ürünün stoğunu kovalara böl
+# ============================================================
+# Kullanım:
+#   python manage.py stripe_stock kampanya-sneaker --buckets 8
+#   python manage.py stripe_stock kampanya-sneaker --buckets 0   # geri topla
+#
+# Toplam stok değişmez; sadece kaç satıra dağıtıldığı değişir.
+# Kampanya öncesi açılır, sonrasında 0 ile kapatılabilir.
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import inventory
+from catalog.models import Product
+
+MAX_BUCKETS = 64
+
+
+class Command(BaseCommand):
+    help = "Ürün stoğunu N kova satırına böler (0 → kovaları ana satıra toplar)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("slugs", nargs="+")
+        parser.add_argument("--buckets", type=int, required=True)
+
+    def handle(self, *args, **options):
+        buckets = options["buckets"]
+        if not 0 <= buckets <= MAX_BUCKETS:
+            raise CommandError(f"--buckets 0 ile {MAX_BUCKETS} arasında olmalı")
+
+        products = dict(Product.objects.filter(slug__in=options["slugs"]).values_list("slug", "pk"))
+        missing = [slug for slug in options["slugs"] if slug not in products]
+        if missing:
+            raise CommandError(f"Ürün bulunamadı: {', '.join(missing)}")
+
+        for slug in options["slugs"]:
+            total = inventory.stripe(products[slug], buckets)
+            self.stdout.write(self.style.SUCCESS(f"{slug}: {total} adet → {buckets or 'kovasız'}"))
@@ -0,0 +1,30 @@
+# ============================================================
+# sweep_reservations — süresi dolan stok tutmalarını geri al
+# ============================================================
+# Kullanım (cron, örn. her dakika):
+#   python manage.py sweep_reservations
+# Veya sürekli çalışan süreç olarak:
+#   python manage.py sweep_reservations --loop 30
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog import reservations
+
+
+class Command(BaseCommand):
+    help = "Süresi dolan sepet stok rezervasyonlarını toplu olarak stoğa geri koyar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--loop", type=int, default=0, help="Saniye; verilirse bu aralıkla sürekli çalışır")
+
+    def handle(self, *args, **options):
+        while True:
+            swept = reservations.sweep(batch_size=options["batch_size"])
+            if swept or options["verbosity"] > 1:
+                self.stdout.write(self.style.SUCCESS(f"{swept} rezervasyon geri alındı."))
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_stock_buckets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.IntegerField(default=0)),
+                ('through_id', models.BigIntegerField(default=0)),
+                ('taken_at', models.DateTimeField()),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshot', to='catalog.product')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('sale', 'Satış'), ('cancel', 'İptal'), ('restock', 'Stok girişi'), ('adjustment', 'Düzeltme')], max_length=16)),
+                ('quantity', models.IntegerField()),
+                ('order_id', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('product', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='catalog.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'quantity'], name='movement_product_qty_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_inventory_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveIntegerField(default=0, help_text="Satılabilir stok (sepetlerde tutulanlar hariç). Fiziksel sayımı girerken yandaki 'sepetlerde tutulan' adedi çıkarın."),
+        ),
+    ]
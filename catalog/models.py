@@ -1,10 +1,16 @@
 from django.db import models
+from django.db.models import Sum
 from django.urls import reverse
+from django.utils.functional import cached_property
 
 class Category(models.Model):
     name = models.CharField(max_length=120)
     slug = models.SlugField(max_length=140, unique=True)
 
+    # Conditional GET (catalog/conditional.py): kategori adı kartlarda ve
+    # menüde görünür → değişince katalog sayfalarının ETag'i de değişir
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     class Meta:
         ordering = ["name"]
         verbose_name_plural = "Categories"
@@ -25,19 +31,266 @@ class Product(models.Model):
     is_new = models.BooleanField(default=False)
 
     image = models.ImageField(upload_to="products/", blank=True, null=True)  # şimdilik opsiyonel
+
+    # ------------------------------------------------------------
+    # GÖRSEL TÜREVLERİ — catalog/images.py doldurur (arka planda)
+    # ------------------------------------------------------------
+    # image_width/height: orijinal boyut → <img width/height> (layout kayması olmaz)
+    # image_variants: {"src": image.name, "sizes": [[320, 427], ...], "v": 2}
+    #   src eşleşmiyorsa görsel değişmiş demektir, türevler yeniden üretilir.
+    #   v: türev ad şeması sürümü (images.VARIANT_VERSION)
+    # NEDEN ImageField(width_field=...) değil? O alanlar boşken Django her
+    # model yüklemesinde dosyayı açıp boyut okur; listelerde pahalı olur.
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(blank=True)
-    stock = models.PositiveIntegerField(default=0)
+    # DİKKAT: stock = satılabilir stok; sepetlerde tutulan adetler
+    # (StockReservation) buradan ZATEN düşülmüştür ve süresi dolunca geri
+    # eklenir. Depodaki fiziksel sayım olduğu gibi yazılırsa tutmalar
+    # bitince stok şişer → sayımdan "sepetlerde tutulan"ı çıkarın
+    # (admin formunda gösterilir).
+    stock = models.PositiveIntegerField(
+        default=0,
+        help_text="Satılabilir stok (sepetlerde tutulanlar hariç). Fiziksel sayımı girerken "
+                  "yandaki 'sepetlerde tutulan' adedi çıkarın.",
+    )
 
 
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # ------------------------------------------------------------
+    # updated_at — ETag / Last-Modified kaynağı (catalog/conditional.py)
+    # DİKKAT: auto_now sadece save() ile dolar. update(), bulk_update ve
+    # save(update_fields=[...]) kullanan kod updated_at'i kendisi yazmalı
+    # (stok düşümü, görsel türevleri, import_products).
+    # db_index: Max(updated_at) tabloyu taramadan index'in sonundan okunur.
+    # ------------------------------------------------------------
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # ------------------------------------------------------------
+    # version — stok satırının sürüm sayacı (iyimser eşzamanlılık)
+    # Stok her yazıldığında +1 artar. STOCK_CONCURRENCY="optimistic"
+    # modunda stok kilitsiz okunur ve "version hâlâ aynıysa yaz"
+    # (compare-and-swap) ile güncellenir; bkz. catalog/inventory.py
+    # ------------------------------------------------------------
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    # ------------------------------------------------------------
+    # bucket_count — stok kovaları (StockBucket) sayısı; 0 = kovasız
+    # Çok satan üründe stok N satıra bölünür → satışlar tek satırın
+    # kilidinde sıraya girmez. Ayarlayan: stripe_stock komutu.
+    # Satılabilir toplam = stock (ana satır) + kovalar → available_stock
+    # ------------------------------------------------------------
+    bucket_count = models.PositiveSmallIntegerField(default=0, editable=False)
+
     class Meta:
         ordering = ["-created_at"]
 
+        # ------------------------------------------------------------
+        # INDEXLER — NEDEN?
+        # Vitrin sorgularının hepsi is_active ile filtreler, çoğu
+        # is_new veya category ekler ve (-created_at, -id) ile sıralar
+        # (keyset sayfalama). Index sırası = WHERE eşitlikleri + sıralama;
+        # böylece DB ne tam tablo tarar ne de ayrıca sıralama yapar.
+        #
+        # NEDEN KISMİ (partial) INDEX?
+        # Django boolean filtreyi "WHERE is_active" diye yazar (= 1 değil);
+        # SQLite bunu index'in ilk kolonu için eşitlik saymaz. Koşulu
+        # index'in WHERE'ine koyunca hem eşleşir hem de pasif ürünler
+        # index'e hiç girmez. Kısmi index'i desteklemeyen backend'de
+        # (MySQL) Django bu index'leri oluşturmaz.
+        # ------------------------------------------------------------
+        indexes = [
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_active=True),
+                name="product_live_idx",
+            ),
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(is_active=True, is_new=True),
+                name="product_live_new_idx",
+            ),
+            models.Index(
+                fields=["category", "created_at", "id"],
+                condition=models.Q(is_active=True),
+                name="product_cat_live_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Stoğa dokunan her save (admin, iptal) sürümü ilerletir → o an
+        # okuyup CAS ile yazmaya çalışan istek çakışmayı fark eder
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "stock" in update_fields:
+            self.version += 1
+            if update_fields is not None:
+                kwargs["update_fields"] = [*update_fields, "version"]
+        super().save(*args, **kwargs)
+
+    @cached_property
+    def available_stock(self):
+        # Satılabilir toplam. Kovasız üründe ek sorgu yok; listede
+        # inventory.with_levels() ile gelmişse kova toplamı hazır.
+        if not self.bucket_count:
+            return self.stock
+        if hasattr(self, "bucket_stock"):
+            return self.stock + (self.bucket_stock or 0)
+        return self.stock + (self.stock_buckets.aggregate(total=Sum("stock"))["total"] or 0)
+
     # Product model
-def get_absolute_url(self):
-    return reverse("catalog:product_detail", args=[self.slug])
+    def get_absolute_url(self):
+        return reverse("catalog:product_detail", args=[self.slug])
+
+
+# ============================================================
+# SEARCH TERM — ARAMA İNDEKSİ (ters indeks)
+# ============================================================
+# NEDEN?
+# - icontains her aramada tüm ürün tablosunu tarar.
+# - Burada her aktif ürünün kelimelerini (katlanmış halde) ayrı satır
+#   olarak tutuyoruz; arama term üzerindeki index ile yapılır.
+# - Kayıtlar catalog/search.py tarafından yazılır (signals + komut).
+class SearchTerm(models.Model):
+    product = models.ForeignKey(Product, related_name="search_terms", on_delete=models.CASCADE)
+    term = models.CharField(max_length=64, db_index=True)
+
+    # weight: isimde geçen kelime açıklamadakinden daha değerli
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        unique_together = [("product", "term")]
+
+    def __str__(self):
+        return f"{self.term} → {self.product_id}"
+
+
+# ============================================================
+# STOCK RESERVATION — SEPETTEKİ ÜRÜN İÇİN SÜRELİ STOK TUTMA
+# ============================================================
+# NEDEN?
+# - Eskiden stok sepette "yumuşak" kontrol edilir, asıl karar checkout'ta
+#   kilit altında verilirdi. Kampanyada herkes aynı anda kilide koşar,
+#   çoğu "stok yetersiz" ile döner.
+# - Artık sepete ekleme anında stok Product.stock'tan düşülür ve burada
+#   "tutulur". Checkout elindeki tutmayı siparişe çevirir; ürün satırı
+#   için yarışmaz.
+# - Süresi dolan tutmalar süpürücü (sweep_reservations) ile toplu olarak
+#   stoğa geri döner.
+#
+# Product.stock = satılabilir (kimsenin tutmadığı) stok.
+# cart_key: sepet anahtarı (cart/backends.py) — login'de değişmez.
+# Mantık: catalog/reservations.py
+class StockReservation(models.Model):
+    cart_key = models.CharField(max_length=32)
+    product = models.ForeignKey(Product, related_name="reservations", on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+
+    # Süpürücü "expires_at <= şimdi" ile arar → index
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["cart_key", "product"], name="reservation_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.cart_key}: {self.product_id} x {self.quantity}"
+
+
+# ============================================================
+# STOCK BUCKET — ÇOK SATAN ÜRÜN İÇİN BÖLÜNMÜŞ STOK
+# ============================================================
+# NEDEN?
+# - Kampanyada tek ürünün tüm satışları (checkout, iptal, rezervasyon)
+#   aynı Product satırını günceller; her yazım bir öncekinin kilidini
+#   bekler.
+# - Kovalı üründe stok N satıra dağıtılır; her satış yeterli stoğu olan
+#   rastgele bir kovadan düşer. Yazımlar N satıra yayılır.
+#
+# Toplam: Product.stock + Sum(kovalar) → Product.available_stock,
+# inventory.levels(). Admin'den girilen stok ana satıra eklenir.
+# Mantık: catalog/inventory.py
+class StockBucket(models.Model):
+    product = models.ForeignKey(Product, related_name="stock_buckets", on_delete=models.CASCADE)
+    slot = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "slot"], name="stock_bucket_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}#{self.slot}: {self.stock}"
+
+
+# ============================================================
+# INVENTORY MOVEMENT — STOK HAREKET DEFTERİ (sadece ekleme)
+# ============================================================
+# NEDEN?
+# - Product.stock yerinde değişiyordu (checkout, iptal, admin); stok
+#   neden bu değerde sorusunun cevabı yoktu.
+# - Her fiziksel stok hareketi buraya işaretli adet olarak eklenir:
+#     sale        -adet  (checkout, sipariş satırları ile aynı transaction)
+#     cancel      +adet  (cancel_order, admin toplu iptal)
+#     restock     +adet  (yeni ürün / admin'de stok artışı / import)
+#     adjustment  ±adet  (admin'de stok azaltma, import, mutabakat)
+# - Sepet rezervasyonları hareket DEĞİL: stok depodan çıkmadı.
+#
+# Eski hareketler compact_inventory_ledger ile ürün başına
+# InventorySnapshot'a katlanır → güncel seviye = snapshot + kalan hareketler.
+# Mantık: catalog/ledger.py
+class InventoryMovement(models.Model):
+    KIND_SALE = "sale"
+    KIND_CANCEL = "cancel"
+    KIND_RESTOCK = "restock"
+    KIND_ADJUSTMENT = "adjustment"
+    KIND_CHOICES = [
+        (KIND_SALE, "Satış"),
+        (KIND_CANCEL, "İptal"),
+        (KIND_RESTOCK, "Stok girişi"),
+        (KIND_ADJUSTMENT, "Düzeltme"),
+    ]
+
+    # db_constraint=False: silinmiş ürünün siparişi iptal edilince hareket
+    # yine yazılabilsin (sıkıştırma sahipsiz satırları atar)
+    product = models.ForeignKey(
+        Product, related_name="movements", on_delete=models.CASCADE, db_constraint=False,
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    quantity = models.IntegerField()  # işaretli: satış eksi, iptal artı
+
+    # Hangi sipariş? (orders uygulamasına bağımlılık olmasın diye sadece id)
+    order_id = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Ürün başına toplam (mutabakat) index'ten okunur
+            models.Index(fields=["product", "quantity"], name="movement_product_qty_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind} {self.quantity:+d}"
+
+
+# ============================================================
+# INVENTORY SNAPSHOT — katlanmış hareketler (ürün başına tek satır)
+# ============================================================
+# level: through_id'ye kadar (dahil) tüm hareketlerin toplamı.
+# Bu hareketler silinmiştir; kalanların hepsi through_id'den büyüktür.
+class InventorySnapshot(models.Model):
+    product = models.OneToOneField(Product, related_name="inventory_snapshot", on_delete=models.CASCADE)
+    level = models.IntegerField(default=0)
+    through_id = models.BigIntegerField(default=0)
+    taken_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_id}: {self.level} (#{self.through_id})"
+
@@ -0,0 +1,58 @@
+# ============================================================
+# catalog/navigation.py  —  GRİWEAR KATEGORİ MENÜSÜ (cache'li)
+# ============================================================
+# NEDEN?
+# - base.html'deki menü dört kategori slug'ını elle yazıyordu; gerçek
+#   kategori listesi için her sayfada bir sorgu gerekirdi.
+# - Menü (isim, link, aktif ürün sayısı) tek sorguyla kurulur ve cache'e
+#   yazılır; sayfalar onu cache'ten okur → sayfa başına 0 DB sorgusu.
+#
+# GEÇERSİZ KILMA (signals.py):
+# - Category kaydı / silinmesi
+# - Product görünürlüğü değişince: yeni ürün, silme, is_active veya
+#   kategori değişikliği (stok / fiyat kayıtları menüyü etkilemez)
+# Cache silinir, bir sonraki sayfa menüyü yeniden kurar.
+#
+# "version": her yeniden kurulumda değişir → detay sayfasının ETag'i
+# (conditional.py) menüdeki sayılar değişince de yenilenir.
+
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+NAV_CACHE_KEY = "catalog:nav:v1"
+NAV_TIMEOUT = 60 * 60 * 24
+
+
+def build_nav():
+    from .models import Category
+
+    rows = (
+        Category.objects
+        .annotate(product_count=Count("products", filter=Q(products__is_active=True)))
+        .order_by("name")
+        .values("name", "slug", "product_count")
+    )
+    categories = [
+        {
+            "name": row["name"],
+            "slug": row["slug"],
+            "count": row["product_count"],
+            "url": Category(slug=row["slug"]).get_absolute_url(),
+        }
+        for row in rows
+    ]
+    return {"version": time.time_ns(), "categories": categories}
+
+
+def get_nav():
+    nav = cache.get(NAV_CACHE_KEY)
+    if nav is None:
+        nav = build_nav()
+        cache.set(NAV_CACHE_KEY, nav, timeout=NAV_TIMEOUT)
+    return nav
+
+
+def invalidate():
+    cache.delete(NAV_CACHE_KEY)
@@ -0,0 +1,86 @@
+# ============================================================
+# catalog/pagination.py  —  GRİWEAR KEYSET (CURSOR) SAYFALAMA
+# ============================================================
+# NEDEN OFFSET DEĞİL?
+# - Paginator "LIMIT 24 OFFSET 2400" üretir; DB atlanan 2400 satırı
+#   yine de okur → sayfa derinleştikçe yavaşlar.
+# - Keyset: son görülen (created_at, id) çiftinden devam eder:
+#     WHERE created_at < c OR (created_at = c AND id < i)
+#   Her sayfa aynı maliyette (index üzerinden doğrudan atlama).
+#
+# Sıralama Product.Meta.ordering ile aynı: -created_at, eşitlikte -id.
+# "after" token'ı sadece bu ikiliyi taşır; bozuksa ilk sayfa gösterilir.
+# Elle değiştirilmiş token da öyle: saat dilimsiz tarih (naive datetime
+# karşılaştırması uyarı verir) veya pozitif olmayan id kabul edilmez.
+
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 96
+
+
+def get_page_size(request):
+    # settings.CATALOG_PAGE_SIZE varsayılan; ?size= ile sınırlı override
+    default = getattr(settings, "CATALOG_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+    try:
+        size = int(request.GET.get("size", default))
+    except ValueError:
+        size = default
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if timezone.is_naive(created_at) or pk < 1:
+        return None
+    return created_at, pk
+
+
+def keyset_page(queryset, after=None, page_size=DEFAULT_PAGE_SIZE):
+    # ------------------------------------------------------------
+    # queryset: filtrelenmiş ama sıralanmamış/sıralı fark etmez;
+    # sıralamayı burada sabitliyoruz ki token her zaman geçerli olsun.
+    # Dönüş: (bu sayfanın nesneleri, sonraki sayfa token'ı veya None)
+    # ------------------------------------------------------------
+    queryset = queryset.order_by("-created_at", "-pk")
+
+    cursor = decode_cursor(after)
+    if cursor is not None:
+        created_at, pk = cursor
+        # created_at__lte gereksiz görünür ama değil: OR koşulu tek başına
+        # index aralığına çevrilemez; bu sınır DB'ye "buradan başla" der.
+        queryset = queryset.filter(created_at__lte=created_at).filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+
+    # page_size + 1: bir fazlası varsa "sonraki sayfa" var demektir
+    items = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(items[page_size - 1]) if len(items) > page_size else None
+    return items[:page_size], next_cursor
+
+
+def page_query(request, cursor=None):
+    # Mevcut GET parametreleri (size, filtreler...) korunur, sadece after değişir.
+    # cursor=None → ilk sayfanın adresi.
+    params = request.GET.copy()
+    params.pop("after", None)
+    if cursor:
+        params["after"] = cursor
+    return "?" + params.urlencode()
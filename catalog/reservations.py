@@ -0,0 +1,215 @@
+# ============================================================
+# catalog/reservations.py  —  GRİWEAR STOK REZERVASYONLARI
+# ============================================================
+# Akış:
+# 1) Sepete ekle / adet değiştir → sync(): fark kadar stok tutulur
+#    (inventory.take, koşullu UPDATE) veya bırakılır (inventory.restore)
+# 2) Checkout → lock_holds() + convert(): tutma siparişe çevrilir;
+#    tutmanın karşıladığı kısım için ürün satırına hiç yazılmaz
+# 3) Süresi dolan tutmalar → sweep(): toplu silinir, stok tek UPDATE ile
+#    geri konur (sweep_reservations komutu, cron ile periyodik)
+#
+# Süre: settings.STOCK_RESERVATION_SECONDS (0 → rezervasyon kapalı,
+# eski davranış: stok sadece checkout'ta düşer)
+#
+# İyimser mod (inventory.optimistic()): tutmalar kilitlenmez. Okunan
+# tutmalar "aynen" silinerek sahiplenilir (_claim); silinen satır sayısı
+# tutmuyorsa → araya süpürücü / başka istek girmiş → StockConflict, çağıran
+# transaction'ı baştan dener (inventory.retrying).
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from . import inventory
+from .models import StockReservation
+
+DEFAULT_SECONDS = 15 * 60
+
+
+def ttl_seconds():
+    return getattr(settings, "STOCK_RESERVATION_SECONDS", DEFAULT_SECONDS) or 0
+
+
+def enabled():
+    return ttl_seconds() > 0
+
+
+def _expires_at():
+    return timezone.now() + timedelta(seconds=ttl_seconds())
+
+
+def held(cart_key):
+    # Süresi dolmuş ama henüz süpürülmemiş tutmalar da sayılır:
+    # stokları hâlâ Product.stock'tan düşülmüş durumda
+    if not cart_key:
+        return {}
+    return dict(
+        StockReservation.objects.filter(cart_key=cart_key).values_list("product_id", "quantity")
+    )
+
+
+def _sync(cart_key, targets):
+    # ------------------------------------------------------------
+    # Tutulan adet transaction İÇİNDE okunur (kötümser modda kilitli):
+    # aynı sepete eşzamanlı iki istek farkı ayrı ayrı hesaplayıp stoğu iki
+    # kez düşüp tek tutma yazamaz.
+    # Yazım "adet hâlâ okunduğu gibi ise" yapılır; tutmayan satır (iyimser
+    # mod) veya aynı anda eklenen yeni satır (unique) → StockConflict,
+    # retrying her şeyi (alınan stok dahil) geri alıp baştan dener.
+    # ------------------------------------------------------------
+    holds = StockReservation.objects.filter(cart_key=cart_key, product_id__in=list(targets))
+    if not inventory.optimistic():
+        holds = holds.select_for_update()
+    current = dict(holds.values_list("product_id", "quantity"))
+
+    granted, releases = {}, {}
+    for pid, target in targets.items():
+        have = current.get(pid, 0)
+        if target > have and not inventory.take(pid, target - have):
+            continue
+        if target < have:
+            releases[pid] = have - target
+        granted[pid] = target
+
+    inventory.restore(releases)
+
+    expires_at = _expires_at()
+    existing = {pid: qty for pid, qty in granted.items() if pid in current}
+    if existing:
+        match = Q()
+        for pid in existing:
+            match |= Q(product_id=pid, quantity=current[pid])
+        rows = StockReservation.objects.filter(match, cart_key=cart_key)
+        removed = [pid for pid, qty in existing.items() if qty <= 0]
+        kept = {pid: qty for pid, qty in existing.items() if qty > 0}
+        written = 0
+        if removed:
+            written += rows.filter(product_id__in=removed).delete()[0]
+        if kept:
+            written += rows.filter(product_id__in=list(kept)).update(
+                quantity=Case(
+                    *[When(product_id=pid, then=Value(qty)) for pid, qty in kept.items()],
+                    output_field=IntegerField(),
+                ),
+                expires_at=expires_at,
+            )
+        if written != len(existing):
+            raise inventory.StockConflict()
+
+    new = [
+        StockReservation(cart_key=cart_key, product_id=pid, quantity=qty, expires_at=expires_at)
+        for pid, qty in granted.items() if pid not in current and qty > 0
+    ]
+    if new:
+        try:
+            with transaction.atomic():
+                StockReservation.objects.bulk_create(new)
+        except IntegrityError:
+            raise inventory.StockConflict()
+    return granted
+
+
+def sync(cart_key, targets):
+    # ------------------------------------------------------------
+    # targets: {product_id: istenen toplam adet}
+    # Dönüş: {product_id: tutulan yeni adet} — sadece başarılı olanlar.
+    # Stok yetmeyen ürün dönüşte yer almaz (sepet satırı değişmemeli).
+    # ------------------------------------------------------------
+    return inventory.retrying(_sync, cart_key, targets)
+
+
+def touch(cart_key):
+    # Checkout sayfasına gelen kullanıcının tutmaları uzatılır
+    if cart_key:
+        StockReservation.objects.filter(cart_key=cart_key).update(expires_at=_expires_at())
+
+
+def lock_holds(cart_key):
+    # Checkout transaction'ı içinde: bu sepetin tutmaları kilitlenir →
+    # süpürücü aynı anda bunları geri koyamaz (iyimser modda kilit yok,
+    # bkz. _claim)
+    if not cart_key:
+        return {}
+    holds = StockReservation.objects.filter(cart_key=cart_key)
+    if not inventory.optimistic():
+        holds = holds.select_for_update()
+    return dict(holds.values_list("product_id", "quantity"))
+
+
+def _claim(cart_key, holds):
+    # Okunan tutmaları (ürün + adet birebir) sil. Sayı tutmazsa biri
+    # araya girmiştir (süpürüldü / adet değişti) → StockConflict
+    if not holds:
+        return
+    match = Q()
+    for pid, qty in holds.items():
+        match |= Q(product_id=pid, quantity=qty)
+    deleted, _ = StockReservation.objects.filter(match, cart_key=cart_key).delete()
+    if deleted != len(holds):
+        raise inventory.StockConflict()
+
+
+def convert(cart_key, quantities, holds):
+    # ------------------------------------------------------------
+    # Sipariş yazılırken çağrılır (aynı transaction):
+    # - tutmalar silinir (stok zaten düşülmüştü)
+    # - siparişten fazla tutulan kısım stoğa geri konur
+    # ------------------------------------------------------------
+    if not holds:
+        return
+    _claim(cart_key, holds)
+    excess = {pid: qty - quantities.get(pid, 0) for pid, qty in holds.items()}
+    inventory.restore(excess)
+
+
+def _release(cart_key):
+    holds = lock_holds(cart_key)
+    _claim(cart_key, holds)
+    inventory.restore(holds)
+
+
+def release(cart_key):
+    # Sepet boşaltıldı: tüm tutmalar stoğa döner
+    if cart_key:
+        inventory.retrying(_release, cart_key)
+
+
+def _sweep_batch(batch_size, now):
+    expired = StockReservation.objects.filter(expires_at__lte=now)
+    if not inventory.optimistic():
+        expired = expired.select_for_update(skip_locked=True)
+    ids = list(expired.order_by("expires_at").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return 0
+    # expires_at tekrar filtrelenir: okuma sonrası uzatılan (sepete
+    # dönülen) tutma silinmez; sayı tutmaz → parti yeniden denenir
+    batch = StockReservation.objects.filter(id__in=ids, expires_at__lte=now)
+    quantities = dict(
+        batch.values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+    )
+    deleted, _ = batch.delete()
+    if deleted != len(ids):
+        raise inventory.StockConflict()
+    inventory.restore(quantities)
+    return len(ids)
+
+
+def sweep(batch_size=1000, now=None):
+    # ------------------------------------------------------------
+    # Süresi dolan tutmaları parti parti geri al.
+    # Parti başına: 1 SELECT (kilitli, başkasının kilitlediğini atla)
+    #               1 DELETE + 1 UPDATE (ürün başına CASE)
+    # Dönüş: geri alınan tutma sayısı
+    # ------------------------------------------------------------
+    now = now or timezone.now()
+    swept = 0
+    while True:
+        count = inventory.retrying(_sweep_batch, batch_size, now)
+        swept += count
+        if count < batch_size:
+            break
+    return swept
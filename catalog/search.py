@@ -0,0 +1,178 @@
+# ============================================================
+# catalog/search.py  —  GRİWEAR ARAMA MOTORU
+# Amaç: icontains taraması yerine SearchTerm ters indeksinden arama
+# ============================================================
+#
+# Akış:
+# - Ürün kaydedilince / silinince signals.py burayı çağırır (artımlı).
+# - rebuild_search_index komutu indeksi sıfırdan kurar.
+# - search() tek bir indeks sorgusuyla hem sayfayı hem toplamı döner.
+
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Sum, Value, When, Window
+
+from . import inventory
+from .models import Product, SearchTerm
+
+# ============================================================
+# 1) KATLAMA (FOLD) — NEDEN TÜRKÇE'YE ÖZEL?
+# ============================================================
+# Python'un lower()'ı "I" → "i" ve "İ" → "i̇" (noktalı + birleşik işaret)
+# yapar; Türkçe'de doğrusu "I" → "ı", "İ" → "i".
+# Önce Türkçe büyük/küçük harf kuralı uygulanır, sonra aksanlar atılır:
+# "GÖMLEK", "gömlek" ve "gomlek" aynı terime düşer.
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_DOTLESS_I = str.maketrans({"ı": "i"})
+
+TOKEN_RE = re.compile(r"\w+")
+
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+
+def fold(text):
+    text = (text or "").translate(_TURKISH_LOWER).lower().translate(_DOTLESS_I)
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(fold(text))]
+
+
+def _weighted_terms(product):
+    # Aynı kelime hem isimde hem açıklamada geçerse ağırlıklar toplanır
+    terms = {}
+    for token in set(tokenize(product.name)):
+        terms[token] = terms.get(token, 0) + NAME_WEIGHT
+    for token in set(tokenize(product.description)):
+        terms[token] = terms.get(token, 0) + DESCRIPTION_WEIGHT
+    return terms
+
+
+# ============================================================
+# 2) İNDEKS YAZMA — ARTIMLI
+# ============================================================
+def index_products(products):
+    # ------------------------------------------------------------
+    # Verilen ürünlerin eski terimleri silinir, aktif olanlar yeniden yazılır.
+    # Pasif ürün indekste hiç durmaz → aramada is_active JOIN'i gerekmez.
+    # ------------------------------------------------------------
+    products = list(products)
+    if not products:
+        return
+
+    rows = [
+        SearchTerm(product_id=p.id, term=term, weight=weight)
+        for p in products
+        if p.is_active
+        for term, weight in _weighted_terms(p).items()
+    ]
+
+    with transaction.atomic():
+        SearchTerm.objects.filter(product_id__in=[p.id for p in products]).delete()
+        SearchTerm.objects.bulk_create(rows, batch_size=1000)
+
+
+def index_product(product):
+    index_products([product])
+
+
+def rebuild_index(chunk_size=500):
+    # ------------------------------------------------------------
+    # Tüm indeksi sıfırdan kurar (management komutu kullanır).
+    # iterator() → bellek katalog büyüklüğünden bağımsız kalır.
+    # ------------------------------------------------------------
+    SearchTerm.objects.all().delete()
+
+    batch = []
+    indexed = 0
+    products = Product.objects.filter(is_active=True).only("id", "name", "description", "is_active")
+    for product in products.iterator(chunk_size=chunk_size):
+        batch.append(product)
+        if len(batch) >= chunk_size:
+            index_products(batch)
+            indexed += len(batch)
+            batch = []
+
+    index_products(batch)
+    return indexed + len(batch)
+
+
+# ============================================================
+# 3) ARAMA — TEK İNDEKS SORGUSU
+# ============================================================
+# Her sorgu kelimesi önek (prefix) olarak aranır: "göm" → "gomlek".
+# Önek araması term index'i üzerinde aralık sorgusudur:
+#   term >= "gom" AND term < "gom" + "\uffff"
+# (LIKE 'gom%' SQLite'ta büyük/küçük harf yüzünden index kullanmaz.)
+#
+# Sonuç:
+# - Her kelime en az bir terimle eşleşmeli (AND)
+# - score = eşleşen terimlerin ağırlık toplamı → sıralama
+# - total = COUNT(*) OVER () → ayrı count() sorgusu yok
+def _prefix(token):
+    return Q(term__gte=token, term__lt=token + "\uffff")
+
+
+def _matches(q, product_filter=None):
+    # ------------------------------------------------------------
+    # Eşleşen ürünler (product_id başına bir satır) sorgusu.
+    # product_filter: SearchTerm'e göre yazılmış Q ("product__price__gte"...)
+    # → filtreler JOIN ile uygulanır, ürün tablosu taranmaz.
+    # ------------------------------------------------------------
+    tokens = list(dict.fromkeys(tokenize(q)))[:MAX_QUERY_TERMS]
+    if not tokens:
+        return None
+
+    any_token = Q()
+    matched = {}
+    for i, token in enumerate(tokens):
+        any_token |= _prefix(token)
+        matched[f"m{i}"] = Max(
+            Case(When(_prefix(token), then=Value(1)), default=Value(0), output_field=IntegerField())
+        )
+
+    terms = SearchTerm.objects.filter(any_token)
+    if product_filter:
+        terms = terms.filter(product_filter)
+    return (
+        terms
+        .values("product_id")
+        .annotate(**matched)
+        .filter(**{name: 1 for name in matched})
+    )
+
+
+def matching_product_ids(q):
+    # Facet sayıları için: Product.objects.filter(id__in=...) alt sorgusu
+    matches = _matches(q)
+    return matches.values("product_id") if matches is not None else SearchTerm.objects.none().values("product_id")
+
+
+def search(q, offset=0, limit=24, product_filter=None):
+    matches = _matches(q, product_filter)
+    if matches is None:
+        return [], 0
+
+    rows = list(
+        matches
+        .annotate(score=Sum("weight"), total=Window(expression=Count("product_id")))
+        .order_by("-score", "-product_id")
+        .values_list("product_id", "total")[offset:offset + limit]
+    )
+
+    if not rows:
+        # Sayfa boşsa toplamı bilemeyiz; ilk sayfada boş demek zaten 0 sonuç
+        return [], 0 if offset == 0 else matches.count()
+
+    # with_levels: arama kartı "stokta" gösterir; kova toplamı aynı sorguda
+    products = inventory.with_levels(Product.objects.select_related("category"))
+    products = products.in_bulk([pid for pid, _ in rows])
+    return [products[pid] for pid, _ in rows if pid in products], rows[0][1]
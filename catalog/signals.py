@@ -0,0 +1,204 @@
+# ============================================================
+# catalog/signals.py  —  GRİWEAR
+# Amaç: Ürün değişince türetilmiş verileri (arama indeksi, kart cache'i,
+#       görsel türevleri, öneri indeksi, kategori menüsü, stok defteri)
+#       güncel tutmak
+# ============================================================
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import Signal, receiver
+
+from . import autocomplete, cards, images, ledger, navigation, search
+from .models import Category, Product
+
+# ------------------------------------------------------------
+# TOPLU DEĞİŞİKLİK SİNYALİ — NEDEN?
+# bulk_create / bulk_update / queryset.update() post_save göndermez.
+# Toplu yazan kod (import_products vb.) işi bitince bunu gönderir:
+#   products_bulk_changed.send(sender=Product, product_ids=[...])
+# ve aşağıdaki türetilmiş veriler tek seferde güncellenir.
+# ------------------------------------------------------------
+products_bulk_changed = Signal()
+
+
+# ------------------------------------------------------------
+# ARAMA İNDEKSİ — NEDEN SIGNAL?
+# Ürün admin'den, shell'den veya koddan kaydedilebilir.
+# Her yolu tek tek bulmak yerine kaydın kendisine bağlanıyoruz.
+# update_fields=["stock"] gibi metin değiştirmeyen kayıtlar atlanır.
+# Silmede ek iş yok: SearchTerm → Product CASCADE ile birlikte silinir.
+# ------------------------------------------------------------
+SEARCH_FIELDS = {"name", "description", "is_active"}
+
+
+@receiver(post_save, sender=Product)
+def reindex_product(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    search.index_product(instance)
+
+
+# ------------------------------------------------------------
+# KART CACHE'İ — NEDEN HER KAYITTA?
+# Kart fiyat, isim, görsel ve (arama kartında) stok gösterir.
+# Checkout'taki stok düşümü de save() ile geldiği için buraya düşer.
+# NEDEN on_commit? Commit'ten önce silinirse, arada gelen istek eski
+# (henüz commit olmamış) satırı okuyup kartı tekrar cache'e yazar ve
+# kart bir sonraki kayda kadar eski kalır.
+# ------------------------------------------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cards(sender, instance, **kwargs):
+    transaction.on_commit(partial(cards.invalidate_products, [instance.id]))
+
+
+@receiver(post_save, sender=Category)
+def invalidate_all_cards(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(cards.invalidate_all)
+
+
+# ------------------------------------------------------------
+# GÖRSEL TÜREVLERİ — yeni/değişen görsel için arka plan işi
+# (iş commit sonrası süreç havuzuna gider; kayıt beklemez)
+# post_init: yüklenen görselin adı saklanır; değişmediyse iş verilmez.
+# ------------------------------------------------------------
+def _image_name(product):
+    value = product.__dict__.get("image")
+    return getattr(value, "name", value) or None
+
+
+@receiver(post_init, sender=Product)
+def remember_image(sender, instance, **kwargs):
+    instance._variant_source = _image_name(instance)
+
+
+@receiver(post_save, sender=Product)
+def schedule_image_variants(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    images.schedule(instance, previous_image=None if created else instance._variant_source)
+    instance._variant_source = _image_name(instance)
+
+
+# ------------------------------------------------------------
+# ARAMA ÖNERİLERİ — bellekteki önek indeksi (autocomplete.py)
+# Henüz yüklenmediyse dokunmaya gerek yok; ilk istekte zaten güncel yüklenir.
+# NEDEN on_commit? İndeks süreç belleğinde; transaction geri alınırsa
+# geri alınamaz. Değerler sinyal anında alınır (instance sonra değişebilir).
+# ------------------------------------------------------------
+def _refresh_suggestion(pk, name, url, is_active):
+    if is_active:
+        autocomplete.index.upsert(autocomplete.PRODUCT, pk, name, url)
+    else:
+        autocomplete.index.remove(autocomplete.PRODUCT, pk)
+
+
+def _defer_suggestions(products):
+    rows = [(p.pk, p.name, p.get_absolute_url(), p.is_active) for p in products]
+
+    def apply():
+        if autocomplete.index.loaded_at is None:
+            return
+        for row in rows:
+            _refresh_suggestion(*row)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_suggestion(sender, instance, raw=False, **kwargs):
+    if raw or autocomplete.index.loaded_at is None:
+        return
+    _defer_suggestions([instance])
+
+
+@receiver(post_save, sender=Category)
+def refresh_category_suggestion(sender, instance, raw=False, **kwargs):
+    if raw or autocomplete.index.loaded_at is None:
+        return
+    transaction.on_commit(partial(
+        autocomplete.index.upsert, autocomplete.CATEGORY, instance.pk, instance.name, instance.get_absolute_url(),
+    ))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_suggestion(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.index.remove, autocomplete.PRODUCT, instance.pk))
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_suggestion(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.index.remove, autocomplete.CATEGORY, instance.pk))
+
+
+# ------------------------------------------------------------
+# KATEGORİ MENÜSÜ — sadece görünürlük değişince (navigation.py)
+# post_init: yüklenen ürünün (is_active, category_id) ilk hali saklanır;
+# kayıtta farklıysa menüdeki sayılar değişmiştir. Stok/fiyat kaydı atlanır.
+# __dict__: ertelenmiş (only/defer) alan için ek sorgu açılmasın.
+# Silme commit sonrası: önce silinirse arada gelen istek eski menüyü
+# yeniden cache'e yazar.
+# ------------------------------------------------------------
+def _nav_state(product):
+    return product.__dict__.get("is_active"), product.__dict__.get("category_id")
+
+
+@receiver(post_init, sender=Product)
+def remember_nav_state(sender, instance, **kwargs):
+    instance._nav_state = _nav_state(instance)
+
+
+@receiver(post_save, sender=Product)
+def invalidate_nav_on_product(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance._nav_state != _nav_state(instance):
+        transaction.on_commit(navigation.invalidate)
+    instance._nav_state = _nav_state(instance)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_nav(sender, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(navigation.invalidate)
+
+
+# ------------------------------------------------------------
+# STOK DEFTERİ — admin / shell'den elle stok değişikliği (ledger.py)
+# Yeni ürünün stoğu "restock"; sonraki artış restock, azalış adjustment.
+# Checkout / iptal / import stoğu update() ile yazar ve hareketi kendisi
+# ekler; buraya düşmez.
+# ------------------------------------------------------------
+@receiver(post_init, sender=Product)
+def remember_stock(sender, instance, **kwargs):
+    instance._ledger_stock = instance.__dict__.get("stock")
+
+
+@receiver(post_save, sender=Product)
+def record_stock_change(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and "stock" not in update_fields):
+        return
+    before = 0 if created else instance._ledger_stock
+    if before is not None and instance.stock != before:
+        delta = instance.stock - before
+        kind = ledger.RESTOCK if delta > 0 else ledger.ADJUSTMENT
+        ledger.record(kind, {instance.pk: delta})
+    instance._ledger_stock = instance.stock
+
+
+@receiver(products_bulk_changed)
+def refresh_bulk_changed_products(sender, product_ids, **kwargs):
+    products = list(Product.objects.filter(id__in=product_ids).order_by())
+    search.index_products(products)
+    transaction.on_commit(partial(cards.invalidate_products, list(product_ids)))
+    transaction.on_commit(navigation.invalidate)
+    if autocomplete.index.loaded_at is not None:
+        _defer_suggestions(products)
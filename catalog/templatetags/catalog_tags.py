@@ -0,0 +1,65 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.template.backends.utils import csrf_input
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from catalog import cards, images
+
+register = template.Library()
+
+
+# ------------------------------------------------------------
+# {% product_cards products "grid" %}
+# Kartları tek tek {% for %} ile render etmek yerine cache'ten toplar.
+# Varyantlar: cards.CARD_TEMPLATES
+# ------------------------------------------------------------
+@register.simple_tag(takes_context=True)
+def product_cards(context, products, variant="grid"):
+    html = "".join(cards.render_cards(products, variant))
+    if cards.CSRF_PLACEHOLDER in html:
+        # Cache'teki kart ortak; token bu isteğe ait olmalı
+        request = context.get("request")
+        html = html.replace(cards.CSRF_PLACEHOLDER, csrf_input(request) if request else "")
+    return mark_safe(html)
+
+
+# ------------------------------------------------------------
+# {% product_image p "card-img-top gw-product-img" sizes="..." %}
+# Türevler hazırsa <picture>: WebP srcset + JPEG srcset + width/height.
+# Hazır değilse (arka plan işi sürüyor) orijinal görsele düşer.
+# ------------------------------------------------------------
+CARD_SIZES = "(min-width: 992px) 25vw, (min-width: 768px) 33vw, 50vw"
+
+
+@register.simple_tag
+def product_image(product, css_class="", sizes=CARD_SIZES, loading="lazy"):
+    if not product.image:
+        return ""
+
+    dimensions = ""
+    if product.image_width and product.image_height:
+        dimensions = format_html(' width="{}" height="{}"', product.image_width, product.image_height)
+
+    if not images.variants_ready(product):
+        return format_html(
+            '<img src="{}" class="{}" alt="{}"{} loading="{}" decoding="async">',
+            product.image.url, css_class, product.name, dimensions, loading,
+        )
+
+    def srcset(ext):
+        return ", ".join(
+            f"{default_storage.url(images.variant_name(product.image.name, w, ext))} {w}w"
+            for w, _ in product.image_variants["sizes"]
+        )
+
+    largest = product.image_variants["sizes"][-1][0]
+    return format_html(
+        '<picture class="d-block">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}"{} loading="{}" decoding="async">'
+        '</picture>',
+        srcset("webp"), sizes,
+        default_storage.url(images.variant_name(product.image.name, largest, "jpg")),
+        srcset("jpg"), sizes, css_class, product.name, dimensions, loading,
+    )
@@ -1,3 +1,1151 @@
-from django.test import TestCase
+import base64
+import json
+import re
+import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import autocomplete, cards, images, inventory, ledger, navigation, pagination, reservations, search, views
+from .facets import facet_counts, parse_filters
+from .models import (
+    Category, InventoryMovement, InventorySnapshot, Product, SearchTerm, StockBucket, StockReservation,
+)
+
+
+# ============================================================
+# QUERY PLAN REGRESYON TESTLERİ
+# ============================================================
+# NEDEN?
+# - Index eklemek yetmez; bir view'daki küçük değişiklik (yeni filtre,
+#   farklı order_by) sorguyu sessizce tam taramaya düşürebilir.
+# - Bu testler view'ları gerçekten çalıştırır, yakalanan her uygulama
+#   sorgusunu EXPLAIN QUERY PLAN ile inceler ve
+#     * "SCAN <tablo>" (index'siz tam tarama)
+#     * "USE TEMP B-TREE" (index dışı sıralama / gruplama)
+#   görürse başarısız olur.
+APP_TABLE_RE = re.compile(r'"(catalog|orders|cart)_\w+"')
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)$")
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN çıktısı SQLite'a özel")
+class QueryPlanMixin:
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def app_queries(self, captured):
+        return [
+            q["sql"] for q in captured
+            if q["sql"].lstrip().upper().startswith("SELECT") and APP_TABLE_RE.search(q["sql"])
+        ]
+
+    def assertIndexedPlan(self, sql, allow_sort=False):
+        plan = self.explain(sql)
+        for line in plan:
+            self.assertIsNone(
+                FULL_SCAN_RE.match(line),
+                f"Tam tablo taraması: {line}\nSQL: {sql}\nPlan: {plan}",
+            )
+            if not allow_sort:
+                self.assertNotIn(
+                    "USE TEMP B-TREE", line,
+                    f"Index dışı sıralama: {line}\nSQL: {sql}\nPlan: {plan}",
+                )
+
+    def assertViewPlansIndexed(self, url, allow_sort=False, expected_status=200):
+        # Kategori menüsü cache'ten gelir (tüm kategorileri listelediği için
+        # kurulumu zaten tarama); ölçülen istekte cache'in dolu olduğu varsayılır
+        navigation.invalidate()
+        navigation.get_nav()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, expected_status)
+
+        queries = self.app_queries(ctx.captured_queries)
+        self.assertTrue(queries, f"{url} hiç uygulama sorgusu çalıştırmadı")
+        for sql in queries:
+            self.assertIndexedPlan(sql, allow_sort=allow_sort)
+        return response
+
+
+class CatalogQueryPlanTests(QueryPlanMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Üst Giyim", slug="ust-giyim")
+        other = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        for i in range(30):
+            Product.objects.create(
+                category=cls.category if i % 2 else other,
+                name=f"Pamuklu Gömlek {i}",
+                slug=f"gomlek-{i}",
+                price=100 + i,
+                stock=i % 4,
+                is_new=i % 3 == 0,
+                is_active=i % 5 != 0,
+                description="Yumuşak dokulu pamuklu gömlek",
+            )
+        cls.product = Product.objects.filter(is_active=True).first()
+
+    def test_product_list(self):
+        self.assertViewPlansIndexed(reverse("catalog:product_list"))
+
+    def test_new_arrivals(self):
+        self.assertViewPlansIndexed(reverse("catalog:new_arrivals"))
+
+    def test_category(self):
+        self.assertViewPlansIndexed(reverse("catalog:category_products", args=[self.category.slug]))
+
+    def test_category_with_filters(self):
+        url = reverse("catalog:category_products", args=[self.category.slug])
+        self.assertViewPlansIndexed(url + "?in_stock=1&new=1&price_min=100&price_max=120")
+
+    def test_product_detail(self):
+        self.assertViewPlansIndexed(reverse("catalog:product_detail", args=[self.product.slug]))
+
+    def test_search(self):
+        # Sonuçlar skora göre sıralanır; skor hesaplanan bir değer olduğu için
+        # eşleşen küme üzerinde sıralama kaçınılmaz. Tarama yine yasak.
+        response = self.assertViewPlansIndexed(reverse("catalog:search") + "?q=gömlek", allow_sort=True)
+        self.assertGreater(response.context["count"], 0)
+
+    def test_search_with_filters(self):
+        url = reverse("catalog:search") + "?q=gömlek&in_stock=1&price_min=100&category=" + self.category.slug
+        self.assertViewPlansIndexed(url, allow_sort=True)
+
+    def test_next_page_seeks_instead_of_scanning(self):
+        # İkinci sayfa (after=...) index üzerinde aralık araması (SEARCH) yapmalı;
+        # ilk sayfadan itibaren taramak sayfa derinleştikçe yavaşlardı.
+        first = self.client.get(reverse("catalog:product_list") + "?size=5")
+        next_page = first.context["next_page"]
+        self.assertTrue(next_page)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("catalog:product_list") + next_page)
+        product_sql = [sql for sql in self.app_queries(ctx.captured_queries) if "created_at" in sql]
+        self.assertTrue(product_sql)
+        for sql in product_sql:
+            self.assertIndexedPlan(sql)
+            self.assertTrue(
+                any(line.startswith("SEARCH") and "created_at<" in line for line in self.explain(sql)),
+                self.explain(sql),
+            )
+
+
+# ============================================================
+# CONDITIONAL GET (ETag / Last-Modified) TESTLERİ
+# ============================================================
+class ConditionalGetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Üst Giyim", slug="ust-giyim")
+        cls.product = Product.objects.create(
+            category=cls.category, name="Keten Gömlek", slug="keten-gomlek", price=250, stock=3,
+        )
+
+    def assertRevalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header("ETag"))
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        with self.assertNumQueries(2):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        return first
+
+    def test_product_list_not_modified(self):
+        response = self.assertRevalidates(reverse("catalog:product_list"))
+        self.assertIn("public", response["Cache-Control"])
+
+    def test_category_not_modified(self):
+        self.assertRevalidates(reverse("catalog:category_products", args=[self.category.slug]))
+
+    def test_product_detail_not_modified(self):
+        url = reverse("catalog:product_detail", args=[self.product.slug])
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+
+    def test_csrf_form_page_is_never_public(self):
+        # Anonim + boş sepet de olsa: detay sayfası sepete ekle formunu
+        # (CSRF token + csrftoken cookie) içerir
+        url = reverse("catalog:product_detail", args=[self.product.slug])
+        first = self.client.get(url)
+        self.assertContains(first, "csrfmiddlewaretoken")
+        self.assertIn("private", first["Cache-Control"])
+        self.assertNotIn("public", first["Cache-Control"])
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 304)
+        self.assertIn("private", second["Cache-Control"])
+
+    def test_product_change_invalidates_etag(self):
+        url = reverse("catalog:product_list")
+        etag = self.client.get(url)["ETag"]
+
+        self.product.stock = 2
+        self.product.save(update_fields=["stock", "updated_at"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cart_makes_response_private(self):
+        url = reverse("catalog:product_list")
+        etag = self.client.get(url)["ETag"]
+
+        session = self.client.session
+        session["cart"] = {str(self.product.id): {"qty": 1}}
+        session.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+
+# ============================================================
+# KATEGORİ MENÜSÜ (navigation.py) TESTLERİ
+# ============================================================
+class CategoryNavTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Dış Giyim", slug="dis-giyim")
+        Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.product = Product.objects.create(
+            category=cls.category, name="Mont", slug="mont", price=900, stock=2,
+        )
+
+    def setUp(self):
+        navigation.invalidate()
+
+    def counts(self):
+        return {c["slug"]: c["count"] for c in navigation.get_nav()["categories"]}
+
+    def test_counts_active_products(self):
+        self.assertEqual(self.counts(), {"aksesuar": 0, "dis-giyim": 1})
+        with self.assertNumQueries(0):
+            navigation.get_nav()
+
+    def test_stock_change_keeps_cache(self):
+        version = navigation.get_nav()["version"]
+        self.product.stock = 1
+        self.product.save(update_fields=["stock", "updated_at"])
+        self.assertEqual(navigation.get_nav()["version"], version)
+
+    def test_visibility_change_rebuilds(self):
+        self.counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.is_active = False
+            self.product.save()
+            # Commit olmadan menü cache'i silinmez
+            self.assertEqual(self.counts()["dis-giyim"], 1)
+        self.assertEqual(self.counts()["dis-giyim"], 0)
+
+    def test_rolled_back_change_keeps_cache(self):
+        version = navigation.get_nav()["version"]
+        with self.captureOnCommitCallbacks() as callbacks:
+            Category.objects.create(name="Ayakkabı", slug="ayakkabi")
+        self.assertTrue(callbacks)
+        self.assertEqual(navigation.get_nav()["version"], version)
+
+    def test_page_renders_nav_from_cache(self):
+        navigation.get_nav()
+        response = self.client.get(reverse("catalog:product_list"))
+        self.assertContains(response, f'href="{self.category.get_absolute_url()}"')
+
+
+# ============================================================
+# STOK REZERVASYONU (reservations.py) TESTLERİ
+# ============================================================
+class StockReservationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Ayakkabı", slug="ayakkabi")
+        cls.product = Product.objects.create(
+            category=category, name="Sneaker", slug="sneaker", price=1200, stock=2,
+        )
+
+    def add(self, client, times=1):
+        for _ in range(times):
+            client.post(reverse("cart:add", args=[self.product.id]))
+
+    def stock(self):
+        return Product.objects.values_list("stock", flat=True).get(pk=self.product.pk)
+
+    def test_add_to_cart_holds_stock(self):
+        self.add(self.client, 2)
+        self.assertEqual(self.stock(), 0)
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+        # İkinci alıcı: stok tutulmuş, sepete giremez
+        other = Client()
+        response = other.post(reverse("cart:add", args=[self.product.id]), follow=True)
+        self.assertEqual(response.context["cart_count"], 0)
+
+    def test_remove_releases_hold(self):
+        self.add(self.client, 2)
+        self.client.post(reverse("cart:remove", args=[self.product.id]))
+        self.assertEqual(self.stock(), 2)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_sweep_restores_expired_holds(self):
+        self.add(self.client, 1)
+        self.add(Client(), 1)
+        self.assertEqual(reservations.sweep(), 0)
+
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(reservations.sweep(batch_size=1), 2)
+        self.assertEqual(self.stock(), 2)
+        self.assertFalse(StockReservation.objects.exists())
+
+
+    def test_sync_takes_delta_from_stored_holds(self):
+        # Aynı sepete iki istek aynı hedefle gelse de stok bir kez düşer
+        reservations.sync("sepet-1", {self.product.pk: 2})
+        reservations.sync("sepet-1", {self.product.pk: 2})
+        self.assertEqual(self.stock(), 0)
+        self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+        reservations.sync("sepet-1", {self.product.pk: 1})
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(StockReservation.objects.get().quantity, 1)
+
+    def test_sync_conflicts_when_hold_changed_underneath(self):
+        reservations.sync("sepet-1", {self.product.pk: 1})
+
+        # Okuma ile yazma arasında başka istek tutmayı değiştirdi (iyimser
+        # modda kilit yok) → yazım eşleşmez, stok düşümü de geri alınır
+        def take_while_other_request_writes(pid, qty):
+            StockReservation.objects.update(quantity=2)
+            return True
+
+        with self.settings(STOCK_CAS_ATTEMPTS=1), mock.patch.object(
+            inventory, "take", side_effect=take_while_other_request_writes,
+        ), self.assertRaises(inventory.StockConflict):
+            reservations.sync("sepet-1", {self.product.pk: 2})
+        self.assertEqual(StockReservation.objects.get().quantity, 1)
+
+    def test_admin_shows_held_quantity(self):
+        self.add(self.client, 2)
+        admin = get_user_model().objects.create_superuser("yonetici", password="x")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:catalog_product_change", args=[self.product.pk]))
+        self.assertContains(response, "Sepetlerde tutulan")
+        self.assertEqual(response.context["adminform"].form.instance.stock, 0)
+
+
+@override_settings(STOCK_CONCURRENCY="optimistic", STOCK_CAS_BACKOFF=0)
+class OptimisticStockTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Ayakkabı", slug="ayakkabi")
+        cls.product = Product.objects.create(
+            category=category, name="Sneaker", slug="sneaker", price=1200, stock=3,
+        )
+
+    def row(self):
+        return Product.objects.values_list("stock", "version").get(pk=self.product.pk)
+
+    def test_decrement_bumps_version(self):
+        _, version = self.row()
+        inventory.decrement({self.product.pk: 2})
+        self.assertEqual(self.row(), (1, version + 1))
+        with self.assertRaises(inventory.OutOfStock):
+            inventory.decrement({self.product.pk: 2})
+
+    def test_stale_version_does_not_write(self):
+        # İki alıcı aynı anda okudu; ikincisi yazınca ilkinin CAS'ı eşleşmez
+        first = inventory._read({self.product.pk: 1}, active_only=True)
+        self.assertTrue(inventory.take(self.product.pk, 1))
+        self.assertFalse(inventory._compare_and_swap({self.product.pk: 1}, first))
+        self.assertEqual(self.row()[0], 2)
+
+    def test_retrying_gives_up_after_attempts(self):
+        calls = []
+
+        def always_conflicts():
+            calls.append(1)
+            raise inventory.StockConflict()
+
+        with self.settings(STOCK_CAS_ATTEMPTS=3), self.assertRaises(inventory.StockConflict):
+            inventory.retrying(always_conflicts)
+        self.assertEqual(len(calls), 3)
+
+    def test_admin_save_bumps_version(self):
+        product = Product.objects.get(pk=self.product.pk)
+        version = product.version
+        product.stock = 10
+        product.save(update_fields=["stock", "updated_at"])
+        self.assertEqual(self.row(), (10, version + 1))
+
+
+class StockBucketTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Ayakkabı", slug="ayakkabi")
+        cls.product = Product.objects.create(
+            category=category, name="Sneaker", slug="sneaker", price=1200, stock=10,
+        )
+
+    def setUp(self):
+        inventory.stripe(self.product.pk, 3)
+
+    def total(self):
+        return inventory.levels([self.product.pk])[self.product.pk]
+
+    def test_stripe_keeps_total(self):
+        self.assertEqual(sorted(StockBucket.objects.values_list("stock", flat=True)), [3, 3, 4])
+        product = Product.objects.get(pk=self.product.pk)
+        self.assertEqual((product.stock, product.available_stock), (0, 10))
+
+        inventory.stripe(self.product.pk, 0)
+        self.assertFalse(StockBucket.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 10)
+
+    def test_sale_writes_one_bucket_not_product_row(self):
+        for mode in ("pessimistic", "optimistic"):
+            with self.subTest(mode=mode), self.settings(STOCK_CONCURRENCY=mode):
+                before = Product.objects.values_list("version", flat=True).get(pk=self.product.pk)
+                total = self.total()
+                with CaptureQueriesContext(connection) as ctx:
+                    inventory.decrement({self.product.pk: 2})
+                # Ürün satırına yazılmaz (kovasız yolun UPDATE'i 0 satır eşler)
+                writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "catalog_stockbucket"')]
+                self.assertEqual(len(writes), 1, writes)
+                self.assertEqual(self.total(), total - 2)
+                self.assertEqual(Product.objects.values_list("version", flat=True).get(pk=self.product.pk), before)
+
+    def test_large_sale_spans_buckets(self):
+        inventory.decrement({self.product.pk: 9})
+        self.assertEqual(self.total(), 1)
+        with self.assertRaises(inventory.OutOfStock):
+            inventory.decrement({self.product.pk: 2})
+
+        inventory.restore({self.product.pk: 4})
+        self.assertEqual(self.total(), 5)
+        self.assertEqual(Product.objects.get(pk=self.product.pk).stock, 0)
+
+    def test_sell_out_and_restock_change_list_etag(self):
+        url = reverse("catalog:category_products", args=["ayakkabi"])
+        etag = self.client.get(url)["ETag"]
+
+        # Kovalardan satış, ürün hâlâ stokta: ürün satırına yazılmaz
+        inventory.decrement({self.product.pk: 9})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Son adet: "stokta" facet'i değişir → sayfa da değişmeli
+        inventory.decrement({self.product.pk: 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["facets"]["in_stock"]["count"], 0)
+
+        etag = response["ETag"]
+        inventory.restore({self.product.pk: 2})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_search_reads_bucket_totals_in_listing_query(self):
+        for i in range(3):
+            other = Product.objects.create(
+                category=self.product.category, name=f"Sneaker {i}", slug=f"sneaker-{i}", price=900, stock=4,
+            )
+            inventory.stripe(other.pk, 2)
+        inventory.decrement({other.pk: 4})
+
+        with self.assertNumQueries(2):
+            products, total = search.search("sneaker")
+            stock = {p.pk: p.available_stock for p in products}
+        self.assertEqual(total, 4)
+        self.assertEqual((stock[self.product.pk], stock[other.pk]), (10, 0))
+
+    def test_striped_product_counts_as_in_stock(self):
+        response = self.client.get(reverse("catalog:category_products", args=["ayakkabi"]) + "?in_stock=1")
+        self.assertEqual(response.context["facets"]["in_stock"]["count"], 1)
+        self.assertContains(response, "Sneaker")
+
+
+class InventoryLedgerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Ayakkabı", slug="ayakkabi")
+        cls.product = Product.objects.create(
+            category=category, name="Sneaker", slug="sneaker", price=1200, stock=5,
+        )
+
+    def test_admin_edits_are_recorded(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock = 8
+        product.save()
+        product.stock = 6
+        product.save(update_fields=["stock", "updated_at"])
+
+        kinds = list(InventoryMovement.objects.order_by("id").values_list("kind", "quantity"))
+        self.assertEqual(kinds, [("restock", 5), ("restock", 3), ("adjustment", -2)])
+        self.assertEqual(ledger.levels([self.product.pk]), {self.product.pk: 6})
+
+    def test_compaction_keeps_level(self):
+        ledger.record(ledger.SALE, {self.product.pk: 2}, order_id=1)
+        self.assertEqual(ledger.compact(timezone.now() + timedelta(seconds=1), batch_size=1), 2)
+
+        self.assertFalse(InventoryMovement.objects.exists())
+        self.assertEqual(InventorySnapshot.objects.get().level, 3)
+        ledger.record(ledger.CANCEL, {self.product.pk: 2}, order_id=1)
+        self.assertEqual(ledger.levels([self.product.pk]), {self.product.pk: 5})
+
+    def test_reconcile_reports_untracked_change(self):
+        Product.objects.filter(pk=self.product.pk).update(stock=4)
+        self.assertEqual(ledger.reconcile([self.product.pk]), {self.product.pk: (5, 4)})
+
+
+# ============================================================
+# İÇE / DIŞA AKTARMA (import_products, export_products)
+# ============================================================
+class ImportProductsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Ayakkabı", slug="ayakkabi")
+        Product.objects.create(category=cls.category, name="Sneaker", slug="sneaker", price=1200, stock=5)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def run_import(self, name, content, *args):
+        path = self.dir / name
+        path.write_text(content, encoding="utf-8")
+        out, err = StringIO(), StringIO()
+        call_command("import_products", str(path), *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def jsonl(self, *rows):
+        return "\n".join(json.dumps(row) for row in rows) + "\n"
+
+    def test_creates_and_updates_by_slug(self):
+        out, _ = self.run_import("urunler.csv", (
+            "slug,name,category,price,stock\n"
+            "sneaker,Sneaker Pro,ayakkabi,1300.5,7\n"
+            ",Çizme,ayakkabi,900,3\n"
+        ))
+
+        self.assertIn("1 yeni, 1 güncel, 0 hatalı", out)
+        sneaker = Product.objects.get(slug="sneaker")
+        self.assertEqual((sneaker.name, sneaker.price, sneaker.stock), ("Sneaker Pro", Decimal("1300.50"), 7))
+        self.assertEqual(Product.objects.get(slug="cizme").stock, 3)
+
+    def test_stock_delta_is_read_from_locked_rows(self):
+        with mock.patch.object(Product.objects, "select_for_update", wraps=Product.objects.select_for_update) as lock:
+            self.run_import("urunler.csv", "slug,name,category,price,stock\nsneaker,Sneaker,ayakkabi,1200,8\n")
+        lock.assert_called_once_with()
+
+        movements = InventoryMovement.objects.filter(product__slug="sneaker").values_list("kind", "quantity")
+        self.assertIn((InventoryMovement.KIND_RESTOCK, 3), list(movements))
+
+    def test_non_object_and_non_string_jsonl_rows_are_skipped(self):
+        base = {"category": "ayakkabi", "price": "10", "stock": 1}
+        content = "[1, 2]\n\"metin\"\n" + self.jsonl(
+            {**base, "slug": "sayi", "name": 123},
+            {**base, "slug": "liste", "name": "Liste", "category": ["ayakkabi"]},
+            {**base, "slug": "bot", "name": "Bot", "description": 5},
+        )
+        out, err = self.run_import("urunler.jsonl", content)
+
+        self.assertIn("5 satır: 2 yeni, 0 güncel, 3 hatalı", out)
+        self.assertIn("Satır 1: satır bir JSON nesnesi olmalı: list", err)
+        self.assertIn("Satır 2: satır bir JSON nesnesi olmalı: str", err)
+        self.assertIn("Satır 4: bilinmeyen kategori", err)
+        self.assertEqual(Product.objects.get(slug="sayi").name, "123")
+        self.assertEqual(Product.objects.get(slug="bot").description, "5")
+
+    def test_striped_product_stock_is_redistributed(self):
+        sneaker = Product.objects.get(slug="sneaker")
+        inventory.stripe(sneaker.pk, 2)
+        inventory.decrement({sneaker.pk: 1})  # 4 satılabilir, hepsi kovalarda
+        last = InventoryMovement.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+        self.run_import("urunler.csv", "slug,name,category,price,stock\nsneaker,Sneaker,ayakkabi,1200,9\n")
+
+        sneaker.refresh_from_db()
+        self.assertEqual((sneaker.stock, sneaker.bucket_count), (0, 2))
+        self.assertEqual(inventory.levels([sneaker.pk])[sneaker.pk], 9)
+        self.assertEqual(sorted(StockBucket.objects.filter(product=sneaker).values_list("stock", flat=True)), [4, 5])
+        # Defter farkı ana satıra göre (0 → 9) değil, toplama göre (4 → 9)
+        movements = InventoryMovement.objects.filter(product=sneaker, id__gt=last)
+        self.assertEqual(list(movements.values_list("kind", "quantity")), [(InventoryMovement.KIND_RESTOCK, 5)])
+
+    def test_dry_run_counts_repeated_slugs_once(self):
+        row = {"slug": "bot", "name": "Bot", "category": "ayakkabi", "price": "10", "stock": 1}
+        out, _ = self.run_import("urunler.jsonl", self.jsonl(row, row, row), "--dry-run", "--batch-size", "1")
+
+        self.assertIn("1 yeni, 2 güncel", out)
+        self.assertFalse(Product.objects.filter(slug="bot").exists())
+
+    def test_bad_rows_are_rejected_with_message(self):
+        base = {"name": "Bot", "category": "ayakkabi", "price": "10", "stock": 1}
+        out, err = self.run_import("urunler.jsonl", self.jsonl(
+            {**base, "slug": "nan", "price": "NaN"},
+            {**base, "slug": "sonsuz", "price": "Infinity"},
+            {**base, "slug": "buyuk", "price": "100000000"},
+            {**base, "slug": "kesirli", "stock": 3.7},
+            {**base, "slug": "kategori", "category": "yok"},
+            {**base, "slug": "yuvarlak", "price": "10.005", "stock": 2.0},
+        ))
+
+        self.assertIn("1 yeni, 0 güncel, 5 hatalı", out)
+        for line in (1, 2, 3, 4, 5):
+            self.assertIn(f"Satır {line}:", err)
+        self.assertEqual(Product.objects.get(slug="yuvarlak").price, Decimal("10.01"))
+
+    def test_export_import_round_trip(self):
+        Product.objects.create(
+            category=self.category, name="Çizme, \"kışlık\"", slug="cizme", price="899.90", stock=0,
+            is_new=True, is_active=False, description="Satır 1\nSatır 2",
+        )
+        fields = ["slug", "name", "category_id", "price", "stock", "is_new", "is_active", "description"]
+        before = list(Product.objects.order_by("slug").values_list(*fields))
+
+        for fmt in ("csv", "jsonl"):
+            path = self.dir / f"urunler.{fmt}"
+            call_command("export_products", str(path), stdout=StringIO(), stderr=StringIO())
+            Product.objects.update(name="x", price=1, stock=99, description="")
+            call_command("import_products", str(path), stdout=StringIO(), stderr=StringIO())
+            self.assertEqual(list(Product.objects.order_by("slug").values_list(*fields)), before)
+
+
+# ============================================================
+# ARAMA İNDEKSİ (catalog/search.py)
+# ============================================================
+class SearchIndexTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Giyim", slug="giyim")
+        cls.silk = Product.objects.create(
+            category=category, name="İPEK GÖMLEK", slug="ipek-gomlek", price=500, stock=1, description="Yazlık",
+        )
+        cls.linen = Product.objects.create(
+            category=category, name="Keten Gömlek", slug="keten-gomlek", price=400, stock=1,
+            description="İpek dokulu keten",
+        )
+        cls.hat = Product.objects.create(category=category, name="Işıklı Şapka", slug="isikli-sapka", price=90, stock=1)
+
+    def names(self, q, **kwargs):
+        products, _ = search.search(q, **kwargs)
+        return [p.name for p in products]
+
+    def test_fold_applies_turkish_case_rules(self):
+        self.assertEqual(search.fold("İPEK IŞIK Şapka ÇİĞ"), "ipek isik sapka cig")
+        self.assertEqual(search.tokenize("Işıklı, Şapka!"), ["isikli", "sapka"])
+
+    def test_prefix_match_ignores_case_and_accents(self):
+        self.assertEqual(sorted(self.names("GÖM")), ["Keten Gömlek", "İPEK GÖMLEK"])
+        self.assertEqual(self.names("işık"), ["Işıklı Şapka"])
+        self.assertEqual(self.names("sapka"), ["Işıklı Şapka"])
+        self.assertEqual(self.names("pantolon"), [])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.names("keten ipek"), ["Keten Gömlek"])
+
+    def test_name_matches_rank_above_description(self):
+        # İsimde geçen (ağırlık 3) açıklamada geçenden (1) önce
+        self.assertEqual(self.names("ipek"), ["İPEK GÖMLEK", "Keten Gömlek"])
+        # Eşit skor: yeni ürün önce
+        self.assertEqual(self.names("gömlek"), ["Keten Gömlek", "İPEK GÖMLEK"])
+
+    def test_total_comes_with_page(self):
+        with self.assertNumQueries(2):
+            products, total = search.search("gömlek", limit=1)
+        self.assertEqual((len(products), total), (1, 2))
+
+        products, total = search.search("gömlek", offset=1, limit=1)
+        self.assertEqual(([p.name for p in products], total), (["İPEK GÖMLEK"], 2))
+        self.assertEqual(search.search("gömlek", offset=5, limit=1), ([], 2))
+
+    def test_huge_page_number_is_capped(self):
+        response = self.client.get(reverse("catalog:search"), {"q": "gömlek", "page": "99999999999999999999"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["products"]), [])
+        self.assertEqual(response.context["count"], 2)
+        self.assertIn(f"page={views.MAX_SEARCH_PAGE - 1}", response.context["previous_page"])
+
+    def test_signals_keep_index_current(self):
+        product = Product.objects.get(pk=self.hat.pk)
+        product.name = "Hasır Şapka"
+        product.save()
+        self.assertEqual(self.names("hasir"), ["Hasır Şapka"])
+        self.assertEqual(self.names("isikli"), [])
+
+        product.is_active = False
+        product.save(update_fields=["is_active"])
+        self.assertEqual(self.names("hasir"), [])
+
+        # Metin dışı alan kaydı indekse dokunmaz
+        with CaptureQueriesContext(connection) as ctx:
+            Product.objects.get(pk=self.silk.pk).save(update_fields=["price"])
+        self.assertFalse([q for q in ctx.captured_queries if "catalog_searchterm" in q["sql"]])
+
+    def test_rebuild_command_restores_index(self):
+        SearchTerm.objects.all().delete()
+        self.assertEqual(self.names("ipek"), [])
+
+        call_command("rebuild_search_index", "--chunk-size", "2", stdout=StringIO())
+        self.assertEqual(self.names("ipek"), ["İPEK GÖMLEK", "Keten Gömlek"])
+
+
+
+# ============================================================
+# GÖRSEL TÜREVLERİ (catalog/images.py + {% product_image %})
+# ============================================================
+def _upload(name, size=(800, 600), fmt="JPEG"):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", size, (120, 40, 40)).save(buffer, format=fmt)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ProductImageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Giyim", slug="giyim")
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.settings_override = override_settings(MEDIA_ROOT=media.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def create(self, slug, upload):
+        return Product.objects.create(category=self.category, name=slug, slug=slug, price=100, stock=1, image=upload)
+
+    def render(self, product):
+        return Template("{% load catalog_tags %}{% product_image p 'gw-product-img' %}").render(Context({"p": product}))
+
+    def test_variant_names_do_not_collide(self):
+        names = {
+            images.variant_name(source, 320, "webp")
+            for source in ("products/shirt.jpg", "products/shirt.png", "products/2024/shirt.jpg")
+        }
+        self.assertEqual(len(names), 3)
+        self.assertEqual(
+            images.variant_name("products/shirt.jpg", 320, "webp"), images.variant_name("products/shirt.jpg", 320, "webp"),
+        )
+
+    def test_build_creates_variants_and_tag_renders_picture(self):
+        product = self.create("gomlek", _upload("shirt.jpg"))
+        images.build_for_product(product)
+
+        product.refresh_from_db()
+        self.assertTrue(images.variants_ready(product))
+        self.assertEqual((product.image_width, product.image_height), (800, 600))
+        # 960 > 800: büyütme yok, en geniş türev orijinal genişlikte
+        self.assertEqual(product.image_variants["sizes"], [[320, 240], [640, 480], [800, 600]])
+        for width, _ in product.image_variants["sizes"]:
+            for ext in ("jpg", "webp"):
+                self.assertTrue(default_storage.exists(images.variant_name(product.image.name, width, ext)))
+
+        html = self.render(product)
+        self.assertIn("<picture", html)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(images.variant_name(product.image.name, 320, "webp"), html)
+        self.assertIn('width="800" height="600"', html)
+
+    def test_same_stem_keeps_own_variants(self):
+        jpg = self.create("gomlek-jpg", _upload("shirt.jpg", size=(400, 300)))
+        png = self.create("gomlek-png", _upload("shirt.png", size=(500, 300), fmt="PNG"))
+        images.build_for_product(jpg)
+        images.build_for_product(png)
+
+        jpg.refresh_from_db()
+        from PIL import Image
+
+        with default_storage.open(images.variant_name(jpg.image.name, 320, "jpg")) as f:
+            self.assertEqual(Image.open(f).size, (320, 240))
+
+    def test_tag_falls_back_to_original(self):
+        product = self.create("gomlek", _upload("shirt.jpg"))
+        html = self.render(product)
+        self.assertNotIn("<picture", html)
+        self.assertIn(f'<img src="{product.image.url}"', html)
+
+        # Eski ad şemasıyla üretilmiş türevler de hazır sayılmaz
+        product.image_variants = {"src": product.image.name, "sizes": [[320, 240]]}
+        self.assertFalse(images.variants_ready(product))
+        self.assertNotIn("<picture", self.render(product))
+
+    def test_tag_without_image(self):
+        product = Product.objects.create(category=self.category, name="x", slug="x", price=1, stock=1)
+        self.assertEqual(self.render(product), "")
+
+    @override_settings(IMAGE_VARIANTS_ASYNC=True)
+    def test_schedule_only_when_image_changes(self):
+        with mock.patch.object(images, "_submit") as submit:
+            with self.captureOnCommitCallbacks(execute=True):
+                product = self.create("gomlek", _upload("shirt.jpg"))
+            self.assertEqual(submit.call_count, 1)
+
+            # Görsel aynı, türevler henüz yok: stok/fiyat kayıtları iş atmaz
+            for price in (110, 120):
+                with self.captureOnCommitCallbacks(execute=True):
+                    product.price = price
+                    product.save()
+                with self.captureOnCommitCallbacks(execute=True):
+                    Product.objects.get(pk=product.pk).save()
+            self.assertEqual(submit.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                product.image = _upload("shirt-2.jpg")
+                product.save()
+            self.assertEqual(submit.call_count, 2)
+            submit.assert_called_with(product.pk, product.image.name)
+
+    def test_submit_skips_pending_job(self):
+        executor = mock.Mock()
+        with mock.patch.object(images, "get_executor", return_value=executor), \
+                mock.patch.object(images, "_pending", set()):
+            images._submit(1, "products/shirt.jpg")
+            images._submit(1, "products/shirt.jpg")
+            self.assertEqual(executor.submit.call_count, 1)
+
+            future = executor.submit.return_value
+            done = future.add_done_callback.call_args[0][0]
+            with mock.patch.object(images, "store_result"), mock.patch.object(images.connection, "close"):
+                done(future)
+            images._submit(1, "products/shirt.jpg")
+            self.assertEqual(executor.submit.call_count, 2)
+
+
+# ============================================================
+# ARAMA ÖNERİLERİ (catalog/autocomplete.py)
+# ============================================================
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.shirts = Category.objects.create(name="Gömlekler", slug="gomlekler")
+        cls.silk = Product.objects.create(
+            category=cls.shirts, name="İpek Gömlek", slug="ipek-gomlek", price=500, stock=1,
+        )
+        cls.tee = Product.objects.create(
+            category=cls.shirts, name="Siyah Oversize Tişört", slug="siyah-tisort", price=200, stock=1,
+        )
+        Product.objects.create(
+            category=cls.shirts, name="Gizli Gömlek", slug="gizli-gomlek", price=1, stock=1, is_active=False,
+        )
+
+    def setUp(self):
+        # Modül düzeyindeki indeks testler arasında taşınmasın
+        self.addCleanup(setattr, autocomplete.index, "loaded_at", None)
+        autocomplete.index.load()
+
+    def labels(self, q, **kwargs):
+        return [row["label"] for row in autocomplete.index.lookup(q, **kwargs)]
+
+    def test_prefix_matches_any_word(self):
+        self.assertEqual(self.labels("siy"), ["Siyah Oversize Tişört"])
+        self.assertEqual(self.labels("over"), ["Siyah Oversize Tişört"])
+        self.assertEqual(self.labels("oversize tis"), ["Siyah Oversize Tişört"])
+        self.assertEqual(self.labels("tisort siyah"), [])
+        self.assertEqual(self.labels("s"), [])  # MIN_QUERY_LENGTH
+
+    def test_turkish_folding(self):
+        self.assertEqual(self.labels("TİŞ"), ["Siyah Oversize Tişört"])
+        self.assertEqual(self.labels("IPEK"), ["İpek Gömlek"])
+        self.assertEqual(self.labels("gomlek"), ["Gömlekler", "İpek Gömlek"])
+
+    def test_categories_first_and_limit(self):
+        self.assertEqual(self.labels("göm"), ["Gömlekler", "İpek Gömlek"])
+        self.assertEqual(self.labels("göm", limit=1), ["Gömlekler"])
+        row = autocomplete.index.lookup("ipek")[0]
+        self.assertEqual((row["type"], row["url"]), (autocomplete.PRODUCT, self.silk.get_absolute_url()))
+
+    def test_suggest_view_hits_no_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("catalog:autocomplete"), {"q": "siyah"})
+        self.assertEqual([r["label"] for r in response.json()["results"]], ["Siyah Oversize Tişört"])
+
+    def test_signals_update_index_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.get(pk=self.tee.pk)
+            product.name = "Beyaz Tişört"
+            product.save()
+            # Commit olmadan indeks değişmez
+            self.assertEqual(self.labels("siyah"), ["Siyah Oversize Tişört"])
+        self.assertEqual(self.labels("siyah"), [])
+        self.assertEqual(self.labels("beyaz"), ["Beyaz Tişört"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.is_active = False
+            product.save()
+        self.assertEqual(self.labels("beyaz"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.silk.delete()
+        self.assertEqual(self.labels("ipek"), [])
+
+    def test_rolled_back_save_leaves_index(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            product = Product.objects.get(pk=self.tee.pk)
+            product.name = "Beyaz Tişört"
+            product.save()
+        # Geri alınan transaction: callback'ler hiç çalışmaz
+        self.assertTrue(callbacks)
+        self.assertEqual(self.labels("siyah"), ["Siyah Oversize Tişört"])
+        self.assertEqual(self.labels("beyaz"), [])
+
+
+# ============================================================
+# KART CACHE'İ (catalog/cards.py)
+# ============================================================
+class ProductCardCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Giyim", slug="giyim")
+        cls.shirt = Product.objects.create(category=cls.category, name="Gömlek", slug="gomlek", price=100, stock=1)
+        cls.hat = Product.objects.create(category=cls.category, name="Şapka", slug="sapka", price=50, stock=1)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def render(self, variant="list"):
+        products = list(
+            Product.objects.select_related("category").filter(pk__in=[self.shirt.pk, self.hat.pk]).order_by("pk")
+        )
+        with mock.patch.object(cards, "render_to_string", wraps=cards.render_to_string) as rendered:
+            fragments = cards.render_cards(products, variant)
+        return fragments, rendered.call_count
+
+    def test_second_render_comes_from_cache(self):
+        fragments, misses = self.render()
+        self.assertEqual(misses, 2)
+        self.assertIn("Gömlek", fragments[0])
+        self.assertIn("Şapka", fragments[1])
+
+        self.assertEqual(self.render(), (fragments, 0))
+        # Varyant anahtarın parçası
+        self.assertEqual(self.render("grid")[1], 2)
+
+    def test_product_save_invalidates_its_cards_after_commit(self):
+        self.render()
+        with self.captureOnCommitCallbacks(execute=True):
+            shirt = Product.objects.get(pk=self.shirt.pk)
+            shirt.price = 120
+            shirt.save()
+            # Commit olmadan cache'e dokunulmaz
+            self.assertEqual(self.render()[1], 0)
+
+        fragments, misses = self.render()
+        self.assertEqual(misses, 1)
+        self.assertIn("120", fragments[0])
+
+    def test_rolled_back_save_keeps_cache(self):
+        self.render()
+        with self.captureOnCommitCallbacks():
+            Product.objects.filter(pk=self.hat.pk).get().save()
+        self.assertEqual(self.render()[1], 0)
+
+    def test_category_save_bumps_generation(self):
+        fragments, _ = self.render()
+        generation = cards._generation()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Yeni Sezon"
+            self.category.save()
+        self.assertEqual(cards._generation(), generation + 1)
+
+        fragments, misses = self.render()
+        self.assertEqual(misses, 2)
+        self.assertIn("Yeni Sezon", fragments[0])
+
+    def test_generation_survives_cache_clear(self):
+        self.render()
+        cache.clear()
+        cards.invalidate_all()
+        self.assertEqual(self.render()[1], 2)
+
+
+# ============================================================
+# FACET SAYILARI (catalog/facets.py)
+# ============================================================
+class FacetCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.clothes = Category.objects.create(name="Giyim", slug="giyim")
+        cls.accessories = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        for category, slug, price, stock, is_new in (
+            (cls.clothes, "a1", 100, 5, True),
+            (cls.clothes, "a2", 300, 0, True),
+            (cls.clothes, "a3", 300, 3, False),
+            (cls.clothes, "a4", 700, 2, True),
+            (cls.accessories, "b1", 300, 1, True),
+            (cls.accessories, "b2", 1500, 0, True),
+        ):
+            Product.objects.create(
+                category=category, name=slug, slug=slug, price=price, stock=stock, is_new=is_new,
+            )
+
+    def facets(self, params, queryset=None, **kwargs):
+        request = RequestFactory().get("/", params)
+        if queryset is None:
+            queryset = Product.objects.filter(category=self.clothes)
+        return facet_counts(request, queryset, parse_filters(request), **kwargs)
+
+    def price_counts(self, facets):
+        return [row["count"] for row in facets["prices"]]
+
+    def test_price_range_excludes_own_filter(self):
+        with self.assertNumQueries(1):
+            facets = self.facets({"price_min": "250", "price_max": "500", "in_stock": "1"})
+        self.assertEqual(facets["total"], 1)                      # a3
+        # Aralıklar stok filtresiyle ama fiyat filtresi olmadan: a1, a3, a4
+        self.assertEqual(self.price_counts(facets), [1, 1, 1, 0])
+        self.assertEqual([row["active"] for row in facets["prices"]], [False, True, False, False])
+        self.assertEqual(facets["in_stock"]["count"], 1)
+        # Seçili değil: fiyat + stok + yeni → a3 yeni değil
+        self.assertEqual(facets["new"]["count"], 0)
+
+    def test_toggle_facets_exclude_own_filter(self):
+        facets = self.facets({"new": "1"})
+        self.assertEqual(facets["total"], 3)                      # a1, a2, a4
+        self.assertEqual(facets["new"]["count"], 3)
+        self.assertEqual(facets["in_stock"]["count"], 2)          # a1, a4
+        self.assertEqual(self.price_counts(facets), [1, 1, 1, 0])
+
+        facets = self.facets({"in_stock": "1"})
+        self.assertEqual(facets["total"], 3)                      # a1, a3, a4
+        # Yeni sayısı stok filtresi açıkken: a1, a4 (a2 stokta değil)
+        self.assertEqual(facets["new"]["count"], 2)
+        self.assertEqual(facets["in_stock"]["count"], 3)
+
+    def test_categories_apply_other_filters(self):
+        with self.assertNumQueries(1):
+            facets = self.facets(
+                {"category": "giyim", "price_min": "250", "price_max": "500"},
+                queryset=Product.objects.all(), with_categories=True,
+            )
+        self.assertEqual(
+            [(row["label"], row["count"], row["active"]) for row in facets["categories"]],
+            [("Aksesuar", 1, False), ("Giyim", 2, True)],
+        )
+        # Diğer facet'ler sadece seçili kategoriden
+        self.assertEqual(facets["total"], 2)                      # a2, a3
+        self.assertEqual(facets["in_stock"]["count"], 1)          # a3
+        self.assertEqual(facets["new"]["count"], 1)               # a2
+        self.assertEqual(self.price_counts(facets), [1, 2, 1, 0])
+
+    def test_all_categories_when_none_selected(self):
+        facets = self.facets({"in_stock": "1"}, queryset=Product.objects.all(), with_categories=True)
+        self.assertEqual([row["count"] for row in facets["categories"]], [1, 3])
+        self.assertEqual(facets["total"], 4)
+        self.assertEqual(self.price_counts(facets), [1, 2, 1, 0])
+        self.assertTrue(facets["any_active"])
+
+    def test_non_finite_price_is_ignored(self):
+        for value in ("NaN", "Infinity", "-Infinity", "sNaN", "abc"):
+            with self.subTest(value=value):
+                request = RequestFactory().get("/", {"price_min": value, "price_max": value})
+                filters = parse_filters(request)
+                self.assertEqual((filters["price_min"], filters["price_max"]), (None, None))
+
+        url = reverse("catalog:category_products", args=["giyim"])
+        self.assertEqual(self.client.get(url, {"price_min": "NaN"}).status_code, 200)
+        response = self.client.get(reverse("catalog:search"), {"q": "a1", "price_min": "Infinity", "price_max": "sNaN"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["count"], 1)
+
+    def test_links_keep_other_params(self):
+        facets = self.facets({"in_stock": "1", "after": "abc"})
+        self.assertEqual(facets["in_stock"]["url"], "?")
+        self.assertEqual(facets["new"]["url"], "?in_stock=1&new=1")
+        self.assertEqual(facets["prices"][1]["url"], "?in_stock=1&price_min=250&price_max=500")
+
+
+# ============================================================
+# KEYSET SAYFALAMA (catalog/pagination.py)
+# ============================================================
+def _token(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Giyim", slug="giyim")
+        cls.products = [
+            Product.objects.create(category=category, name=f"Ürün {i}", slug=f"urun-{i}", price=10, stock=1)
+            for i in range(5)
+        ]
+        # Hepsi aynı anda oluşmuş gibi: sıra id ile belirlenmeli
+        cls.stamp = timezone.now().replace(microsecond=0)
+        Product.objects.update(created_at=cls.stamp)
+
+    def walk(self, page_size):
+        pages, after = [], None
+        while True:
+            items, after = pagination.keyset_page(Product.objects.all(), after=after, page_size=page_size)
+            pages.append([p.pk for p in items])
+            if after is None:
+                return pages
+
+    def test_cursor_round_trip(self):
+        product = Product.objects.get(pk=self.products[2].pk)
+        token = pagination.encode_cursor(product)
+        self.assertNotIn("=", token)
+        self.assertEqual(pagination.decode_cursor(token), (self.stamp, product.pk))
+
+    def test_equal_created_at_breaks_ties_by_id(self):
+        ids = sorted((p.pk for p in self.products), reverse=True)
+        self.assertEqual(self.walk(2), [ids[:2], ids[2:4], ids[4:]])
+        self.assertEqual(self.walk(5), [ids])
+
+    def test_newer_rows_come_first(self):
+        oldest = self.products[-1]
+        Product.objects.filter(pk=oldest.pk).update(created_at=self.stamp + timedelta(seconds=1))
+        self.assertEqual(self.walk(5)[0][0], oldest.pk)
+
+    def test_malformed_or_tampered_cursor_is_rejected(self):
+        for token in (
+            "", None, "!!!", "YWJj",                                    # base64 değil / "abc"
+            _token("dün|5"), _token(f"{self.stamp.isoformat()}|x"),
+            _token(f"{self.stamp.isoformat()}|5|6"),
+            _token(f"{self.stamp.replace(tzinfo=None).isoformat()}|5"),  # saat dilimsiz
+            _token(f"{self.stamp.isoformat()}|0"),
+            base64.urlsafe_b64encode(b"\xff\xfe|1").decode(),             # UTF-8 değil
+        ):
+            with self.subTest(token=token):
+                self.assertIsNone(pagination.decode_cursor(token))
+
+    def test_bad_cursor_shows_first_page(self):
+        response = self.client.get(reverse("catalog:product_list"), {"after": _token("bozuk"), "size": 2})
+        self.assertEqual(response.status_code, 200)
+        first = sorted((p.pk for p in self.products), reverse=True)[:2]
+        self.assertEqual([p.pk for p in response.context["products"]], first)
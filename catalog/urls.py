@@ -9,5 +9,6 @@ urlpatterns = [
     path("urun/<slug:slug>/", views.product_detail, name="product_detail"),
     path("yeni-gelenler/", views.new_arrivals_view, name="new_arrivals"),
     path("search/", views.search, name="search"),
+    path("search/suggest/", views.autocomplete, name="autocomplete"),
 
 ]
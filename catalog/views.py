@@ -1,26 +1,55 @@
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
-from urllib3 import request
 from .models import Category, Product
-from django.db.models import Q
+from . import autocomplete as suggestions
+from . import search as search_index
+from .conditional import catalog_stamp, conditional_page, product_stamp
+from .facets import facet_counts, filter_q, parse_filters
+from .pagination import get_page_size, keyset_page, page_query
 
+SEARCH_PAGE_SIZE = 24
+# Üst sınır: aşırı büyük ?page= OFFSET'i taşırır (SQLite: datatype mismatch → 500)
+MAX_SEARCH_PAGE = 1000
+
+def _paginate(request, queryset):
+    # Keyset sayfalama: her sayfa aynı maliyette (bkz. pagination.py)
+    products, next_cursor = keyset_page(
+        queryset, after=request.GET.get("after"), page_size=get_page_size(request)
+    )
+    return {
+        "products": products,
+        "next_page": page_query(request, next_cursor) if next_cursor else "",
+        "first_page": page_query(request) if request.GET.get("after") else "",
+    }
+
+
+@conditional_page(catalog_stamp)
 def product_list(request):
     products = Product.objects.filter(is_active=True).select_related("category")
-    return render(request, "catalog/list.html", {"products": products})
+    return render(request, "catalog/list.html", _paginate(request, products))
 
 
+@conditional_page(catalog_stamp)
 def new_arrivals_view(request):
     products = Product.objects.filter(is_active=True, is_new=True).select_related("category")
-    return render(request, "catalog/new_arrivals.html", {"products": products})
+    return render(request, "catalog/new_arrivals.html", _paginate(request, products))
 
 
+@conditional_page(catalog_stamp)
 def category_view(request, slug):
     category = get_object_or_404(Category, slug=slug)
     products = Product.objects.filter(is_active=True, category=category).select_related("category")
-    return render(
-        request,
-        "catalog/category.html",
-        {"category": category, "products": products},
-    )
+
+    # Filtreler + facet sayıları (tek sorgu, bkz. facets.py)
+    # Kategori URL'den sabit → kategori facet'i burada yok
+    filters = parse_filters(request)
+    filters["category"] = None
+    facets = facet_counts(request, products, filters)
+
+    context = _paginate(request, products.filter(filter_q(filters)))
+    context["category"] = category
+    context["facets"] = facets
+    return render(request, "catalog/category.html", context)
 def search_view(request):
     q = request.GET.get("q", "").strip()
     products = Product.objects.filter(is_active=True)
@@ -29,6 +58,8 @@ def search_view(request):
 
     return render(request, "catalog/search.html", {"products": products, "q": q})
 
+# Sepete ekle formu CSRF token'ı taşır → paylaşılan cache'e girmemeli
+@conditional_page(product_stamp, public=False)
 def product_detail(request, slug):
     product = get_object_or_404(Product, slug=slug, is_active=True)
     return render(request, "catalog/detail.html", {"product": product})
@@ -38,20 +69,46 @@ def product_detail(request, slug):
 def search(request):
     q = (request.GET.get("q") or "").strip()
 
-    products = Product.objects.none()
+    # NEDEN search_index? icontains tüm tabloyu tarıyordu;
+    # indeks tek sorguda hem bu sayfayı hem toplam sonucu verir.
+    try:
+        page = min(max(int(request.GET.get("page", 1)), 1), MAX_SEARCH_PAGE)
+    except ValueError:
+        page = 1
+
+    # Filtreler indeks sorgusuna JOIN ile eklenir ("product__" öneki)
+    filters = parse_filters(request)
+    products, count = search_index.search(
+        q,
+        offset=(page - 1) * SEARCH_PAGE_SIZE,
+        limit=SEARCH_PAGE_SIZE,
+        product_filter=filter_q(filters, prefix="product__"),
+    )
 
+    facets = None
     if q:
-        products = (
-            Product.objects
-            .filter(is_active=True)
-            .filter(Q(name__icontains=q) | Q(description__icontains=q))
-            .order_by("-created_at")  # en yeni önce (modelinle uyumlu)
-        )
+        matched = Product.objects.filter(is_active=True, id__in=search_index.matching_product_ids(q))
+        facets = facet_counts(request, matched, filters, with_categories=True)
+
+    params = request.GET.copy()
+    params["page"] = page - 1
+    previous_page = "?" + params.urlencode() if page > 1 else ""
+    params["page"] = page + 1
+    next_page = "?" + params.urlencode() if page * SEARCH_PAGE_SIZE < count else ""
 
     context = {
         "q": q,
         "products": products,
-        "count": products.count() if q else 0,
+        "count": count,
+        "facets": facets,
+        "previous_page": previous_page,
+        "next_page": next_page,
     }
-     
-    return render(request, "catalog/search.html", context)
\ No newline at end of file
+
+    return render(request, "catalog/search.html", context)
+
+
+def autocomplete(request):
+    # Navbar arama kutusu için öneriler — bellekten, DB sorgusu yok
+    q = (request.GET.get("q") or "").strip()
+    return JsonResponse({"q": q, "results": suggestions.suggest(q)})
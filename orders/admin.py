@@ -1,73 +1,211 @@
 # orders/admin.py
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import admin
-from django.db import transaction
 from django.contrib import messages
-from catalog.models import Product
-from .models import Order, OrderItem
+from django.db.models import Sum
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from catalog import inventory, ledger
+from . import reports, status
+from .models import Order, OrderItem, OrderStatusEvent, Task
 
 
 # ============================================================
 # 1) Inline: Order açınca alt tarafta OrderItem satırlarını göster
 # ============================================================
+# Sadece okunur: satır / adet değişikliği stok ve satış özetlerini atlar
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    fields = ("product_id", "name", "quantity", "unit_price")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+# Durum geçmişi: sadece okunur (ekleme yalnızca orders/status.py'den)
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    extra = 0
+    fields = ("created_at", "from_status", "to_status", "actor")
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+# ============================================================
+# 1B) Filtre: "X saattir bekleyen" — (status, created_at) index'i
+# ============================================================
+class PendingAgeFilter(admin.SimpleListFilter):
+    title = "bekleme süresi"
+    parameter_name = "pending_older_than"
+
+    def lookups(self, request, model_admin):
+        return [("24", "24 saatten eski bekleyen"), ("72", "3 günden eski bekleyen")]
+
+    def queryset(self, request, queryset):
+        if self.value() not in ("24", "72"):
+            return queryset
+        cutoff = timezone.now() - timedelta(hours=int(self.value()))
+        return queryset.filter(status=Order.STATUS_PENDING, created_at__lt=cutoff)
 
 
 # ============================================================
-# 2) Actions: Status değiştir
+# 2) Actions: Status değiştir (orders/status.py)
 # ============================================================
+# Geçişe uygun olmayanlar (örn. teslim edilmiş → hazırlanıyor) atlanır.
+# Seçim ne kadar büyük olursa olsun: 1 SELECT + 1 UPDATE + 1 INSERT
+# (durum geçmişi).
+def _transition_selected(request, queryset, to_status):
+    order_ids = list(queryset.order_by().values_list("id", flat=True))
+    moved = inventory.retrying(status.transition, order_ids, to_status, actor=request.user)
+    label = dict(Order.STATUS_CHOICES)[to_status]
+    if moved:
+        messages.success(request, f"{len(moved)} sipariş '{label}' yapıldı.")
+    skipped = len(order_ids) - len(moved)
+    if skipped:
+        messages.warning(request, f"{skipped} sipariş bu duruma geçirilemez, atlandı.")
+
+
 @admin.action(description="Seçilen siparişleri Hazırlanıyor yap")
 def mark_pending(modeladmin, request, queryset):
-    queryset.update(status=Order.STATUS_PENDING)
+    _transition_selected(request, queryset, Order.STATUS_PENDING)
 
 
 @admin.action(description="Seçilen siparişleri Kargoya Verildi yap")
 def mark_shipped(modeladmin, request, queryset):
-    queryset.update(status=Order.STATUS_SHIPPED)
+    _transition_selected(request, queryset, Order.STATUS_SHIPPED)
 
 
 @admin.action(description="Seçilen siparişleri Teslim Edildi yap")
 def mark_delivered(modeladmin, request, queryset):
-    queryset.update(status=Order.STATUS_DELIVERED)
+    _transition_selected(request, queryset, Order.STATUS_DELIVERED)
 
 
 # ============================================================
 # 3) Cancel + Stock: Toplu iptal (stok geri yüklemeli)
 # ============================================================
+# NEDEN PARÇA PARÇA + SET TABANLI?
+# - Eskiden her OrderItem için p.save() → 500 siparişte geçen ürün 500
+#   UPDATE, kilitler boyunca tutulurdu.
+# - Şimdi seçim ORDER_CANCEL_CHUNK_SIZE'lık parçalara bölünür; parça
+#   başına kendi transaction'ı:
+#     1 SELECT + 1 UPDATE + 1 INSERT (durum geçişi — orders/status.py)
+#     1 toplama: values("product_id").annotate(Sum("quantity"))
+#     1 UPDATE (stok, ürün başına CASE — catalog/inventory.py)
+#     1 SELECT + bulk_create (stok defteri — catalog/ledger.py)
+#   Binlerce sipariş saniyeler içinde biter; kilitler parça kadar kısa.
+DEFAULT_CANCEL_CHUNK_SIZE = 500
+
+
+def _cancel_chunk(order_ids, actor=None):
+    # Kötümser modda pending siparişler kilitlenir: bu sırada kargoya
+    # verilen sipariş iptal edilmesin. İyimser modda arada durumu
+    # değişen olursa StockConflict → parça baştan.
+    order_ids = status.transition(order_ids, Order.STATUS_CANCELLED, actor=actor)
+    if not order_ids:
+        return 0
+
+    items = OrderItem.objects.filter(order_id__in=order_ids).order_by()
+    inventory.restore(dict(
+        items.values("product_id").annotate(total=Sum("quantity")).values_list("product_id", "total")
+    ))
+    ledger.record_orders(ledger.CANCEL, items.values_list("order_id", "product_id", "quantity"))
+    return len(order_ids)
+
+
 @admin.action(description="Seçilen siparişleri İptal Et (stokları geri yükle)")
-@transaction.atomic
 def cancel_orders_with_stock(modeladmin, request, queryset):
-    pending_orders = queryset.filter(status=Order.STATUS_PENDING)
-
-    if not pending_orders.exists():
+    order_ids = list(queryset.filter(status=Order.STATUS_PENDING).order_by("pk").values_list("id", flat=True))
+    if not order_ids:
         messages.warning(request, "İptal edilebilir (pending) sipariş bulunamadı.")
         return
 
-    order_ids = list(pending_orders.values_list("id", flat=True))
-    items = OrderItem.objects.filter(order_id__in=order_ids)
-
-    product_ids = list(items.values_list("product_id", flat=True).distinct())
-    locked_products = Product.objects.select_for_update().filter(id__in=product_ids, is_active=True)
-    locked_map = {p.id: p for p in locked_products}
+    chunk_size = getattr(settings, "ORDER_CANCEL_CHUNK_SIZE", DEFAULT_CANCEL_CHUNK_SIZE)
+    updated_count = 0
+    for start in range(0, len(order_ids), chunk_size):
+        updated_count += inventory.retrying(
+            _cancel_chunk, order_ids[start:start + chunk_size], actor=request.user,
+        )
 
-    for item in items:
-        p = locked_map.get(item.product_id)
-        if p:
-            p.stock += int(item.quantity)
-            p.save(update_fields=["stock"])
-
-    updated_count = pending_orders.update(status=Order.STATUS_CANCELLED)
     messages.success(request, f"{updated_count} sipariş iptal edildi. Stoklar geri yüklendi ✅")
 
 
 # ============================================================
 # 4) Order Admin
 # ============================================================
+DASHBOARD_RANGES = [(7, "Son 7 gün"), (30, "Son 30 gün"), (365, "Son 1 yıl")]
+DEFAULT_DASHBOARD_DAYS = 30
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "total", "status", "created_at")
-    list_filter = ("status", "created_at")
+    list_filter = ("status", PendingAgeFilter, "created_at")
     search_fields = ("id", "full_name", "phone")
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusEventInline]
+    # status sadece aksiyonlarla değişir (orders/status.py): formdan
+    # yazılırsa geçmiş, stok iadesi, bildirim ve satış özetleri atlanır.
+    # total da satırlardan gelir, elle düzenlenmez.
+    readonly_fields = ("status", "total")
     actions = [mark_pending, mark_shipped, mark_delivered, cancel_orders_with_stock]
+    change_list_template = "admin/orders/order/change_list.html"
+
+    def get_urls(self):
+        dashboard = path(
+            "dashboard/", self.admin_site.admin_view(self.dashboard_view), name="orders_order_dashboard",
+        )
+        return [dashboard] + super().get_urls()
+
+    # --------------------------------------------------------
+    # Satış paneli: sadece özet tabloları (orders/reports.py) okunur;
+    # sipariş sayısından bağımsız, birkaç küçük sorgu
+    # --------------------------------------------------------
+    def dashboard_view(self, request):
+        try:
+            days = int(request.GET.get("days", DEFAULT_DASHBOARD_DAYS))
+        except ValueError:
+            days = DEFAULT_DASHBOARD_DAYS
+        if days not in dict(DASHBOARD_RANGES):
+            days = DEFAULT_DASHBOARD_DAYS
+
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        context = {
+            **self.admin_site.each_context(request),
+            **reports.summary(start, end),
+            "opts": self.model._meta,
+            "title": "Satış paneli",
+            "start": start,
+            "end": end,
+            "days": days,
+            "ranges": DASHBOARD_RANGES,
+        }
+        return TemplateResponse(request, "admin/orders/dashboard.html", context)
+
+
+# ============================================================
+# 5) Task Admin: iş kuyruğu (orders/tasks.py) — izleme + yeniden dene
+# ============================================================
+@admin.action(description="Seçilen işleri yeniden sıraya al")
+def requeue_tasks(modeladmin, request, queryset):
+    requeued = queryset.exclude(status=Task.STATUS_RUNNING).update(
+        status=Task.STATUS_QUEUED, run_at=timezone.now(), attempts=0, claimed_by="", claimed_at=None,
+    )
+    messages.success(request, f"{requeued} iş yeniden sıraya alındı.")
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "attempts", "run_at", "finished_at")
+    list_filter = ("status", "name")
+    readonly_fields = ("claimed_by", "claimed_at", "last_error", "created_at", "finished_at")
+    actions = [requeue_tasks]
+
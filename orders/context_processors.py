@@ -1,4 +1,7 @@
-from .models import Order
+from django.utils.functional import SimpleLazyObject
+
+from . import counts
+
 
 def orders_count(request):
     """
@@ -10,9 +13,13 @@ def orders_count(request):
     KURAL:
     - Login değilse: 0
     - Login ise: sadece kullanıcının sipariş sayısı
+
+    MALİYET:
+    - Sayı cache'ten gelir (orders/counts.py), sipariş eklenince silinir.
+    - Tembel (lazy): template "orders_count"a hiç dokunmazsa cache'e
+      bile gidilmez.
     """
     if request.user.is_authenticated:
-        return {
-            "orders_count": Order.objects.filter(user=request.user).count()
-        }
+        user_id = request.user.pk
+        return {"orders_count": SimpleLazyObject(lambda: counts.get_count(user_id))}
     return {"orders_count": 0}
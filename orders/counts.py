@@ -0,0 +1,39 @@
+# ============================================================
+# orders/counts.py  —  GRİWEAR "SİPARİŞLERİM (n)" SAYISI (cache'li)
+# ============================================================
+# NEDEN?
+# - Navbar rozeti için her sayfada (katalog dahil) bir COUNT sorgusu
+#   atılıyordu.
+# - Sayı kullanıcı başına cache'te tutulur; sayfalar cache'ten okur →
+#   katalog sayfasında 0 sipariş sorgusu.
+#
+# Sayı: kullanıcının TÜM siparişleri (iptal edilenler dahil; "Siparişlerim"
+# listesi de hepsini gösterir). Bu yüzden sadece sipariş eklenince,
+# silinince veya başka kullanıcıya taşınınca değişir → signals.py
+# cache'i commit sonrası siler, bir sonraki sayfa yeniden sayar.
+
+from django.core.cache import cache
+from django.db import transaction
+
+COUNT_TIMEOUT = 60 * 60 * 24
+
+
+def _key(user_id):
+    return f"orders:count:{user_id}"
+
+
+def get_count(user_id):
+    count = cache.get(_key(user_id))
+    if count is None:
+        from .models import Order
+
+        count = Order.objects.filter(user_id=user_id).count()
+        cache.set(_key(user_id), count, timeout=COUNT_TIMEOUT)
+    return count
+
+
+def invalidate(*user_ids):
+    # Transaction geri alınırsa sayı değişmemiştir; commit olunca sil
+    keys = [_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
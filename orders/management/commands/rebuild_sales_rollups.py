@@ -0,0 +1,56 @@
+# ============================================================
+# rebuild_sales_rollups — satış özetlerini siparişlerden yeniden hesapla
+# ============================================================
+# Kullanım (cron, örn. her gece — son günleri onarır):
+#   python manage.py rebuild_sales_rollups              # bugün + önceki 6 gün
+#   python manage.py rebuild_sales_rollups --days 30
+# İlk kurulum / tam onarım (ilk siparişten bugüne):
+#   python manage.py rebuild_sales_rollups --all
+# Sadece bekleyen olayları işle (worker çalışmıyorsa):
+#   python manage.py rebuild_sales_rollups --pending-only
+#
+# Önce bekleyen durum olayları işlenir, sonra gün gün baştan hesaplanır.
+# Her gün kendi transaction'ında: o günün siparişleri sadece o gün
+# hesaplanırken kilitli kalır.
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from orders import reports
+from orders.models import DailySales, ProductDailySales
+
+
+class Command(BaseCommand):
+    help = "Günlük ve ürün bazlı satış özetlerini Order / OrderItem'dan yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Bugün dahil kaç gün onarılsın")
+        parser.add_argument("--all", action="store_true", help="İlk siparişten bugüne tümü")
+        parser.add_argument("--pending-only", action="store_true", help="Sadece bekleyen olayları işle")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days > 0 olmalı")
+
+        applied = reports.apply_pending()
+        self.stdout.write(f"{applied} bekleyen durum olayı işlendi.")
+        if options["pending_only"]:
+            return
+
+        today = timezone.localdate()
+        if options["all"]:
+            first = reports.first_order_day() or today
+            # İlk siparişten önceki (eski / artık) özet satırları
+            DailySales.objects.filter(day__lt=first).delete()
+            ProductDailySales.objects.filter(day__lt=first).delete()
+        else:
+            first = today - timedelta(days=options["days"] - 1)
+
+        day, orders = first, 0
+        while day <= today:
+            orders += reports.rebuild_day(day)
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(f"{first} – {today}: {orders} sipariş yeniden özetlendi."))
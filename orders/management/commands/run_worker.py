@@ -0,0 +1,67 @@
+# ============================================================
+# run_worker — veritabanı iş kuyruğunu çalıştır (orders/tasks.py)
+# ============================================================
+# Kullanım (sürekli çalışan süreç; birden fazla açılabilir):
+#   python manage.py run_worker
+#   python manage.py run_worker --batch-size 20 --poll 2
+# Kuyruğu boşaltıp çık (cron / deploy sonrası):
+#   python manage.py run_worker --once
+# Bitmiş işleri temizle (cron, örn. her gece):
+#   python manage.py run_worker --purge-days 7
+
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils import timezone
+
+from orders import tasks
+
+
+class Command(BaseCommand):
+    help = "Task tablosundaki işleri alıp çalıştırır; hata alanları artan beklemeyle yeniden dener."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10, help="Tek seferde alınan iş sayısı")
+        parser.add_argument("--poll", type=float, default=1.0, help="Kuyruk boşken bekleme (saniye)")
+        parser.add_argument("--once", action="store_true", help="Zamanı gelen işler bitince çık")
+        parser.add_argument("--purge-days", type=int, help="Bu kadar günden eski bitmiş işleri sil ve çık")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1 or options["poll"] < 0:
+            raise CommandError("--batch-size > 0 ve --poll >= 0 olmalı")
+
+        if options["purge_days"] is not None:
+            if options["purge_days"] < 0:
+                raise CommandError("--purge-days >= 0 olmalı")
+            deleted = tasks.purge(timezone.now() - timedelta(days=options["purge_days"]))
+            self.stdout.write(self.style.SUCCESS(f"{deleted} bitmiş iş silindi."))
+            return
+
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        total = failed = 0
+        try:
+            while True:
+                # Uzun süreçte kopmuş / eskimiş bağlantı kalmasın
+                close_old_connections()
+                requeued = tasks.requeue_stale()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f"{requeued} yarım kalmış iş sıraya geri alındı."))
+
+                claimed, done = tasks.work(worker, batch_size=options["batch_size"])
+                total += done
+                failed += claimed - done
+                if options["verbosity"] > 1 and claimed:
+                    self.stdout.write(f"{claimed} iş alındı, {done} başarılı.")
+
+                if not claimed:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{total} iş tamamlandı, {failed} hata."))
@@ -6,6 +6,7 @@
 
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 # ============================================================
@@ -103,13 +104,14 @@ class Order(models.Model):
     # default=STATUS_PENDING:
     # - yeni sipariş otomatik "Hazırlanıyor" başlar
     #
-    # (İsteğe bağlı profesyonel dokunuş):
-    # db_index=True -> status’a göre filtre hızlanır
+    # DİKKAT: status'u doğrudan yazmayın → orders/status.py transition()
+    # (geçerli geçişleri uygular, OrderStatusEvent kaydı düşer).
+    # Index: Meta'daki (status, created_at) — "24 saattir bekleyen" gibi
+    # sorgular tabloyu taramaz.
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
         default=STATUS_PENDING,
-        # db_index=True,   # istersen aç (opsiyonel)
     )
 
     # ------------------------------------------------------------
@@ -118,6 +120,29 @@ class Order(models.Model):
     # auto_now_add: kayıt ilk oluştuğunda otomatik zaman basar
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # ------------------------------------------------------------
+    # 1H) checkout_token — IDEMPOTENCY (tekrar gönderim koruması)
+    # ------------------------------------------------------------
+    # Checkout formu her açılışta rastgele bir token ile gelir; sipariş
+    # bu token ile kaydedilir. Çift tık / proxy tekrarı aynı token'ı
+    # tekrar gönderir → yeni sipariş yazılmaz, ilk siparişe yönlendirilir.
+    # unique: aynı anda gelen iki istekten ikincisi DB'de reddedilir.
+    # null: token'sız eski siparişler (NULL'lar unique'i bozmaz)
+    checkout_token = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+
+    # ------------------------------------------------------------
+    # 1G-2) INDEX — NEDEN?
+    # ------------------------------------------------------------
+    # "Siparişlerim" her zaman user ile filtreler, en yeni önce sıralar.
+    # (user, created_at, id) index'i ile ne tarama ne ayrı sıralama olur.
+    # (status, created_at): operasyon ekranı "durumu X olan, şu tarihten
+    # eski siparişler" sorar (bkz. admin'deki bekleyen filtresi).
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at", "id"], name="order_user_created_idx"),
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+        ]
+
     # ------------------------------------------------------------
     # 1H) __str__ — ADMIN'DE OKUNUR GÖRÜNSÜN
     # ------------------------------------------------------------
@@ -186,3 +211,140 @@ class OrderItem(models.Model):
     # ------------------------------------------------------------
     def __str__(self):
         return f"{self.name} x{self.quantity}"
+
+
+# ============================================================
+# 3) ORDER STATUS EVENT — DURUM GEÇMİŞİ (sadece ekleme)
+# ============================================================
+# NEDEN?
+# - Order.status yerinde değişiyordu; ne zaman kargoya verildi, kim
+#   iptal etti bilinmiyordu.
+# - Her geçiş (checkout'ta oluşma dahil: from_status="") buraya bir satır
+#   ekler; toplu admin işlemlerinde tek bulk_create.
+# - Satış özetleri (reports) bu tabloyu id sırasıyla tüketir.
+# Yazan: orders/status.py
+class OrderStatusEvent(models.Model):
+    order = models.ForeignKey(Order, related_name="status_events", on_delete=models.CASCADE)
+    from_status = models.CharField(max_length=20, blank=True)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+
+    # Kim yaptı? (müşteri / admin; sistem işlerinde boş)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Satış özetlerine (orders/reports.py) işlendi mi? Olay içeriği hiç
+    # değişmez; sadece bu bayrak bir kez True olur. Kısmi index: işlenmemiş
+    # olaylar (birkaç satır) tabloyu taramadan bulunur.
+    rolled_up = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(rolled_up=False), name="status_event_pending_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.order_id}: {self.from_status or '-'} → {self.to_status}"
+
+
+# ============================================================
+# 4) TASK — VERİTABANI TABANLI İŞ KUYRUĞU
+# ============================================================
+# NEDEN?
+# - Checkout / durum değişikliği sonrası işler (bildirim e-postası vb.)
+#   isteğin içinde çalışırsa kullanıcı bekler.
+# - İş buraya yazılır (commit sonrası), run_worker komutu alıp çalıştırır.
+#   Harici broker yok; aynı veritabanı.
+# Akış: queued → running → done
+#                      ↘ (hata) queued (run_at ileri) … → failed
+# Yazan / okuyan: orders/tasks.py
+class Task(models.Model):
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Sırada"),
+        (STATUS_RUNNING, "Çalışıyor"),
+        (STATUS_DONE, "Bitti"),
+        (STATUS_FAILED, "Başarısız"),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+
+    # Ne zamandan sonra çalışabilir? (yeniden denemede ileri atılır)
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    # Hangi worker aldı, ne zaman? (çöken worker'ın işi süre dolunca geri döner)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    # (status, run_at): worker "sırada ve zamanı gelmiş" işleri index'ten okur
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="task_status_run_at_idx"),
+            models.Index(fields=["claimed_by"], name="task_claimed_by_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+
+# ============================================================
+# 5) SATIŞ ÖZETLERİ — GÜNLÜK + ÜRÜN/GÜN (rollup)
+# ============================================================
+# NEDEN?
+# - "Bu ay ciro ne, en çok ne sattı?" sorusu tüm Order / OrderItem
+#   tablosunu toplamak demekti; yıllar biriktikçe yavaşlar.
+# - Özet satırları siparişin OLUŞTUĞU güne yazılır ve durum olaylarıyla
+#   (OrderStatusEvent) artımlı güncellenir: iptal, siparişin kendi
+#   gününden düşer. Rapor = birkaç yüz özet satırı.
+# Yazan: orders/reports.py (iş kuyruğu + rebuild_sales_rollups komutu)
+class DailySales(models.Model):
+    day = models.DateField(unique=True)
+
+    # Gün içinde oluşan siparişler (brüt) ve iptal edilenleri
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.PositiveIntegerField(default=0)
+    cancelled_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cancelled_units = models.PositiveIntegerField(default=0)
+
+    # O gün oluşan siparişlerin ŞU ANKİ durumları
+    # (işaretli: olaylar farklı worker'larda sırasız işlenirse ara değer
+    # geçici olarak eksiye düşebilir; toplam yine doğru çıkar)
+    pending = models.IntegerField(default=0)
+    shipped = models.IntegerField(default=0)
+    delivered = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.orders} sipariş"
+
+
+class ProductDailySales(models.Model):
+    day = models.DateField()
+    product_id = models.IntegerField()  # OrderItem gibi snapshot; ürün silinse de kalır
+    name = models.CharField(max_length=200)
+
+    # Net: iptal edilen siparişlerin satırları düşülmüş
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product_id"], name="product_daily_sales_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} / {self.name}: {self.units}"
+
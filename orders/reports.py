@@ -0,0 +1,264 @@
+# ============================================================
+# orders/reports.py  —  GRİWEAR SATIŞ ÖZETLERİ (rollup)
+# ============================================================
+# NEDEN?
+# - Ciro / satılan adet sorusu tüm Order + OrderItem tablosunu topluyordu.
+# - DailySales (gün başına 1 satır) ve ProductDailySales (gün + ürün)
+#   artımlı tutulur; rapor sadece bu küçük tabloları okur.
+#
+# Artımlı güncelleme — apply_pending():
+# - Kaynak: OrderStatusEvent (checkout "" → pending, iptal, kargo...).
+#   İşlenmemiş olaylar (rolled_up=False, kısmi index) id sırasıyla parti
+#   parti alınır; parti başına:
+#     1 SELECT olaylar + 1 UPDATE bayrak
+#     1 SELECT sipariş (gün, tutar) + 1 SELECT satırlar (sadece oluşma/iptal)
+#     günler ve ürünler için: 1 INSERT (eksik satır) + 1 SELECT id +
+#     1 UPDATE (alan başına CASE id WHEN ... — catalog/inventory.py gibi)
+# - İş kuyruğundan çalışır (tasks.SALES_ROLLUP; status.record() ekler) →
+#   checkout aynı "bugün" satırına yazmak için sıraya girmez.
+# - Her şey siparişin OLUŞTUĞU güne yazılır; iptal o günden düşer.
+#
+# Onarım — rebuild_day(day) / rebuild_sales_rollups komutu:
+# - Günün siparişleri kilitlenir, özet satırları baştan hesaplanır ve bu
+#   siparişlerin bekleyen olayları "işlendi" sayılır (çift sayım yok).
+#   Kilit sürerken gelen iptal bekler; sonra olayı normal yoldan işlenir.
+
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Case, DecimalField, F, IntegerField, Max, Sum, Value, When
+from django.utils import timezone
+
+from .models import DailySales, Order, OrderItem, OrderStatusEvent, ProductDailySales
+
+STATUS_FIELDS = {
+    Order.STATUS_PENDING: "pending",
+    Order.STATUS_SHIPPED: "shipped",
+    Order.STATUS_DELIVERED: "delivered",
+    Order.STATUS_CANCELLED: "cancelled",
+}
+MONEY_FIELDS = {"revenue", "cancelled_revenue"}
+
+DEFAULT_BATCH_SIZE = 1000
+IN_CHUNK = 500  # IN (...) listesi bu kadar id'de bölünür
+TOP_PRODUCTS = 10
+
+
+class _Taken(Exception):
+    # Kilit desteklemeyen DB'de başka worker aynı olayları aldı
+    pass
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), IN_CHUNK):
+        yield ids[start:start + IN_CHUNK]
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _lines(order_ids):
+    # {order_id: [(product_id, ad, adet, satır tutarı)]}
+    lines = defaultdict(list)
+    for chunk in _chunks(order_ids):
+        rows = OrderItem.objects.filter(order_id__in=chunk).order_by().values_list(
+            "order_id", "product_id", "name", "quantity", "unit_price",
+        )
+        for order_id, product_id, name, qty, price in rows:
+            lines[order_id].append((product_id, name, qty, qty * price))
+    return lines
+
+
+def _deltas(transitions, orders):
+    # ------------------------------------------------------------
+    # transitions: (order_id, from_status, to_status)
+    # orders: {order_id: (gün, toplam)} — silinmiş sipariş atlanır
+    # Dönüş: ({gün: Counter}, {(gün, ürün): Counter}, {(gün, ürün): ad})
+    # ------------------------------------------------------------
+    money = [
+        order_id for order_id, from_status, to_status in transitions
+        if order_id in orders and (not from_status or to_status == Order.STATUS_CANCELLED)
+    ]
+    lines = _lines(money)
+
+    daily, products, names = defaultdict(Counter), defaultdict(Counter), {}
+    for order_id, from_status, to_status in transitions:
+        if order_id not in orders:
+            continue
+        day, total = orders[order_id]
+        row = daily[day]
+        if from_status:
+            row[STATUS_FIELDS[from_status]] -= 1
+        row[STATUS_FIELDS[to_status]] += 1
+
+        if not from_status:
+            # Oluşma: brüt satış
+            sign, units_field = 1, "units"
+            row["orders"] += 1
+            row["revenue"] += total
+        elif to_status == Order.STATUS_CANCELLED:
+            # İptal: net satıştan düşer
+            sign, units_field = -1, "cancelled_units"
+            row["cancelled_revenue"] += total
+        else:
+            continue
+
+        for product_id, name, qty, amount in lines[order_id]:
+            row[units_field] += qty
+            key = (day, product_id)
+            products[key]["units"] += sign * qty
+            products[key]["revenue"] += sign * amount
+            names[key] = name
+    return daily, products, names
+
+
+def _increment(model, deltas):
+    # ------------------------------------------------------------
+    # {pk: {alan: fark}} → TEK UPDATE:
+    #   SET revenue = revenue + CASE id WHEN 3 THEN 120.00 ... ELSE 0 END, ...
+    # Toplama sıradan bağımsız: aynı satıra eşzamanlı yazım kaybolmaz.
+    # ------------------------------------------------------------
+    fields = sorted({field for changes in deltas.values() for field, value in changes.items() if value})
+    if not fields:
+        return
+    updates = {}
+    for field in fields:
+        output = (
+            DecimalField(max_digits=14, decimal_places=2) if field in MONEY_FIELDS else IntegerField()
+        )
+        updates[field] = F(field) + Case(
+            *[When(pk=pk, then=Value(changes[field])) for pk, changes in deltas.items() if changes.get(field)],
+            default=Value(Decimal("0") if field in MONEY_FIELDS else 0),
+            output_field=output,
+        )
+    model.objects.filter(pk__in=list(deltas)).update(**updates)
+
+
+def _apply(daily, products, names):
+    if daily:
+        DailySales.objects.bulk_create([DailySales(day=day) for day in daily], ignore_conflicts=True)
+        ids = dict(DailySales.objects.filter(day__in=list(daily)).values_list("day", "id"))
+        _increment(DailySales, {ids[day]: changes for day, changes in daily.items()})
+    if products:
+        ProductDailySales.objects.bulk_create(
+            [ProductDailySales(day=day, product_id=pid, name=names[(day, pid)]) for day, pid in products],
+            ignore_conflicts=True,
+        )
+        rows = ProductDailySales.objects.filter(
+            day__in={day for day, _ in products}, product_id__in={pid for _, pid in products},
+        ).values_list("day", "product_id", "id")
+        ids = {(day, pid): pk for day, pid, pk in rows}
+        _increment(ProductDailySales, {ids[key]: changes for key, changes in products.items()})
+
+
+def _orders(order_ids):
+    # {order_id: (gün, toplam)}
+    found = {}
+    for chunk in _chunks(order_ids):
+        for order_id, created_at, total in Order.objects.filter(id__in=chunk).values_list("id", "created_at", "total"):
+            found[order_id] = (timezone.localdate(created_at), total)
+    return found
+
+
+def _apply_batch(batch_size):
+    with transaction.atomic():
+        events = OrderStatusEvent.objects.filter(rolled_up=False).order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            events = events.select_for_update(skip_locked=True)
+        rows = list(events.values_list("id", "order_id", "from_status", "to_status")[:batch_size])
+        if not rows:
+            return 0
+        marked = OrderStatusEvent.objects.filter(id__in=[row[0] for row in rows], rolled_up=False).update(
+            rolled_up=True,
+        )
+        if marked != len(rows):
+            raise _Taken()
+
+        transitions = [row[1:] for row in rows]
+        _apply(*_deltas(transitions, _orders(list({row[1] for row in rows}))))
+    return len(rows)
+
+
+def apply_pending(batch_size=DEFAULT_BATCH_SIZE):
+    # Dönüş: işlenen olay sayısı
+    applied = 0
+    while True:
+        try:
+            count = _apply_batch(batch_size)
+        except _Taken:
+            # Bu parti başka worker'da; kalanları o (veya sonraki görev) işler
+            break
+        applied += count
+        if count < batch_size:
+            break
+    return applied
+
+
+def rebuild_day(day):
+    # ------------------------------------------------------------
+    # Günün özetini Order / OrderItem'dan baştan hesaplar. Dönüş: sipariş sayısı
+    # status IN (hepsi) + created_at aralığı → (status, created_at) index'i
+    # (4 aralık okuması; tablo taranmaz)
+    # ------------------------------------------------------------
+    start, end = _day_bounds(day)
+    with transaction.atomic():
+        rows = list(
+            Order.objects.select_for_update()
+            .filter(status__in=list(STATUS_FIELDS), created_at__gte=start, created_at__lt=end)
+            .order_by()
+            .values_list("id", "total", "status")
+        )
+        ids = [order_id for order_id, _, _ in rows]
+        # Kilitli siparişlerin bekleyen olayları bu hesaba dahil
+        for chunk in _chunks(ids):
+            OrderStatusEvent.objects.filter(order_id__in=chunk, rolled_up=False).update(rolled_up=True)
+
+        DailySales.objects.filter(day=day).delete()
+        ProductDailySales.objects.filter(day=day).delete()
+
+        # Her sipariş: oluşma + (pending değilse) şimdiki durumuna geçiş
+        transitions = []
+        for order_id, _, status in rows:
+            transitions.append((order_id, "", Order.STATUS_PENDING))
+            if status != Order.STATUS_PENDING:
+                transitions.append((order_id, Order.STATUS_PENDING, status))
+        _apply(*_deltas(transitions, {order_id: (day, total) for order_id, total, _ in rows}))
+    return len(rows)
+
+
+def first_order_day():
+    # Durum başına en eski sipariş: 4 index okuması (Min() tabloyu tarardı)
+    found = []
+    for status in STATUS_FIELDS:
+        found += Order.objects.filter(status=status).order_by("created_at").values_list("created_at", flat=True)[:1]
+    return timezone.localdate(min(found)) if found else None
+
+
+def summary(start, end, top=TOP_PRODUCTS):
+    # ------------------------------------------------------------
+    # Admin paneli: [start, end] günleri için toplamlar, günlük satırlar,
+    # en çok ciro yapan ürünler. Sadece özet tabloları okunur.
+    # ------------------------------------------------------------
+    daily = DailySales.objects.filter(day__gte=start, day__lte=end)
+    fields = ["orders", "revenue", "units", "cancelled_revenue", "cancelled_units", *STATUS_FIELDS.values()]
+    totals = {field: value or 0 for field, value in daily.aggregate(**{f: Sum(f) for f in fields}).items()}
+    totals["net_revenue"] = totals["revenue"] - totals["cancelled_revenue"]
+    totals["net_units"] = totals["units"] - totals["cancelled_units"]
+
+    products = (
+        ProductDailySales.objects.filter(day__gte=start, day__lte=end)
+        .values("product_id")
+        .annotate(product_name=Max("name"), total_units=Sum("units"), total_revenue=Sum("revenue"))
+        .filter(total_units__gt=0)
+        .order_by("-total_revenue", "product_id")[:top]
+    )
+    return {
+        "totals": totals,
+        "statuses": [(label, totals[STATUS_FIELDS[status]]) for status, label in Order.STATUS_CHOICES],
+        "daily": list(daily.order_by("-day")),
+        "products": list(products),
+    }
@@ -0,0 +1,31 @@
+# ============================================================
+# orders/signals.py  —  GRİWEAR
+# Amaç: sipariş sayısı cache'ini (counts.py) güncel tutmak
+# ============================================================
+
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counts
+from .models import Order
+
+
+# post_init: yüklenen siparişin sahibi saklanır; admin'den başka kullanıcıya
+# taşınırsa iki kullanıcının sayısı da değişir. Durum değişikliği atlanır.
+@receiver(post_init, sender=Order)
+def remember_owner(sender, instance, **kwargs):
+    instance._counted_user_id = instance.__dict__.get("user_id")
+
+
+@receiver(post_save, sender=Order)
+def invalidate_count_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance._counted_user_id != instance.user_id:
+        counts.invalidate(instance._counted_user_id, instance.user_id)
+    instance._counted_user_id = instance.user_id
+
+
+@receiver(post_delete, sender=Order)
+def invalidate_count_on_delete(sender, instance, **kwargs):
+    counts.invalidate(instance.user_id)
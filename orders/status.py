@@ -0,0 +1,102 @@
+# ============================================================
+# orders/status.py  —  SİPARİŞ DURUM GEÇİŞLERİ (tek merkez)
+# ============================================================
+# NEDEN?
+# - Order.status eskiden her yerde doğrudan güncelleniyordu (iptal
+#   view'ı, admin aksiyonları); zaman damgası yoktu, "teslim edilmiş
+#   sipariş tekrar hazırlanıyor" gibi geçersiz hamleler de mümkündü.
+# - Artık tüm durum yazımları transition() ile:
+#     1 SELECT  (geçişe uygun siparişler; kötümser modda kilitli)
+#     1 UPDATE  (status IN kaynaklar → hedef; koşullu)
+#     1 INSERT  (OrderStatusEvent, tek bulk_create)
+#   Sipariş sayısından bağımsız; 500 siparişlik admin seçimi de 3 sorgu.
+#
+# Kullanım:
+#   ids = status.transition(order_ids, Order.STATUS_SHIPPED, actor=request.user)
+#   → geçişi yapılan sipariş id'leri (uygun olmayanlar sessizce atlanır)
+#   status.transition_order(order, Order.STATUS_CANCELLED)
+#   → tek sipariş; geçersizse InvalidTransition
+#
+# Eşzamanlılık: STOCK_CONCURRENCY iyimser ise kilit yok; okuma ile yazma
+# arasında durumu değişen sipariş varsa StockConflict → çağıran
+# inventory.retrying(...) ile baştan dener.
+
+from catalog import inventory
+
+from . import tasks
+from .models import Order, OrderStatusEvent
+
+# kaynak → gidilebilecek durumlar
+# shipped → pending: yanlışlıkla "kargoya verildi" yapılanı geri almak için
+TRANSITIONS = {
+    Order.STATUS_PENDING: {Order.STATUS_SHIPPED, Order.STATUS_CANCELLED},
+    Order.STATUS_SHIPPED: {Order.STATUS_DELIVERED, Order.STATUS_PENDING},
+    Order.STATUS_DELIVERED: set(),
+    Order.STATUS_CANCELLED: set(),
+}
+
+
+class InvalidTransition(Exception):
+    def __init__(self, from_status, to_status):
+        super().__init__(f"Geçersiz durum geçişi: {from_status} → {to_status}")
+        self.from_status = from_status
+        self.to_status = to_status
+
+
+def can_transition(from_status, to_status):
+    return to_status in TRANSITIONS.get(from_status, ())
+
+
+def sources(to_status):
+    # Hedefe gidilebilen durumlar
+    return [status for status, targets in TRANSITIONS.items() if to_status in targets]
+
+
+def record(rows, actor=None):
+    # rows: (order_id, from_status, to_status) — tek bulk_create
+    # + iş kuyruğuna (orders/tasks.py, commit sonrası): müşteri bildirimi
+    # ve satış özetlerinin güncellenmesi (orders/reports.py). Checkout,
+    # iptal ve admin aksiyonlarının hepsi buradan geçer.
+    rows = list(rows)
+    OrderStatusEvent.objects.bulk_create([
+        OrderStatusEvent(order_id=order_id, from_status=from_status, to_status=to_status, actor=actor)
+        for order_id, from_status, to_status in rows
+    ])
+    tasks.enqueue(
+        tasks.ORDER_STATUS_EMAIL,
+        *[{"order_id": order_id, "status": to_status} for order_id, _, to_status in rows],
+    )
+    if rows:
+        tasks.enqueue(tasks.SALES_ROLLUP, {})
+
+
+def transition(order_ids, to_status, actor=None):
+    allowed = sources(to_status)
+    if not allowed:
+        return []
+
+    candidates = Order.objects.filter(id__in=list(order_ids), status__in=allowed)
+    if not inventory.optimistic():
+        candidates = candidates.select_for_update()
+    rows = list(candidates.order_by().values_list("id", "status"))
+    if not rows:
+        return []
+
+    ids = [order_id for order_id, _ in rows]
+    updated = Order.objects.filter(id__in=ids, status__in=allowed).update(status=to_status)
+    if updated != len(rows):
+        # İyimser mod: arada başka biri durumu değiştirdi
+        raise inventory.StockConflict()
+
+    record([(order_id, from_status, to_status) for order_id, from_status in rows], actor=actor)
+    return ids
+
+
+def transition_order(order, to_status, actor=None):
+    if not can_transition(order.status, to_status):
+        raise InvalidTransition(order.status, to_status)
+    if not transition([order.pk], to_status, actor=actor):
+        # Okunduğundan beri durumu değişmiş (eşzamanlı iptal / kargolama)
+        raise InvalidTransition(order.status, to_status)
+    order.status = to_status
+    return order
@@ -0,0 +1,198 @@
+# ============================================================
+# orders/tasks.py  —  GRİWEAR İŞ KUYRUĞU (veritabanı tabanlı)
+# ============================================================
+# NEDEN?
+# - Checkout ve admin durum aksiyonlarından sonra yapılacak işler
+#   (bildirim e-postası; ileride fatura PDF'i vb.) isteği bekletmesin.
+# - İş Task tablosuna yazılır, run_worker komutu alıp çalıştırır.
+#   Harici broker (Redis/RabbitMQ) yok.
+#
+# Kuyruğa ekleme:
+#   tasks.enqueue(tasks.ORDER_STATUS_EMAIL, {"order_id": 9, "status": "shipped"}, ...)
+#   → transaction.on_commit ile, tek bulk_create. İşlem geri alınırsa iş
+#     hiç yazılmaz; siparişin kilitli transaction'ı da uzamaz.
+#
+# Alma (claim) — aynı anda çalışan birden çok worker güvenli:
+#   1 SELECT  (sırada + zamanı gelmiş; destekleyen DB'de
+#              select_for_update(skip_locked) → başka worker'ın
+#              kilitlediği satırlar atlanır, beklenmez)
+#   1 UPDATE  ("hâlâ queued ise" running + bu alıma özel claimed_by)
+#   1 SELECT  (claimed_by ile: gerçekten bu worker'a düşenler)
+#   Kilit desteklemeyen DB'de (SQLite) koşullu UPDATE tek başına yeter:
+#   aynı satırı iki worker alamaz.
+#
+# Hata: iş, TASK_MAX_ATTEMPTS dolana kadar giderek uzayan ve rastgele
+# bekleme (TASK_RETRY_BACKOFF saniye'den) sonrası tekrar sıraya girer;
+# sonra "failed" kalır (admin'den görülür). Çöken worker'ın işi
+# TASK_CLAIM_TIMEOUT sonra sıraya geri döner (requeue_stale); deneme
+# hakkı dolmuşsa o da "failed" olur.
+# DİKKAT: iş en az bir kez çalışır → görevler tekrar çalışmaya dayanıklı
+# yazılmalı.
+
+import logging
+import random
+import secrets
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import reports
+from .models import Order, Task
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BACKOFF = 30  # saniye; her denemede iki katına çıkar
+MAX_RETRY_BACKOFF = 60 * 60
+DEFAULT_CLAIM_TIMEOUT = 10 * 60
+
+BULK_BATCH_SIZE = 1000
+
+# Görev adları
+ORDER_STATUS_EMAIL = "orders.status_email"
+SALES_ROLLUP = "orders.sales_rollup"
+
+HANDLERS = {}
+
+
+def task(name):
+    # Görev kaydı: @task(ORDER_STATUS_EMAIL) → worker adıyla bulur
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, *payloads):
+    if name not in HANDLERS:
+        raise ValueError(f"Bilinmeyen görev: {name}")
+    rows = [Task(name=name, payload=dict(payload)) for payload in payloads]
+    if rows:
+        transaction.on_commit(lambda: Task.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE))
+
+
+def _max_attempts():
+    return max(getattr(settings, "TASK_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS), 1)
+
+
+def _retry_delay(attempt):
+    # attempt: 1'den başlar. "Full jitter" — aynı anda düşen işler aynı
+    # anda yeniden denenmez
+    base = getattr(settings, "TASK_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF)
+    return timedelta(seconds=random.uniform(0, min(base * 2 ** (attempt - 1), MAX_RETRY_BACKOFF)))
+
+
+def claim(worker, limit=10):
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.STATUS_QUEUED, run_at__lte=now).order_by("run_at", "id")
+    token = f"{worker}:{secrets.token_hex(4)}"[:64]
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list("id", flat=True)[:limit])
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids, status=Task.STATUS_QUEUED).update(
+            status=Task.STATUS_RUNNING, claimed_by=token, claimed_at=now, attempts=F("attempts") + 1,
+        )
+    return list(Task.objects.filter(claimed_by=token).order_by("run_at", "id"))
+
+
+def requeue_stale():
+    # ------------------------------------------------------------
+    # Çalışırken çöken / öldürülen worker'ın işleri sıraya geri döner.
+    # Deneme hakkı bitmiş iş "failed" olur: worker'ı her seferinde
+    # düşüren (bellek, segfault) iş sonsuza kadar dönmesin.
+    # Dönüş: sıraya geri alınan iş sayısı
+    # ------------------------------------------------------------
+    timeout = getattr(settings, "TASK_CLAIM_TIMEOUT", DEFAULT_CLAIM_TIMEOUT)
+    now = timezone.now()
+    stale = Task.objects.filter(status=Task.STATUS_RUNNING, claimed_at__lt=now - timedelta(seconds=timeout))
+    failed = stale.filter(attempts__gte=_max_attempts()).update(
+        status=Task.STATUS_FAILED, claimed_by="", finished_at=now,
+        last_error=f"Worker {timeout} saniyede bitirmedi; deneme hakkı doldu.",
+    )
+    if failed:
+        logger.warning("Deneme hakkı dolan %s yarım kalmış iş failed yapıldı", failed)
+    return stale.update(status=Task.STATUS_QUEUED, claimed_by="", claimed_at=None)
+
+
+def run(task_row):
+    # Dönüş: True (bitti) / False (hata; tekrar sıraya girdi veya failed)
+    mine = Task.objects.filter(pk=task_row.pk, claimed_by=task_row.claimed_by)
+    try:
+        handler = HANDLERS.get(task_row.name)
+        if handler is None:
+            raise LookupError(f"Bilinmeyen görev: {task_row.name}")
+        handler(**task_row.payload)
+    except Exception as exc:
+        logger.warning("Görev hata verdi: %s (deneme %s)", task_row, task_row.attempts, exc_info=True)
+        error = "".join(traceback.format_exception(exc))[-4000:]
+        if task_row.attempts >= _max_attempts():
+            mine.update(status=Task.STATUS_FAILED, last_error=error, finished_at=timezone.now(), claimed_by="")
+        else:
+            mine.update(
+                status=Task.STATUS_QUEUED, last_error=error, claimed_by="", claimed_at=None,
+                run_at=timezone.now() + _retry_delay(task_row.attempts),
+            )
+        return False
+
+    mine.update(status=Task.STATUS_DONE, finished_at=timezone.now(), last_error="", claimed_by="")
+    return True
+
+
+def work(worker, batch_size=10):
+    # Bir tur: al + çalıştır. Dönüş: (alınan, başarılı)
+    claimed = claim(worker, limit=batch_size)
+    done = sum(run(task_row) for task_row in claimed)
+    return len(claimed), done
+
+
+def purge(before, batch_size=5000):
+    # Bitmiş işleri sil (tablo büyümesin); failed olanlar incelemek için kalır
+    deleted = 0
+    while True:
+        ids = list(
+            Task.objects.filter(status=Task.STATUS_DONE, finished_at__lt=before)
+            .order_by()
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(id__in=ids).delete()[0]
+
+
+# ============================================================
+# GÖREVLER
+# ============================================================
+@task(ORDER_STATUS_EMAIL)
+def send_status_email(order_id, status):
+    # Sipariş silinmiş / kullanıcının e-postası yoksa yapacak iş yok
+    rows = list(
+        Order.objects.filter(pk=order_id, user__isnull=False)
+        .exclude(user__email="")
+        .values_list("user__email", "full_name")[:1]
+    )
+    if not rows:
+        return
+    email, full_name = rows[0]
+    label = dict(Order.STATUS_CHOICES).get(status, status)
+    send_mail(
+        f"GriWear sipariş #{order_id}: {label}",
+        f"Merhaba {full_name},\n\n#{order_id} numaralı siparişinizin durumu: {label}.\n\nGriWear",
+        None,
+        [email],
+    )
+
+
+@task(SALES_ROLLUP)
+def apply_sales_rollup():
+    # Bekleyen tüm durum olaylarını satış özetlerine işler (orders/reports.py);
+    # aynı anda birden çok kuyruğa düşse de olaylar bir kez işlenir
+    reports.apply_pending()
+
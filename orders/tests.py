@@ -1,3 +1,630 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog import inventory, ledger
+from catalog.models import Category, InventoryMovement, Product, StockReservation
+from catalog.pagination import encode_cursor
+from catalog.tests import QueryPlanMixin
+
+from . import reports, status, tasks
+from .models import DailySales, Order, OrderItem, OrderStatusEvent, ProductDailySales, Task
+
+
+# ============================================================
+# QUERY PLAN REGRESYON TESTLERİ (orders view'ları)
+# ============================================================
+# Kurallar catalog/tests.py'deki QueryPlanMixin ile aynı:
+# tam tablo taraması ve index dışı sıralama yasak.
+class OrdersQueryPlanTests(QueryPlanMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = User.objects.create_user("gri_kurt", password="x")
+        other = User.objects.create_user("baskasi", password="x")
+
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.products = [
+            Product.objects.create(category=category, name=f"Kol Düğmesi {i}", slug=f"kol-{i}", price=50, stock=10)
+            for i in range(3)
+        ]
+
+        for owner in (cls.user, other):
+            for i in range(5):
+                order = Order.objects.create(user=owner, full_name="Taner Şahin", address="İstanbul", total=100)
+                OrderItem.objects.create(
+                    order=order, product_id=cls.products[0].id, name="Kol Düğmesi", quantity=2, unit_price=50
+                )
+        cls.order = Order.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_my_orders(self):
+        self.assertViewPlansIndexed(reverse("orders:my_orders"))
+
+    def test_my_orders_next_page(self):
+        after = Order.objects.filter(user=self.user).order_by("-created_at", "-id")[1]
+        self.assertViewPlansIndexed(reverse("orders:my_orders") + "?after=" + encode_cursor(after))
+
+    def test_order_detail(self):
+        self.assertViewPlansIndexed(reverse("orders:order_detail", args=[self.order.id]))
+
+    def test_success(self):
+        self.assertViewPlansIndexed(reverse("orders:success", args=[self.order.id]))
+
+    def test_checkout_page(self):
+        session = self.client.session
+        session["cart"] = {str(p.id): {"qty": 1} for p in self.products}
+        session.save()
+        self.assertViewPlansIndexed(reverse("orders:checkout"))
+
+    def test_pending_older_than_uses_status_index(self):
+        # Operasyon sorusu: "24 saatten eski bekleyen" → (status, created_at)
+        cutoff = timezone.now() - timedelta(hours=24)
+        with CaptureQueriesContext(connection) as ctx:
+            list(Order.objects.filter(status=Order.STATUS_PENDING, created_at__lt=cutoff).order_by("created_at"))
+        sql = ctx.captured_queries[0]["sql"]
+        self.assertIndexedPlan(sql)
+        self.assertIn("order_status_created_idx", " ".join(self.explain(sql)))
+
+
+# ============================================================
+# CHECKOUT — fiyatlama ve stok düşümü
+# ============================================================
+class CheckoutTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("gri_kurt", password="x")
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.products = [
+            Product.objects.create(category=category, name="Çorap", slug="corap", price="33.33", stock=5),
+            Product.objects.create(category=category, name="Bere", slug="bere", price="19.99", stock=2),
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["cart"] = {str(self.products[0].id): {"qty": 3}, str(self.products[1].id): {"qty": 2}}
+        session.save()
+
+    def checkout(self):
+        return self.client.post(reverse("orders:checkout"), {
+            "full_name": "Taner Şahin", "phone": "555", "address": "İstanbul",
+        })
+
+    def test_cart_and_checkout_totals_match(self):
+        cart_total = self.client.get(reverse("cart:detail")).context["total"]
+        checkout_total = self.client.get(reverse("orders:checkout")).context["total"]
+        self.assertEqual(cart_total, checkout_total)
+        self.assertEqual(str(checkout_total), "139.97")
+
+    def test_checkout_reads_products_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.checkout()
+        self.assertEqual(response.status_code, 302)
+
+        full_reads = [q["sql"] for q in ctx.captured_queries if '"catalog_product"."name"' in q["sql"]]
+        self.assertEqual(len(full_reads), 1, full_reads)
+
+        order = Order.objects.get(user=self.user)
+        self.assertEqual(str(order.total), "139.97")
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [0, 2])
+
+    def test_checkout_converts_holds_without_touching_products(self):
+        session = self.client.session
+        del session["cart"]
+        session.save()
+        for _ in range(3):
+            self.client.post(reverse("cart:add", args=[self.products[0].id]))
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 2)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.checkout()
+        product_writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "catalog_product"')]
+        self.assertEqual(product_writes, [])
+
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 2)
+        self.assertFalse(StockReservation.objects.exists())
+        self.assertEqual(Order.objects.get(user=self.user).items.get().quantity, 3)
+
+    def test_oversell_rolls_back_everything(self):
+        session = self.client.session
+        session["cart"][str(self.products[1].id)] = {"qty": 3}
+        session.save()
+
+        response = self.checkout()
+        self.assertRedirects(response, reverse("cart:detail"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [2, 5])
+
+    def test_write_statements_do_not_grow_with_basket(self):
+        def writes():
+            with CaptureQueriesContext(connection) as ctx:
+                self.checkout()
+            return [q["sql"].split()[0] for q in ctx.captured_queries if q["sql"].split()[0] in ("INSERT", "UPDATE")]
+
+        two_lines = writes()
+
+        session = self.client.session
+        session["cart"] = {str(self.products[0].id): {"qty": 1}}
+        session.save()
+        one_line = writes()
+
+        self.assertEqual(len(two_lines), len(one_line))
+
+    def test_repeated_post_returns_original_order(self):
+        token = self.client.get(reverse("orders:checkout")).context["checkout_token"]
+        data = {"full_name": "Taner Şahin", "phone": "555", "address": "İstanbul", "checkout_token": token}
+
+        first = self.client.post(reverse("orders:checkout"), data)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.post(reverse("orders:checkout"), data)
+
+        self.assertEqual(first["Location"], second["Location"])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [0, 2])
+        statements = [q["sql"].split()[0] for q in ctx.captured_queries]
+        self.assertNotIn("INSERT", statements)
+        self.assertNotIn("UPDATE", statements)
+
+    def test_token_of_another_user_starts_fresh_checkout(self):
+        other = get_user_model().objects.create_user("baska", password="x")
+        theirs = Order.objects.create(user=other, full_name="Başka", address="Ankara", total=1, checkout_token="ortak")
+        data = {"full_name": "Taner Şahin", "phone": "555", "address": "İstanbul", "checkout_token": "ortak"}
+
+        response = self.client.post(reverse("orders:checkout"), data)
+
+        order = Order.objects.get(user=self.user)
+        self.assertRedirects(response, reverse("orders:success", args=[order.id]), fetch_redirect_response=False)
+        self.assertNotIn(order.checkout_token, ("ortak", None))
+        self.assertEqual(Order.objects.get(pk=theirs.pk).user, other)
+
+    def test_token_taken_concurrently_by_another_user(self):
+        other = get_user_model().objects.create_user("baska", password="x")
+        theirs = Order.objects.create(user=other, full_name="Başka", address="Ankara", total=1, checkout_token="ortak")
+        data = {"full_name": "Taner Şahin", "phone": "555", "address": "İstanbul", "checkout_token": "ortak"}
+
+        # Ön kontrol token'ı boş görür (öteki sipariş henüz commit olmamış gibi)
+        with mock.patch("orders.views._token_order", side_effect=[None, (theirs.pk, other.pk)]):
+            response = self.client.post(reverse("orders:checkout"), data)
+
+        self.assertRedirects(response, reverse("orders:checkout"), fetch_redirect_response=False)
+        self.assertFalse(Order.objects.filter(user=self.user).exists())
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [2, 5])
+
+    def test_cancel_restores_stock_once(self):
+        self.checkout()
+        order = Order.objects.get(user=self.user)
+        url = reverse("orders:cancel_order", args=[order.id])
+
+        self.client.post(url)
+        self.client.post(url)
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, Order.STATUS_CANCELLED)
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [2, 5])
+
+        # Defter: satış + iptal hareketleri, stokla uyuşuyor
+        kinds = sorted(InventoryMovement.objects.filter(order_id=order.id).values_list("kind", "quantity"))
+        self.assertEqual(kinds, [("cancel", 2), ("cancel", 3), ("sale", -3), ("sale", -2)])
+        self.assertEqual(ledger.reconcile([p.pk for p in self.products]), {})
+
+    def test_cancel_loses_race_with_shipping(self):
+        # İptal okuduktan sonra admin kargoya verdi: 500 değil uyarı
+        self.checkout()
+        order = Order.objects.get(user=self.user)
+        transition = status.transition
+
+        def shipped_meanwhile(*args, **kwargs):
+            Order.objects.filter(pk=order.pk).update(status=Order.STATUS_SHIPPED)
+            if inventory.optimistic():
+                raise inventory.StockConflict()
+            return transition(*args, **kwargs)
+
+        with mock.patch.object(status, "transition", side_effect=shipped_meanwhile):
+            response = self.client.post(reverse("orders:cancel_order", args=[order.id]), follow=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "iptal edilemez")
+        self.assertEqual(Order.objects.get(pk=order.pk).status, Order.STATUS_SHIPPED)
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [0, 2])
+
+    def test_admin_change_form_cannot_edit_status(self):
+        self.checkout()
+        order = Order.objects.get(user=self.user)
+        admin = get_user_model().objects.create_superuser("yonetici", password="x")
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse("admin:orders_order_change", args=[order.id]))
+        self.assertNotIn("status", response.context["adminform"].form.fields)
+        self.assertNotIn("total", response.context["adminform"].form.fields)
+
+    def test_admin_cancel_restores_stock_in_bulk(self):
+        self.checkout()
+        order = Order.objects.get(user=self.user)
+        admin = get_user_model().objects.create_superuser("yonetici", password="x")
+        self.client.force_login(admin)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("admin:orders_order_changelist"), {
+                "action": "cancel_orders_with_stock", "_selected_action": [order.id],
+            })
+        product_writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "catalog_product"')]
+
+        self.assertEqual(len(product_writes), 1)
+        self.assertEqual(Order.objects.get(pk=order.pk).status, Order.STATUS_CANCELLED)
+        self.assertEqual(sorted(Product.objects.values_list("stock", flat=True)), [2, 5])
+        self.assertEqual(ledger.reconcile([p.pk for p in self.products]), {})
+
+
+# Aynı senaryolar iyimser modda (CAS + yeniden deneme, kilit yok)
+@override_settings(STOCK_CONCURRENCY="optimistic", STOCK_CAS_BACKOFF=0)
+class OptimisticCheckoutTests(CheckoutTests):
+    pass
+
+
+# ============================================================
+# NAVBAR SİPARİŞ SAYISI — cache'ten, katalogda sorgusuz
+# ============================================================
+class OrdersCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("gri_kurt", password="x")
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.product = Product.objects.create(category=category, name="Bere", slug="bere", price="19.99", stock=5)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def order_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("catalog:product_list"))
+        return response, [q["sql"] for q in ctx.captured_queries if "orders_order" in q["sql"]]
+
+    def test_catalog_page_counts_once_then_reads_cache(self):
+        response, queries = self.order_queries()
+        self.assertEqual(len(queries), 1)
+        response, queries = self.order_queries()
+        self.assertEqual(queries, [])
+        self.assertEqual(response.context["orders_count"], 0)
+
+    def test_new_order_refreshes_count(self):
+        self.order_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("cart:add", args=[self.product.id]))
+            self.client.post(reverse("orders:checkout"), {
+                "full_name": "Taner Şahin", "phone": "555", "address": "İstanbul",
+            })
+        response, _ = self.order_queries()
+        self.assertContains(response, '<span class="badge text-bg-dark ms-1">1</span>', html=True)
+
+
+# ============================================================
+# SİPARİŞLERİM — keyset sayfalama, sayfa başına sabit sorgu
+# ============================================================
+class MyOrdersTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("gri_kurt", password="x")
+        for i in range(25):
+            order = Order.objects.create(user=cls.user, full_name="Taner Şahin", address="İstanbul", total=100)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=1, name=f"Çorap {i}", quantity=2, unit_price=30),
+                OrderItem(order=order, product_id=2, name="Bere", quantity=1, unit_price=40),
+            ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_have_fixed_query_budget(self):
+        with CaptureQueriesContext(connection) as first_ctx:
+            first = self.client.get(reverse("orders:my_orders"))
+        orders = first.context["orders"]
+        self.assertEqual(len(orders), 20)
+        self.assertEqual((orders[0].item_count, orders[0].line_count, orders[0].first_item_name), (3, 2, "Çorap 24"))
+        self.assertContains(first, "ve 1 ürün daha")
+
+        with CaptureQueriesContext(connection) as second_ctx:
+            second = self.client.get(reverse("orders:my_orders") + first.context["next_page"])
+        self.assertEqual(len(second.context["orders"]), 5)
+        self.assertEqual(second.context["next_page"], "")
+        self.assertEqual(len(first_ctx.captured_queries), len(second_ctx.captured_queries))
+
+    def test_order_detail_prefetches_items(self):
+        order = Order.objects.filter(user=self.user).order_by("pk")[0]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("orders:order_detail", args=[order.id]))
+        self.assertContains(response, "Çorap 0")
+        item_queries = [q["sql"] for q in ctx.captured_queries if "orders_orderitem" in q["sql"]]
+        self.assertEqual(len(item_queries), 1)
+
+
+# ============================================================
+# ADMIN TOPLU İPTAL — parça başına sabit sayıda cümle
+# ============================================================
+@override_settings(ORDER_CANCEL_CHUNK_SIZE=3)
+class AdminBulkCancelTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser("yonetici", password="x")
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        cls.products = [
+            Product.objects.create(category=category, name="Çorap", slug="corap", price=10, stock=0),
+            Product.objects.create(category=category, name="Bere", slug="bere", price=20, stock=0),
+        ]
+        cls.orders = []
+        for i in range(7):
+            order = Order.objects.create(full_name="Taner Şahin", address="İstanbul", total=50)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=cls.products[0].id, name="Çorap", quantity=2, unit_price=10),
+                OrderItem(order=order, product_id=cls.products[1].id, name="Bere", quantity=1, unit_price=20),
+            ])
+            cls.orders.append(order)
+        Order.objects.filter(pk=cls.orders[0].pk).update(status=Order.STATUS_SHIPPED)
+
+    def test_cancel_in_chunks(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("admin:orders_order_changelist"), {
+                "action": "cancel_orders_with_stock", "_selected_action": [o.id for o in self.orders],
+            })
+
+        # 6 pending sipariş → 3'lük 2 parça → ürün tablosuna 2 UPDATE
+        product_writes = [q for q in ctx.captured_queries if q["sql"].startswith('UPDATE "catalog_product"')]
+        self.assertEqual(len(product_writes), 2)
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_CANCELLED).count(), 6)
+        self.assertEqual(Order.objects.get(pk=self.orders[0].pk).status, Order.STATUS_SHIPPED)
+        self.assertEqual(list(Product.objects.order_by("pk").values_list("stock", flat=True)), [12, 6])
+        self.assertEqual(InventoryMovement.objects.filter(kind="cancel").count(), 12)
+
+
+# ============================================================
+# DURUM GEÇİŞLERİ + GEÇMİŞ (orders/status.py)
+# ============================================================
+class OrderStatusTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser("yonetici", password="x")
+        cls.orders = [
+            Order.objects.create(full_name="Taner Şahin", address="İstanbul", total=50) for _ in range(4)
+        ]
+        Order.objects.filter(pk=cls.orders[0].pk).update(status=Order.STATUS_DELIVERED)
+
+    def events(self, order):
+        return list(
+            OrderStatusEvent.objects.filter(order=order).order_by("id").values_list("from_status", "to_status")
+        )
+
+    def test_transition_skips_invalid_moves(self):
+        moved = status.transition([o.pk for o in self.orders], Order.STATUS_SHIPPED)
+
+        self.assertEqual(sorted(moved), [o.pk for o in self.orders[1:]])
+        self.assertEqual(Order.objects.get(pk=self.orders[0].pk).status, Order.STATUS_DELIVERED)
+        self.assertEqual(self.events(self.orders[1]), [(Order.STATUS_PENDING, Order.STATUS_SHIPPED)])
+        self.assertEqual(self.events(self.orders[0]), [])
+
+    def test_transition_order_rejects_invalid_move(self):
+        with self.assertRaises(status.InvalidTransition):
+            status.transition_order(self.orders[0], Order.STATUS_PENDING)
+        with self.assertRaises(status.InvalidTransition):
+            status.transition_order(self.orders[1], Order.STATUS_DELIVERED)
+
+    def test_admin_action_writes_history_in_bulk(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(reverse("admin:orders_order_changelist"), {
+                "action": "mark_shipped", "_selected_action": [o.id for o in self.orders],
+            })
+
+        writes = [q["sql"].split()[0] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE"))]
+        self.assertEqual(writes.count("UPDATE"), 1)
+        self.assertEqual(OrderStatusEvent.objects.filter(to_status=Order.STATUS_SHIPPED).count(), 3)
+        self.assertEqual(OrderStatusEvent.objects.get(order=self.orders[1]).actor, self.admin)
+
+    def test_checkout_and_cancel_are_recorded(self):
+        user = get_user_model().objects.create_user("gri_kurt", password="x")
+        category = Category.objects.create(name="Aksesuar", slug="aksesuar")
+        product = Product.objects.create(category=category, name="Çorap", slug="corap", price=10, stock=5)
+        self.client.force_login(user)
+        session = self.client.session
+        session["cart"] = {str(product.id): {"qty": 1}}
+        session.save()
+        self.client.post(reverse("orders:checkout"), {"full_name": "Taner Şahin", "phone": "", "address": "İstanbul"})
+        order = Order.objects.get(user=user)
+
+        self.client.post(reverse("orders:cancel_order", args=[order.id]))
+
+        self.assertEqual(self.events(order), [
+            ("", Order.STATUS_PENDING), (Order.STATUS_PENDING, Order.STATUS_CANCELLED),
+        ])
+
+
+# ============================================================
+# İŞ KUYRUĞU (orders/tasks.py + run_worker)
+# ============================================================
+@override_settings(TASK_MAX_ATTEMPTS=2, TASK_RETRY_BACKOFF=60)
+class TaskQueueTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("gri_kurt", email="kurt@example.com", password="x")
+        cls.order = Order.objects.create(user=cls.user, full_name="Taner Şahin", address="İstanbul", total=50)
+
+    def flaky(self):
+        calls = []
+
+        def handler(**payload):
+            calls.append(payload)
+            raise RuntimeError("SMTP kapalı")
+
+        tasks.task("test.flaky")(handler)
+        self.addCleanup(tasks.HANDLERS.pop, "test.flaky")
+        return calls
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    tasks.enqueue(tasks.ORDER_STATUS_EMAIL, {"order_id": self.order.id, "status": "shipped"})
+                    raise RuntimeError("geri al")
+            except RuntimeError:
+                pass
+        self.assertFalse(Task.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            status.transition([self.order.id], Order.STATUS_SHIPPED)
+        self.assertEqual(
+            list(Task.objects.order_by("id").values_list("name", "payload")),
+            [
+                (tasks.ORDER_STATUS_EMAIL, {"order_id": self.order.id, "status": Order.STATUS_SHIPPED}),
+                (tasks.SALES_ROLLUP, {}),
+            ],
+        )
+
+    def test_claim_hands_each_task_to_one_worker(self):
+        Task.objects.bulk_create([Task(name=tasks.ORDER_STATUS_EMAIL) for _ in range(3)])
+
+        first = tasks.claim("w1", limit=2)
+        second = tasks.claim("w2", limit=2)
+
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({t.id for t in first} & {t.id for t in second})
+        self.assertEqual(tasks.claim("w3"), [])
+
+    def test_failed_task_backs_off_then_gives_up(self):
+        calls = self.flaky()
+        Task.objects.create(name="test.flaky", payload={"order_id": 1})
+
+        with self.assertLogs("orders.tasks", "WARNING"):
+            self.assertEqual(tasks.work("w1"), (1, 0))
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts), (Task.STATUS_QUEUED, 1))
+        self.assertIn("SMTP kapalı", task.last_error)
+        self.assertGreater(task.run_at, timezone.now() - timedelta(seconds=1))
+
+        # Zamanı gelmeden alınmaz; gelince ikinci (son) deneme → failed
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("orders.tasks", "WARNING"):
+            self.assertEqual(tasks.work("w1"), (1, 0))
+        self.assertEqual(Task.objects.get().status, Task.STATUS_FAILED)
+        self.assertEqual(calls, [{"order_id": 1}, {"order_id": 1}])
+
+    def test_stale_claim_is_requeued(self):
+        Task.objects.create(name=tasks.ORDER_STATUS_EMAIL)
+        tasks.claim("olen-worker")
+        Task.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(tasks.requeue_stale(), 1)
+        self.assertEqual(len(tasks.claim("w2")), 1)
+
+    def test_stale_claim_without_attempts_left_fails(self):
+        Task.objects.create(name=tasks.ORDER_STATUS_EMAIL, attempts=1)
+        tasks.claim("olen-worker")
+        Task.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        with self.assertLogs("orders.tasks", "WARNING"):
+            self.assertEqual(tasks.requeue_stale(), 0)
+        task = Task.objects.get()
+        self.assertEqual((task.status, task.attempts, task.claimed_by), (Task.STATUS_FAILED, 2, ""))
+        self.assertIsNotNone(task.finished_at)
+        self.assertEqual(tasks.claim("w2"), [])
+
+    def test_run_worker_sends_status_email(self):
+        Task.objects.create(
+            name=tasks.ORDER_STATUS_EMAIL, payload={"order_id": self.order.id, "status": Order.STATUS_SHIPPED},
+        )
+        call_command("run_worker", "--once", stdout=StringIO())
+
+        self.assertEqual(Task.objects.get().status, Task.STATUS_DONE)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["kurt@example.com"])
+        self.assertIn(f"#{self.order.id}", mail.outbox[0].subject)
+
+
+# ============================================================
+# SATIŞ ÖZETLERİ (orders/reports.py + admin paneli)
+# ============================================================
+class SalesRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser("yonetici", password="x")
+        cls.orders = []
+        for socks, hats in [(2, 1), (1, 0), (3, 2)]:
+            order = Order.objects.create(full_name="Taner Şahin", address="İstanbul", total=socks * 10 + hats * 20)
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=1, name="Çorap", quantity=socks, unit_price=10),
+                *([OrderItem(order=order, product_id=2, name="Bere", quantity=hats, unit_price=20)] if hats else []),
+            ])
+            cls.orders.append(order)
+        status.record([(o.id, "", Order.STATUS_PENDING) for o in cls.orders])
+        status.transition([cls.orders[0].id], Order.STATUS_SHIPPED)
+        status.transition([cls.orders[2].id], Order.STATUS_CANCELLED)
+
+    def snapshot(self):
+        daily = list(DailySales.objects.values_list(
+            "day", "orders", "revenue", "units", "cancelled_revenue", "cancelled_units",
+            "pending", "shipped", "delivered", "cancelled",
+        ))
+        products = sorted(ProductDailySales.objects.values_list("day", "product_id", "units", "revenue"))
+        return daily, products
+
+    def test_incremental_matches_rebuild(self):
+        self.assertEqual(reports.apply_pending(), 5)
+        self.assertEqual(reports.apply_pending(), 0)
+
+        today = timezone.localdate()
+        self.assertEqual(self.snapshot(), (
+            [(today, 3, 120, 9, 70, 5, 1, 1, 0, 1)],
+            [(today, 1, 3, 30), (today, 2, 1, 20)],
+        ))
+
+        incremental = self.snapshot()
+        self.assertEqual(reports.rebuild_day(today), 3)
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rebuild_claims_pending_events(self):
+        reports.rebuild_day(timezone.localdate())
+        self.assertFalse(OrderStatusEvent.objects.filter(rolled_up=False).exists())
+        self.assertEqual(reports.apply_pending(), 0)
+        self.assertEqual(DailySales.objects.get().orders, 3)
+
+    def test_rebuild_command_backfills_orders_without_events(self):
+        OrderStatusEvent.objects.all().delete()
+        call_command("rebuild_sales_rollups", "--all", stdout=StringIO())
+        self.assertEqual(DailySales.objects.get().revenue, 120)
+
+    def test_dashboard_reads_rollups_only(self):
+        reports.apply_pending()
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("admin:orders_order_dashboard"), {"days": 7})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["totals"]["net_revenue"], 50)
+        self.assertEqual([row["product_id"] for row in response.context["products"]], [1, 2])
+        self.assertContains(response, "Çorap")
+        touched = " ".join(q["sql"] for q in ctx.captured_queries)
+        self.assertNotIn('"orders_order"', touched)
+        self.assertNotIn('"orders_orderitem"', touched)
 
-# Create your tests here.
@@ -1,44 +1,143 @@
 # ============================================================
 # orders/views.py  —  GRİWEAR (KİLİTLİ BACKEND)
-# Amaç: Checkout’ta 2. stok kapısı (transaction + select_for_update)
+# Amaç: Checkout’ta 2. stok kapısı (transaction + koşullu stok düşümü)
 # Not: Bu dosyada checkout TEK KEZ var. Kopya view yok.
 # ============================================================
 
+import secrets
+
 from django.contrib import messages
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from catalog.models import Product
+from catalog import inventory, ledger, reservations
+from catalog.pagination import keyset_page, page_query
+from cart import pricing
+from cart.services import CartService
+from . import status
 from .forms import CheckoutForm
 from .models import Order, OrderItem
 from django.views.decorators.http import require_POST
 
 # ============================================================
-# 1) SESSION CART AYARLARI — NEDEN?
+# 1) SEPET — NEDEN CartService?
 # ============================================================
 # Sepet DB’ye yazılmadan önce geçici bir yapıdır.
-# Kullanıcı ekler/çıkarır/adet değiştirir. Bu yüzden session’da tutulur.
-CART_SESSION_KEY = "cart"
+# Nerede tutulduğu (session / DB / cache) settings.CART_BACKEND'e bağlı;
+# checkout sadece CartService üzerinden okur ve temizler.
+# ============================================================
+# IDEMPOTENCY TOKEN — checkout formunda gizli alan
+# ============================================================
+CHECKOUT_TOKEN_FIELD = "checkout_token"
+
+
+def _token_order(token):
+    # (order_id, user_id) veya None — checkout_token unique → index ile tek satır
+    if not token:
+        return None
+    rows = list(Order.objects.filter(checkout_token=token).order_by().values_list("id", "user_id")[:1])
+    return rows[0] if rows else None
 
 
-def _get_cart(session):
+def _out_of_stock_message(request, items, needed):
     # ------------------------------------------------------------
-    # Bu fonksiyon ne yapar?
-    # - session içindeki 'cart' sözlüğünü getirir
-    # - yoksa boş {} döner
+    # Koşullu UPDATE sadece "en az biri yetmedi" der; kullanıcıya hangi
+    # ürün olduğunu göstermek için güncel stoklar (kovalar dahil) okunur.
     # ------------------------------------------------------------
-    return session.get(CART_SESSION_KEY, {})
+    stocks = inventory.levels(needed, active_only=True)
+    for row in items:
+        p = row["product"]
+        need = needed.get(p.id, 0)
+        if not need:
+            continue
+        stock = stocks.get(p.id)
+        if stock is None:
+            messages.error(request, "Bir ürün bulunamadı. Sepeti kontrol et.")
+            return
+        if need > stock:
+            if stock <= 0 and need == row["quantity"]:
+                messages.error(request, f"{p.name} tükendi.")
+            else:
+                messages.warning(
+                    request,
+                    f"{p.name}: stok yetersiz. Maksimum "
+                    f"{stock + row['quantity'] - need} adet alabilirsiniz."
+                )
+            return
+    messages.warning(request, "Stok az önce değişti. Lütfen sepeti kontrol edin.")
 
 
-def _clear_cart(session):
+# ============================================================
+# 4) SİPARİŞ YAZIMI — checkout POST (tek transaction, bkz. 4. KAPI)
+# ============================================================
+def _write_order(form, user, token, items, total, cart_service):
     # ------------------------------------------------------------
-    # Bu fonksiyon ne yapar?
-    # - Sipariş tamamlandıktan sonra sepeti session’dan siler
-    # - session.modified = True ile değişikliği kaydettirir
+    # 4A) SEPETİN STOK TUTMALARI (catalog/reservations.py)
+    # Sepete eklerken stok zaten tutuldu → tutmanın karşıladığı adet
+    # için ürün satırına dokunulmaz. Sadece eksik kalan (tutma süresi
+    # dolup geri alınmışsa) kısım stoktan düşülür.
     # ------------------------------------------------------------
-    if CART_SESSION_KEY in session:
-        del session[CART_SESSION_KEY]
-        session.modified = True
+    cart_key = cart_service.key()
+    holds = reservations.lock_holds(cart_key) if reservations.enabled() else {}
+    needed = {
+        row["product"].id: row["quantity"] - min(row["quantity"], holds.get(row["product"].id, 0))
+        for row in items
+    }
+
+    # ------------------------------------------------------------
+    # 4B) ✅ ORDER OLUŞTUR (Sipariş başlığı)
+    # Order: user + total + form bilgileri (adres/telefon vs.)
+    # Yeniden denemede geri alınan önceki denemenin id'si kullanılmaz
+    # ------------------------------------------------------------
+    order = form.save(commit=False)
+    order.pk = None
+    order._state.adding = True
+    order.user = user
+    order.total = total
+    order.checkout_token = token or None
+    order.save()
+    # Durum geçmişinin ilk satırı: oluşturma ("" → pending)
+    status.record([(order.id, "", Order.STATUS_PENDING)], actor=user)
+
+    # ================================================
+    # 4C) ✅ ORDERITEM OLUŞTUR — TEK bulk_create
+    # ================================================
+    # Snapshot mantığı:
+    # - sipariş anındaki ürün adı ve fiyatı kaydedilir
+    # - yarın fiyat değişse bile geçmiş sipariş bozulmaz
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product_id=row["product"].id,
+            name=row["product"].name,
+            quantity=row["quantity"],
+            unit_price=row["unit_price"],
+        )
+        for row in items
+    ])
+
+    # ------------------------------------------------
+    # 4D) ✅ STOK DÜŞ — TEK koşullu UPDATE (catalog/inventory.py)
+    # En sona konur: ürün satırlarının yazma kilidi commit'e kadar en
+    # kısa süre tutulur. Yetmeyen ürün varsa OutOfStock → her şey geri
+    # alınır.
+    # ------------------------------------------------
+    inventory.decrement(needed)
+
+    # Tutmalar siparişe çevrildi: silinir, fazlası stoğa döner
+    ordered = {row["product"].id: row["quantity"] for row in items}
+    reservations.convert(cart_key, ordered, holds)
+
+    # Stok defteri: satış hareketleri (tutmadan gelen dahil, tek bulk_create)
+    ledger.record(ledger.SALE, ordered, order_id=order.id)
+
+    # ------------------------------------------------
+    # 4E) ✅ SEPETİ TEMİZLE
+    # ------------------------------------------------
+    cart_service.clear()
+    return order
 
 
 # ============================================================
@@ -50,10 +149,28 @@ def _clear_cart(session):
 # - güvenlik: herkes herkesin siparişini göremez
 @login_required
 def checkout(request):
+    # ------------------------------------------------------------
+    # 2-0) TEKRAR GÖNDERİM Mİ? (idempotency, bkz. Order.checkout_token)
+    # Bu token ile sipariş zaten yazıldıysa: kilit yok, sepet yok,
+    # doğrudan ilk siparişin sayfasına.
+    # Token BAŞKA kullanıcının siparişindeyse (kopyalanmış form vb.):
+    # o siparişe yönlendirilmez, bu istek yeni token'la yeni checkout
+    # sayılır (yoksa unique kısıtı IntegrityError → 500 verirdi).
+    # ------------------------------------------------------------
+    token = ""
+    if request.method == "POST":
+        token = (request.POST.get(CHECKOUT_TOKEN_FIELD) or "")[:64]
+        found = _token_order(token)
+        if found and found[1] == request.user.pk:
+            return redirect("orders:success", order_id=found[0])
+        if found:
+            token = secrets.token_urlsafe(24)
+
     # ------------------------------------------------------------
     # 2A) SEPETİ OKU
     # ------------------------------------------------------------
-    cart = _get_cart(request.session)
+    cart_service = CartService.for_request(request)
+    cart = cart_service.lines()
 
     # ------------------------------------------------------------
     # 2B) 1. KONTROL: SEPET BOŞSA CHECKOUT YOK
@@ -63,35 +180,15 @@ def checkout(request):
         return redirect("cart:detail")
 
     # ------------------------------------------------------------
-    # 2C) SEPETTEKİ ÜRÜNLERİ DB’DEN ÇEK
+    # 2C) + 2D) FİYATLAMA — ürünler DB’den BİR KEZ okunur (cart/pricing.py)
+    # items: template’e gidecek satırlar (product, quantity, unit_price, line_total)
+    # total: sipariş toplamı — sepet sayfasıyla aynı Decimal hesabı
+    # Ürün satırları istek boyunca hafızada; aşağıdaki kilit adımı sadece
+    # stoku okur, ürünleri yeniden çekmez.
     # ------------------------------------------------------------
-    product_ids = [int(pid) for pid in cart.keys()]
-    products = Product.objects.filter(id__in=product_ids, is_active=True)
-
-    # ------------------------------------------------------------
-    # 2D) SAYFADA GÖSTERMEK İÇİN ITEMS + TOTAL HESAPLA
-    # items: template’e gidecek satırlar
-    # total: sipariş toplamı
-    # line_total: her ürün fiyat * adet
-    # ------------------------------------------------------------
-    items = []
-    total = 0
-
-    for p in products:
-        pid = str(p.id)
-        qty = int(cart.get(pid, {}).get("qty", 0))
-
-        if qty <= 0:
-            continue
-
-        line_total = p.price * qty
-        total += line_total
-
-        items.append({
-            "product": p,
-            "quantity": qty,
-            "line_total": line_total,
-        })
+    priced = pricing.price_lines(request, cart)
+    items = priced["items"]
+    total = priced["total"]
 
     # ------------------------------------------------------------
     # 2E) 2. KONTROL: ITEMS BOŞSA (GEÇERLİ ÜRÜN YOKSA)
@@ -115,89 +212,56 @@ def checkout(request):
         if form.is_valid():
 
             # ========================================================
-            # 4) ✅ 2. KAPI: ATOMIC + SELECT_FOR_UPDATE — EN KRİTİK
+            # 4) ✅ 2. KAPI: ATOMIC + KOŞULLU STOK DÜŞÜMÜ — EN KRİTİK
             # ========================================================
             # transaction.atomic ne yapar?
             # - bu blok içindeki işlemler "tek paket" olur
             # - hata olursa hepsi geri alınır (rollback)
             #
-            # select_for_update ne yapar?
-            # - ürün satırlarını DB’de kilitler
-            # - aynı anda 2 kişi aynı ürünü almaya çalışırsa çakışmayı engeller
-            with transaction.atomic():
-
-                # ----------------------------------------------------
-                # 4A) ÜRÜNLERİ KİLİTLEYEREK ÇEK (select_for_update)
-                # ----------------------------------------------------
-                locked_products = Product.objects.select_for_update().filter(
-                    id__in=product_ids, is_active=True
+            # NEDEN select_for_update YOK?
+            # - Eskiden ürünler kilitlenip satır satır kontrol edilir, sonra
+            #   her satır için OrderItem.create + p.save yapılırdı (2N cümle,
+            #   kilitler boyunca tutulur).
+            # - Şimdi: siparişin satırları TEK bulk_create, stok TEK koşullu
+            #   UPDATE (stock >= adet). Kontrol ve düşüm aynı cümlede olduğu
+            #   için önceden kilit gerekmez; sepet büyüse de cümle sayısı sabit.
+            #
+            # Yazım _write_order içinde; inventory.retrying onu atomic blokta
+            # çalıştırır. İyimser modda (STOCK_CONCURRENCY) çakışma olursa
+            # blok geri alınır ve kısa bir beklemeden sonra baştan yazılır.
+            try:
+                order = inventory.retrying(
+                    _write_order, form, request.user, token, items, total, cart_service,
                 )
-                locked_map = {p.id: p for p in locked_products}
-
-                # ----------------------------------------------------
-                # 4B) ✅ SON STOK KONTROLÜ (Checkout anı)
-                # Sepette stok kontrolü var (1. kapı)
-                # Checkout’ta tekrar şart (2. kapı)
-                # ----------------------------------------------------
-                for row in items:
-                    p = locked_map.get(row["product"].id)
-                    qty = int(row["quantity"])
-
-                    if p is None:
-                        messages.error(request, "Bir ürün bulunamadı. Sepeti kontrol et.")
-                        return redirect("cart:detail")
-
-                    if p.stock <= 0:
-                        messages.error(request, f"{p.name} tükendi.")
-                        return redirect("cart:detail")
-
-                    if qty > p.stock:
-                        messages.warning(
-                            request,
-                            f"{p.name}: stok yetersiz. Maksimum {p.stock} adet alabilirsiniz."
-                        )
-                        return redirect("cart:detail")
-
-                # ----------------------------------------------------
-                # 4C) ✅ ORDER OLUŞTUR (Sipariş başlığı)
-                # Order: user + total + form bilgileri (adres/telefon vs.)
-                # ----------------------------------------------------
-                order = form.save(commit=False)
-                order.user = request.user
-                order.total = total
-                order.save()
-
-                # ====================================================
-                # 4D) ✅ ORDERITEM OLUŞTUR (Sipariş satırları) + STOK DÜŞ
-                # ====================================================
-                # Snapshot mantığı:
-                # - sipariş anındaki ürün adı ve fiyatı kaydedilir
-                # - yarın fiyat değişse bile geçmiş sipariş bozulmaz
-                for row in items:
-                    p = locked_map[row["product"].id]
-                    qty = int(row["quantity"])
-
-                    OrderItem.objects.create(
-                        order=order,
-                        product_id=p.id,
-                        name=p.name,
-                        quantity=qty,
-                        unit_price=p.price,
-                    )
-
-                    # -------------------------------
-                    # ✅ STOK DÜŞ
-                    # -------------------------------
-                    p.stock -= qty
-                    p.save(update_fields=["stock"])
-
-                # ----------------------------------------------------
-                # 4E) ✅ SEPETİ TEMİZLE
-                # ----------------------------------------------------
-                _clear_cart(request.session)
+
+            except IntegrityError:
+                # Aynı token ile eş zamanlı ikinci istek: ilki commit etti,
+                # bu istek unique kısıtına takıldı → ilk siparişe yönlendir
+                found = _token_order(token)
+                if found is None:
+                    raise
+                if found[1] == request.user.pk:
+                    return redirect("orders:success", order_id=found[0])
+                # Başka kullanıcı aynı token'la aynı anda yazdı: hiçbir şey
+                # yazılmadı, form yeni token'la tekrar gönderilebilir
+                messages.warning(request, "Sipariş tamamlanamadı. Lütfen tekrar deneyin.")
+                return redirect("orders:checkout")
+
+            except inventory.OutOfStock as exc:
+                # --------------------------------------------------------
+                # 4F) AŞIRI SATIŞ ENGELLENDİ — hangi ürün? (rollback sonrası)
+                # --------------------------------------------------------
+                _out_of_stock_message(request, items, exc.quantities)
+                return redirect("cart:detail")
+
+            except inventory.StockConflict:
+                # İyimser mod: deneme hakkı bitti (çok yoğun ürün). Stok
+                # yetersiz değil; hiçbir şey yazılmadı, tekrar denenebilir.
+                messages.warning(request, "Yoğunluk nedeniyle sipariş tamamlanamadı. Lütfen tekrar deneyin.")
+                return redirect("orders:checkout")
 
             # --------------------------------------------------------
-            # 4F) TRANSACTION DIŞI: BAŞARILI MESAJ + SUCCESS SAYFASI
+            # 4G) TRANSACTION DIŞI: BAŞARILI MESAJ + SUCCESS SAYFASI
             # --------------------------------------------------------
             messages.success(request, "Siparişiniz alındı ✅")
             return redirect("orders:success", order_id=order.id)
@@ -210,13 +274,19 @@ def checkout(request):
     else:
         # ------------------------------------------------------------
         # 3C) GET: boş form
+        # Ödeme adımına gelen kullanıcının stok tutmaları uzatılır
         # ------------------------------------------------------------
         form = CheckoutForm()
+        if reservations.enabled():
+            reservations.touch(cart_service.key())
 
     return render(request, "orders/checkout.html", {
         "form": form,
         "items": items,
         "total": total,
+        # Form hatalıysa aynı token korunur (aynı sipariş denemesi)
+        "checkout_token": token or secrets.token_urlsafe(24),
+        "checkout_token_field": CHECKOUT_TOKEN_FIELD,
     })
 
 
@@ -233,11 +303,33 @@ def success(request, order_id):
 # ============================================================
 # 6) MY ORDERS — Siparişlerim listesi
 # ============================================================
+# Sayfa başına sabit sorgu: siparişler + satır özetleri TEK sorguda
+# (alt sorgular OrderItem.order index'i ile), sayfa derinliği fark etmez.
+# Sayfalama katalogdaki keyset ile aynı (catalog/pagination.py).
+MY_ORDERS_PAGE_SIZE = 20
+
+
 @login_required
 def my_orders(request):
     # Kullanıcı sadece kendi siparişlerini görür
-    orders = Order.objects.filter(user=request.user).order_by("-created_at")
-    return render(request, "orders/my_orders.html", {"orders": orders})
+    items = OrderItem.objects.filter(order=OuterRef("pk")).order_by()
+    orders = Order.objects.filter(user=request.user).annotate(
+        # Toplam adet ve satır sayısı: sipariş başına bir toplama
+        item_count=Coalesce(
+            Subquery(items.values("order").annotate(total=Sum("quantity")).values("total")), 0,
+        ),
+        line_count=Coalesce(
+            Subquery(items.values("order").annotate(total=Count("pk")).values("total")), 0,
+        ),
+        # Önizleme: siparişin ilk satırının (snapshot) adı
+        first_item_name=Subquery(items.order_by("pk").values("name")[:1]),
+    )
+    orders, next_cursor = keyset_page(orders, after=request.GET.get("after"), page_size=MY_ORDERS_PAGE_SIZE)
+    return render(request, "orders/my_orders.html", {
+        "orders": orders,
+        "next_page": page_query(request, next_cursor) if next_cursor else "",
+        "first_page": page_query(request) if request.GET.get("after") else "",
+    })
 
 
 # ============================================================
@@ -246,7 +338,8 @@ def my_orders(request):
 @login_required
 def order_detail(request, order_id):
     # Güvenlik: sadece kendi siparişi
-    order = get_object_or_404(Order, id=order_id, user=request.user)
+    # prefetch: template'teki order.items.all tek sorguda, önceden gelir
+    order = get_object_or_404(Order.objects.prefetch_related("items"), id=order_id, user=request.user)
     return render(request, "orders/order_detail.html", {"order": order})
 
 
@@ -262,13 +355,11 @@ def order_detail(request, order_id):
 def cancel_order(request, order_id):
     # ------------------------------------------------------------
     # 1) Güvenlik: sadece kendi siparişi
+    # Kötümser modda sipariş satırı kilitlenir; iyimser modda kilit yok,
+    # aynı siparişi iki kez iptal etmeyi 4. adımdaki koşullu UPDATE önler.
     # ------------------------------------------------------------
-    order = get_object_or_404(
-    Order.objects.select_for_update(),
-    id=order_id,
-    user=request.user
-)
-
+    orders = Order.objects if inventory.optimistic() else Order.objects.select_for_update()
+    order = get_object_or_404(orders, id=order_id, user=request.user)
 
     # ------------------------------------------------------------
     # 2) Kural: sadece pending iken iptal edilir
@@ -278,28 +369,36 @@ def cancel_order(request, order_id):
         return redirect("orders:order_detail", order_id=order.id)
 
     # ------------------------------------------------------------
-    # 3) Stok geri yükleme — select_for_update ile kilitle
+    # 3) Geri konacak adetler — ürün başına toplam
+    # OrderItem’da product_id var (snapshot). Ürün DB'den silinmişse
+    # UPDATE onu bulmaz; iptal yine yapılır (snapshot sayesinde sipariş
+    # bozulmaz). Pasif ürünün stoğu da geri konur: tekrar yayına
+    # alındığında sayım doğru olur.
     # ------------------------------------------------------------
-    # OrderItem’da product_id var (snapshot), o yüzden Product’ı id ile buluyoruz.
-    product_ids = [item.product_id for item in order.items.all()]
-
-    locked_products = Product.objects.select_for_update().filter(id__in=product_ids, is_active=True)
-    locked_map = {p.id: p for p in locked_products}
-
-    for item in order.items.all():
-        p = locked_map.get(item.product_id)
+    quantities = {}
+    for product_id, qty in order.items.values_list("product_id", "quantity"):
+        if product_id:
+            quantities[product_id] = quantities.get(product_id, 0) + int(qty)
 
-        # Ürün DB'den silinmiş / pasif olmuş olabilir → stok geri koyamayız
-        # Ama iptali yine de yapabiliriz (snapshot sayesinde sipariş bozulmaz)
-        if p:
-            p.stock += int(item.quantity)
-            p.save(update_fields=["stock"])
+    # ------------------------------------------------------------
+    # 4) Durum: "hâlâ pending ise iptal" (orders/status.py)
+    # Koşullu UPDATE + durum geçmişine kayıt. Eşzamanlı ikinci iptal /
+    # kargolama geçişi bulamaz → stok iki kez geri konmaz.
+    # İyimser modda durum SELECT ile UPDATE arasında değiştiyse
+    # StockConflict gelir; sonuç aynı: bu sipariş artık iptal edilemez.
+    # ------------------------------------------------------------
+    try:
+        status.transition_order(order, Order.STATUS_CANCELLED, actor=request.user)
+    except (status.InvalidTransition, inventory.StockConflict):
+        messages.warning(request, "Bu sipariş iptal edilemez (kargoya verilmiş olabilir).")
+        return redirect("orders:order_detail", order_id=order.id)
 
     # ------------------------------------------------------------
-    # 4) Sipariş durumunu iptal yap
+    # 5) Stok geri yükleme — TEK UPDATE (catalog/inventory.py)
+    #    + stok defterine iptal hareketleri (catalog/ledger.py)
     # ------------------------------------------------------------
-    order.status = Order.STATUS_CANCELLED
-    order.save(update_fields=["status"])
+    inventory.restore(quantities)
+    ledger.record(ledger.CANCEL, quantities, order_id=order.id)
 
     messages.success(request, "Sipariş iptal edildi. Stoklar geri yüklendi ✅")
     return redirect("orders:order_detail", order_id=order.id)